@@ -0,0 +1,341 @@
+# api_service.py
+# Headless asyncio HTTP service exposing the generation features of
+# utils/gemini_api.py. Gemini calls are awaited, so one worker process can keep
+# many requests in flight instead of holding a thread per call.
+#
+# Run (scale out with more workers, or more hosts behind a load balancer):
+#   GEMINI_API_KEY=... uvicorn api_service:app --host 0.0.0.0 --port 8000 --workers 4
+#
+# Endpoints (JSON in, JSON out):
+#   GET  /health
+#   GET  /metrics               per-model latency histograms and hedging counters
+#   POST /topics                {"syllabus_text"}
+#   POST /quiz/topic            {"topic", "num_questions", "quiz_context"}
+#   POST /quiz/context          {"context_text", "num_questions"}
+#   POST /study-resources       {"topic", "incorrect_questions": [question dicts]}
+#   POST /learning-path         {"topic", "incorrect_questions": [question dicts]}
+#   POST /jobs/question-bank    {"syllabus_text", "pyqs_text", "course_objectives"?,
+#                                "subject_name"?, "papers"?: {paper hash: file name}} -> 202 {"job_id"}
+#   POST /jobs/paper-questions  {"module_names", "paper_text", "course_objectives"?} -> 202 {"job_id"}
+#   POST /jobs/remediations     {"topic", "questions": [question dicts]} -> 202 {"job_id"}
+#   GET  /jobs/{job_id}         -> {"status": "queued|running|done|failed", "result"?, "error"?}
+#
+# A job runs in the worker that accepted it, but its state is kept in the SQLite
+# store (PADHAI_DB_PATH), so a poll can be answered by any worker on the host.
+# Hosts do not share that file: with several hosts, route each client to one
+# host (sticky sessions) or point them all at one service. Question banks submitted with a
+# subject_name are also merged into the shared question bank store; once the
+# subject has a stored bank, such jobs must list their papers, all of them new
+# (a job for papers already merged leaves the bank as it is).
+import os
+import json
+import time
+import uuid
+import asyncio
+from contextlib import closing
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from utils.gemini_api import (
+    extract_topics_from_syllabus_async,
+    generate_quiz_from_topic_sharded_async,
+    generate_quiz_from_context_async,
+    get_study_resources_async,
+    generate_learning_path_async,
+    generate_module_question_bank_async,
+    extract_paper_questions_async,
+    generate_question_remediations_async,
+    model_stats,
+)
+from utils.quiz import Quiz
+from utils.bank_store import connect, load_subject_bank, store_generated_bank
+
+MAX_RUNNING_JOBS = int(os.environ.get("PADHAI_MAX_RUNNING_JOBS", "4"))
+JOB_TTL_SECONDS = int(os.environ.get("PADHAI_JOB_TTL_SECONDS", "3600"))
+
+
+class RequestError(Exception):
+    """Invalid request body; reported to the client as HTTP 400."""
+
+
+async def _read_json(request, *required):
+    try:
+        body = await request.json()
+    except Exception:
+        raise RequestError("request body must be a JSON object")
+    if not isinstance(body, dict):
+        raise RequestError("request body must be a JSON object")
+    missing = [k for k in required if not body.get(k)]
+    if missing:
+        raise RequestError(f"missing field(s): {', '.join(missing)}")
+    return body
+
+
+def _num_questions(body):
+    try:
+        n = int(body.get("num_questions", 5))
+    except (TypeError, ValueError):
+        raise RequestError("num_questions must be an integer")
+    if not 1 <= n <= 20:
+        raise RequestError("num_questions must be between 1 and 20")
+    return n
+
+
+def _questions(body, field="incorrect_questions"):
+    quiz = Quiz.from_dicts(body[field]) if isinstance(body[field], list) else None
+    if not quiz:
+        raise RequestError(f"{field} must be a list of question objects")
+    return quiz.questions
+
+
+def _handler(fn):
+    """Maps RequestError to 400 and a None result (generation failed) to 502."""
+    async def endpoint(request):
+        try:
+            result = await fn(request)
+        except RequestError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if result is None:
+            return JSONResponse({"error": "generation failed, please retry"}, status_code=502)
+        if isinstance(result, JSONResponse):
+            return result
+        return JSONResponse(result)
+    return endpoint
+
+
+# ---------------------- Direct endpoints ----------------------
+async def health(request):
+    return JSONResponse({"status": "ok", "jobs": await job_queue.stats()})
+
+
+async def metrics(request):
+    return JSONResponse({"models": model_stats()})
+
+
+@_handler
+async def topics(request):
+    body = await _read_json(request, "syllabus_text")
+    result = await extract_topics_from_syllabus_async(body["syllabus_text"])
+    return None if result is None else {"topics": result}
+
+
+@_handler
+async def quiz_from_topic(request):
+    body = await _read_json(request, "topic")
+    result = await generate_quiz_from_topic_sharded_async(
+        body["topic"], _num_questions(body), body.get("quiz_context", "Quick Review"))
+    return None if result is None else {"quiz": result.to_dicts()}
+
+
+@_handler
+async def quiz_from_context(request):
+    body = await _read_json(request, "context_text")
+    result = await generate_quiz_from_context_async(body["context_text"], _num_questions(body))
+    return None if result is None else {"quiz": result.to_dicts()}
+
+
+@_handler
+async def study_resources(request):
+    body = await _read_json(request, "topic", "incorrect_questions")
+    return await get_study_resources_async(body["topic"], _questions(body))
+
+
+@_handler
+async def learning_path(request):
+    body = await _read_json(request, "topic", "incorrect_questions")
+    return await generate_learning_path_async(body["topic"], _questions(body))
+
+
+# ---------------------- Job queue (submit / poll) ----------------------
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS service_jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+"""
+
+
+class JobQueue:
+    """
+    Queue for long generations. The worker that accepts a job runs it, with at
+    most `max_running` jobs calling Gemini at once; the rest wait as "queued".
+    Job state lives in the SQLite store, so any worker sharing the database can
+    answer a poll. Jobs are kept for `ttl` seconds after they finish.
+    """
+    def __init__(self, max_running, ttl, db_path=None):
+        self._semaphore = None
+        self.max_running = max_running
+        self.ttl = ttl
+        self.db_path = db_path
+        self._schema_ready = False
+        self._tasks = set()
+
+    def _execute(self, sql, params=()):
+        """Run one statement in its own transaction and return its rows."""
+        with closing(connect(self.db_path)) as conn, conn:
+            if not self._schema_ready:
+                conn.executescript(JOBS_SCHEMA)
+                self._schema_ready = True
+            return conn.execute(sql, params).fetchall()
+
+    def _cutoff(self):
+        # Jobs of a worker that died while running them expire the same way
+        return time.time() - self.ttl
+
+    async def submit(self, kind, coro_fn, *args):
+        if self._semaphore is None:
+            # Created lazily so it binds to the server's running event loop
+            self._semaphore = asyncio.Semaphore(self.max_running)
+        job_id = uuid.uuid4().hex
+        # SQLite is blocking, keep it off the event loop
+        await asyncio.to_thread(self._execute, "DELETE FROM service_jobs WHERE COALESCE(finished_at, submitted_at) < ?",
+                                (self._cutoff(),))
+        await asyncio.to_thread(self._execute, "INSERT INTO service_jobs (job_id, kind, status, submitted_at) "
+                                "VALUES (?, ?, 'queued', ?)", (job_id, kind, time.time()))
+        task = asyncio.create_task(self._run(job_id, coro_fn, *args))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        await asyncio.to_thread(self._execute, f"UPDATE service_jobs SET {assignments} WHERE job_id = ?",
+                                (*fields.values(), job_id))
+
+    async def _run(self, job_id, coro_fn, *args):
+        async with self._semaphore:
+            await self._update(job_id, status="running", started_at=time.time())
+            try:
+                result = await coro_fn(*args)
+                if result is None:
+                    outcome = {"status": "failed", "error": "generation failed, please resubmit"}
+                else:
+                    outcome = {"status": "done", "result": json.dumps(result)}
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e)}
+            await self._update(job_id, finished_at=time.time(), **outcome)
+
+    async def get(self, job_id):
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT * FROM service_jobs WHERE job_id = ? AND COALESCE(finished_at, submitted_at) >= ?",
+            (job_id, self._cutoff()))
+        if not rows:
+            return None
+        job = {name: rows[0][name] for name in rows[0].keys() if rows[0][name] is not None}
+        if "result" in job:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    async def stats(self):
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT status, COUNT(*) AS n FROM service_jobs "
+            "WHERE COALESCE(finished_at, submitted_at) >= ? GROUP BY status", (self._cutoff(),))
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+job_queue = JobQueue(MAX_RUNNING_JOBS, JOB_TTL_SECONDS)
+
+
+def _check_stored_papers(subject_name, papers):
+    """Reject a question bank job whose result could not be merged into the subject's stored bank."""
+    bank = load_subject_bank(subject_name)
+    if bank is None:
+        return
+    if not papers:
+        raise RequestError(f"{subject_name} already has a stored bank; send the papers it is generated from")
+    known = [h for h in papers if h in bank["papers"]]
+    if known and len(known) < len(papers):
+        raise RequestError(f"{len(known)} of the papers are already in the stored bank; send only the new papers")
+
+
+async def _question_bank_job(subject_name, papers, syllabus_text, pyqs_text, course_objectives):
+    question_data = await generate_module_question_bank_async(syllabus_text, pyqs_text, course_objectives)
+    if not question_data:
+        return None
+    if subject_name:
+        # SQLite is blocking, keep it off the event loop
+        await asyncio.to_thread(store_generated_bank, subject_name, question_data, papers)
+    return {"subject_name": subject_name, "question_bank": question_data}
+
+
+async def _paper_questions_job(module_names, paper_text, course_objectives):
+    result = await extract_paper_questions_async(module_names, paper_text, course_objectives)
+    return None if result is None else {"module_questions": result}
+
+
+async def _remediations_job(topic, questions):
+    result = await generate_question_remediations_async(topic, questions)
+    return None if result is None else {"remediations": result}
+
+
+def _accepted(job_id):
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+
+@_handler
+async def submit_question_bank(request):
+    body = await _read_json(request, "syllabus_text", "pyqs_text")
+    papers = body.get("papers") or {}
+    if not isinstance(papers, dict):
+        raise RequestError("papers must map paper hashes to file names")
+    if body.get("subject_name"):
+        await asyncio.to_thread(_check_stored_papers, body["subject_name"], papers)
+    job_id = await job_queue.submit("question_bank", _question_bank_job, body.get("subject_name"), papers,
+                                    body["syllabus_text"], body["pyqs_text"], body.get("course_objectives"))
+    return _accepted(job_id)
+
+
+@_handler
+async def submit_paper_questions(request):
+    body = await _read_json(request, "module_names", "paper_text")
+    if not isinstance(body["module_names"], list):
+        raise RequestError("module_names must be a list")
+    job_id = await job_queue.submit("paper_questions", _paper_questions_job, body["module_names"],
+                                    body["paper_text"], body.get("course_objectives"))
+    return _accepted(job_id)
+
+
+@_handler
+async def submit_remediations(request):
+    body = await _read_json(request, "topic", "questions")
+    questions = _questions(body, "questions")
+    # Records are returned by position, so no question may be dropped as malformed
+    if len(questions) != len(body["questions"]):
+        raise RequestError("every question needs question_text, options and a valid answer")
+    job_id = await job_queue.submit("remediations", _remediations_job, body["topic"], questions)
+    return _accepted(job_id)
+
+
+async def get_job(request):
+    job = await job_queue.get(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "unknown or expired job"}, status_code=404)
+    return JSONResponse(job)
+
+
+routes = [
+    Route("/health", health),
+    Route("/metrics", metrics),
+    Route("/topics", topics, methods=["POST"]),
+    Route("/quiz/topic", quiz_from_topic, methods=["POST"]),
+    Route("/quiz/context", quiz_from_context, methods=["POST"]),
+    Route("/study-resources", study_resources, methods=["POST"]),
+    Route("/learning-path", learning_path, methods=["POST"]),
+    Route("/jobs/question-bank", submit_question_bank, methods=["POST"]),
+    Route("/jobs/paper-questions", submit_paper_questions, methods=["POST"]),
+    Route("/jobs/remediations", submit_remediations, methods=["POST"]),
+    Route("/jobs/{job_id}", get_job),
+]
+
+app = Starlette(routes=routes)
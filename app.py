@@ -1,315 +1,259 @@
 # app.py
 import streamlit as st
+import os
+import math
 import time
-import io
-import json
-import PyPDF2
-from pptx import Presentation
-from docx import Document
-from PIL import Image
-from datetime import datetime
-
-# PDF generation
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER
-from reportlab.pdfgen import canvas as pdfcanvas
+import uuid
 
 # --- Import AI / extraction utilities from your utils module ---
 from utils.gemini_api import (
-    generate_quiz_from_topic,
+    generate_quiz_from_topic_sharded,
     get_study_resources,
     generate_learning_path,
     extract_topics_from_syllabus,
     generate_quiz_from_context,
     process_syllabus,
     process_pyqs,
-    generate_module_question_bank  # returns (parsed_result, raw_text) when debug=True
+    extract_pyq_text,
+    extract_paper_questions,
+    generate_module_question_bank,  # returns (parsed_result, raw_text) when debug=True
+    prefetch_quiz_from_topic,
+    model_stats
 )
-
-# ---------------------- Helper Functions for Text Extraction ----------------------
-def extract_text_from_pdf(file_bytes):
-    """Extract text from PDF bytes using PyPDF2."""
-    try:
-        reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        text = ""
-        for page in reader.pages:
-            text += (page.extract_text() or "") + "\n"
-        return text
-    except Exception as e:
-        print(f"extract_text_from_pdf error: {e}")
-        return ""
-
-def extract_text_from_pptx(file_bytes):
-    """Extract text from PPTX bytes using python-pptx."""
-    try:
-        presentation = Presentation(io.BytesIO(file_bytes))
-        text = ""
-        for slide in presentation.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    text += shape.text + "\n"
-        return text
-    except Exception as e:
-        print(f"extract_text_from_pptx error: {e}")
-        return ""
-
-def extract_text_from_docx(file_bytes):
-    """Extract text from DOCX bytes using python-docx."""
-    try:
-        document = Document(io.BytesIO(file_bytes))
-        text = ""
-        for para in document.paragraphs:
-            text += para.text + "\n"
-        return text
-    except Exception as e:
-        print(f"extract_text_from_docx error: {e}")
-        return ""
-
-# ---------------------- Numbered Canvas for PDF page numbers ----------------------
-class NumberedCanvas(pdfcanvas.Canvas):
+# Thin-client mode: all Gemini generation goes through api_service.py
+if os.environ.get("PADHAI_SERVICE_URL"):
+    from utils.service_client import (
+        generate_quiz_from_topic_sharded,
+        get_study_resources,
+        generate_learning_path,
+        extract_topics_from_syllabus,
+        generate_quiz_from_context,
+        extract_paper_questions,
+        generate_module_question_bank,
+        prefetch_quiz_from_topic,
+    )
+from utils.jobs import KeyedJobCache, content_hash
+from utils.exporters import EXPORT_FORMATS, EXPORT_TEMPLATE_VERSION
+from utils.question_bank import (
+    paper_hash, bank_to_question_data,
+    build_question_index, filter_question_index, PAGE_SIZE
+)
+from utils.bank_store import (
+    load_subject_bank, store_generated_bank, merge_subject_papers, list_subjects, list_modules, search_questions,
+    count_questions,
+)
+from utils.remediation import RemediationStore, prefetch_remediations, remediation_plan
+from utils.perf import record_rerun, timed_rerun, render_rerun_timings
+from utils.notes import NOTE_FILE_TYPES, extract_notes, merge_notes
+from utils.uploads import UploadTooLarge
+from utils.quiz_prefetch import QuizPrefetcher
+from utils.quiz import Quiz
+from utils.performance import open_performance_store
+
+_script_started = time.perf_counter()
+
+# ---------------------- Background Question Bank Export ----------------------
+@st.cache_resource
+def get_export_jobs():
+    """Process-wide export worker pool, shared by all sessions."""
+    return KeyedJobCache(max_workers=2, max_entries=32)
+
+def _build_question_bank_export(export_format, subject_name, question_data):
+    exporter = EXPORT_FORMATS[export_format][0]
+    return exporter(subject_name, question_data).getvalue()
+
+def submit_question_bank_export(subject_name, question_data, bank_hash, export_format="PDF"):
     """
-    Canvas that records page states and writes page numbers & footer on save.
+    Queue an export in the background and return its cache key.
+    Identical (bank, format, template) inputs reuse the same job; `bank_hash`
+    is the content hash of (subject, bank) computed once by set_question_bank().
     """
-    def __init__(self, *args, footer_text: str = "", **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
-        self.footer_text = footer_text
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        """Add page info to each saved page state, then save."""
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            super().showPage()
-        super().save()
-
-    def draw_page_number(self, page_count):
-        page_num_text = f"Page {self._pageNumber} of {page_count}"
-        self.setFont("Helvetica", 9)
-        width, height = A4
-        # Page number centered
-        self.drawCentredString(width / 2.0, 15, page_num_text)
-        # Footer left: branding
-        if self.footer_text:
-            self.setFont("Helvetica", 9)
-            self.drawString(36, 15, self.footer_text)
-
-# ---------------------- PDF Export (continuous layout) ----------------------
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER
-from reportlab.pdfgen import canvas as pdfcanvas
-import io
-from datetime import datetime
-
-class NumberedCanvas(pdfcanvas.Canvas):
-    """Custom canvas to add page numbers and footer text."""
-    def __init__(self, *args, footer_text: str = "", **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
-        self.footer_text = footer_text
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        """Add page numbers & footer on every page before saving."""
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            super().showPage()
-        super().save()
-
-    def draw_page_number(self, page_count):
-        width, height = A4
-        self.setFont("Helvetica", 9)
-        page_num_text = f"Page {self._pageNumber} of {page_count}"
-        self.drawCentredString(width / 2.0, 15, page_num_text)
-        if self.footer_text:
-            self.drawRightString(width - 36, 15, self.footer_text)
-
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from datetime import datetime
-import io
-
-def export_question_bank_pdf(subject_name, question_data):
+    key = content_hash(bank_hash, export_format, EXPORT_TEMPLATE_VERSION)
+    get_export_jobs().submit(key, _build_question_bank_export, export_format, subject_name, question_data)
+    return key
+
+@st.fragment(run_every=1)
+def poll_export(export_key, export_format):
+    """Ticks only while the export is being built, then reruns the page once to show its download button."""
+    future = get_export_jobs().get(export_key)
+    if future is None or future.done():
+        st.rerun(scope="app")
+    st.caption(f"⏳ Preparing your {export_format} in the background...")
+
+@st.fragment
+def render_export_download(subject_name):
+    """Lets the user pick a format and shows its download button once the export is ready."""
+    question_data = st.session_state.pyq_question_bank
+    export_format = st.radio("Download format:", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+    _, extension, mime = EXPORT_FORMATS[export_format]
+    # Re-submitting is a cache lookup when the job already exists
+    export_key = submit_question_bank_export(subject_name, question_data, st.session_state.pyq_bank_hash,
+                                             export_format)
+    future = get_export_jobs().get(export_key)
+    if not future.done():
+        # Polling stops with this rerun: a finished export renders a static button below
+        poll_export(export_key, export_format)
+        return
+    try:
+        st.download_button(
+            label=f"📥 Download Question Bank {export_format}",
+            data=future.result(),
+            file_name=f"{subject_name.replace(' ', '_')}_Question_Bank.{extension}",
+            mime=mime,
+            on_click="ignore",
+            key=f"export_download_{export_key}"
+        )
+    except Exception as e:
+        st.error(f"Could not create {export_format}: {e}")
+
+# ---------------------- Remediation Prefetch ----------------------
+@st.cache_resource
+def get_remediation_jobs():
+    """Process-wide pool for speculative remediation jobs, shared by all sessions."""
+    return KeyedJobCache(max_workers=4, max_entries=256)
+
+@st.cache_resource
+def get_remediation_store():
+    """Per-(topic, question) remediation cache shared by all sessions."""
+    return RemediationStore()
+
+# ---------------------- Speculative Syllabus Quizzes ----------------------
+# Quizzes are prefetched with the syllabus form's default settings
+SYLLABUS_QUIZ_QUESTIONS = 5
+SYLLABUS_QUIZ_CONTEXTS = ("Quick Review", "Semester Exam Prep")
+
+@st.cache_resource
+def get_quiz_prefetcher():
+    """Process-wide prefetcher for syllabus topic quizzes, shared by all sessions."""
+    return QuizPrefetcher(prefetch_quiz_from_topic)
+
+def session_id():
+    """Random id of this browser session."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+# ---------------------- Student Performance ----------------------
+RETRY_QUESTIONS = 10
+
+@st.cache_resource
+def get_performance_store():
+    """Attempt log and weak-area aggregates (SQLite, or Firebase if configured)."""
+    return open_performance_store()
+
+@st.cache_resource
+def get_attempt_jobs():
+    """Background writers for submitted quizzes, so Firebase round-trips never block the page."""
+    return KeyedJobCache(max_workers=2, max_entries=64)
+
+def current_student():
+    """The Student ID from the sidebar, else this browser session."""
+    student = (st.session_state.get("student_id") or "").strip().lower()
+    return student or f"session:{session_id()}"
+
+def record_attempt(quiz, answers):
+    """Queue the submitted quiz for the performance store; returns the job's future."""
+    return get_attempt_jobs().submit(uuid.uuid4().hex, get_performance_store().record_attempt,
+                                     current_student(), st.session_state.quiz_topic, quiz, answers)
+
+def get_weak_areas():
+    """The student's weakest topics, read once per student and quiz round."""
+    student = current_student()
+    cached = st.session_state.weak_areas
+    if cached is None or cached[0] != student:
+        try:
+            cached = (student, get_performance_store().weak_topics(student))
+        except Exception as e:
+            print(f"Could not load weak areas: {e}")
+            cached = (student, [])
+        st.session_state.weak_areas = cached
+    return cached[1]
+
+# ---------------------- Question Bank View ----------------------
+def set_question_bank(subject_name, question_data):
+    """Show `question_data` in the question bank view; its sorted index is built here, once."""
+    st.session_state.pyq_question_bank = question_data
+    st.session_state.pyq_subject_name = subject_name
+    st.session_state.pyq_question_index = build_question_index(question_data)
+    st.session_state.pyq_question_filter = None
+    # Hashing a large bank takes milliseconds, so it is done here, not on every export lookup
+    st.session_state.pyq_bank_hash = content_hash(subject_name, question_data)
+
+def render_page_selector(total, key, filters):
     """
-    Generate a professional module-wise question bank PDF (Streamlit-compatible).
-    Returns a BytesIO buffer instead of writing to a file.
+    Page picker for `total` rows; returns the (start, end) slice of the current
+    page. A change of `filters` jumps back to the first page.
     """
-
-    buffer = io.BytesIO()
-    pdf = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=60,
-        rightMargin=60,
-        topMargin=60,
-        bottomMargin=50,
-    )
-
-    story = []
-    styles = getSampleStyleSheet()
-
-    # --- Styles ---
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=styles["Heading1"],
-        fontName="Helvetica-Bold",
-        fontSize=22,
-        leading=28,
-        alignment=TA_CENTER,
-        spaceAfter=30,
-    )
-
-    subtitle_style = ParagraphStyle(
-        "SubtitleStyle",
-        parent=styles["Normal"],
-        fontName="Helvetica",
-        fontSize=14,
-        leading=18,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor("#555555"),
-        spaceAfter=12,
-    )
-
-    module_title_style = ParagraphStyle(
-        "ModuleTitle",
-        parent=styles["Heading2"],
-        fontName="Helvetica-Bold",
-        fontSize=16,
-        leading=22,
-        textColor=colors.HexColor("#1F4E79"),
-        spaceBefore=16,
-        spaceAfter=8,
-    )
-
-    question_style = ParagraphStyle(
-        "QuestionStyle",
-        parent=styles["Normal"],
-        fontName="Helvetica",
-        fontSize=11.5,
-        leading=18,
-        alignment=TA_JUSTIFY,
-        spaceBefore=4,
-        spaceAfter=3,
-    )
-
-    top10_title_style = ParagraphStyle(
-        "Top10Title",
-        parent=styles["Heading2"],
-        fontName="Helvetica-Bold",
-        fontSize=15,
-        leading=22,
-        textColor=colors.HexColor("#9C27B0"),
-        spaceBefore=24,
-        spaceAfter=10,
-    )
-
-    top10_item_style = ParagraphStyle(
-        "Top10Item",
-        parent=styles["Normal"],
-        fontName="Helvetica",
-        fontSize=11.5,
-        leading=18,
-        spaceBefore=2,
-    )
-
-    footer_style = ParagraphStyle(
-        "FooterStyle",
-        parent=styles["Normal"],
-        fontSize=9,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor("#999999"),
-        spaceBefore=30,
-    )
-
-    # --- 1. Cover Page ---
-    story.append(Spacer(1, 2 * inch))
-    story.append(Paragraph("Module-wise Question Bank", title_style))
-    story.append(Paragraph(f"Subject: {subject_name}", subtitle_style))
-    story.append(
-        Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}", subtitle_style)
-    )
-    story.append(Spacer(1, 0.5 * inch))
-    story.append(Paragraph("Generated and created by <b>Padhai Karo</b>", subtitle_style))
-    story.append(PageBreak())
-
-    # --- 2. Module-wise Questions ---
-    top_repeated = []
-
-    for m_index, (module_name, questions) in enumerate(question_data.items(), start=1):
-        story.append(Paragraph(f"Module {m_index} – {module_name}", module_title_style))
-        story.append(Paragraph(f"Total Questions: {len(questions)}", question_style))
-        story.append(Spacer(1, 6))
-
-        for q_index, q in enumerate(questions, start=1):
-            q_text = q.get("question_text", "").strip()
-            reps = int(q.get("repetition_count", 1))
-
-            # --- Importance Detection ---
-            if reps >= 5:
-                star = "★★ "
-            elif reps >= 3:
-                star = "★ "
-            else:
-                star = ""
-
-            q_num = f"{m_index}.{q_index}"
-            full_text = f"<b>{q_num}.</b> {star}{q_text}"
-            story.append(Paragraph(full_text, question_style))
-
-            # Track for Top 10 section
-            top_repeated.append((q_text, reps, q_num))
-
-        story.append(Spacer(1, 12))
-
-    # --- 3. Top 10 Most Repeated ---
-    story.append(Paragraph("Top 10 Most Repeated (Must-Prepare)", top10_title_style))
-    top_repeated.sort(key=lambda x: x[1], reverse=True)
-    top10 = top_repeated[:10]
-
-    for rank, (q_text, reps, qnum) in enumerate(top10, start=1):
-        star = "★★" if reps >= 5 else "★" if reps >= 3 else ""
-        line = f"{rank}. {star} {q_text} (<b>{qnum}</b>)"
-        story.append(Paragraph(line, top10_item_style))
-
-    # --- 4. Footer ---
-    story.append(Spacer(1, 30))
-    story.append(
-        Paragraph("Generated by Padhai Karo – AI-powered learning assistant", footer_style)
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    filters_key = f"{key}_filters"
+    if st.session_state.get(filters_key) != filters or st.session_state.get(key, 1) > pages:
+        st.session_state[filters_key] = filters
+        st.session_state[key] = 1
+    page = st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, step=1, key=key)
+    start = (page - 1) * PAGE_SIZE
+    end = min(start + PAGE_SIZE, total)
+    if total:
+        st.caption(f"Showing questions {start + 1}–{end} of {total}.")
+    else:
+        st.caption("No questions match these filters.")
+    return start, end
+
+def render_question_rows(rows):
+    # One markdown element per page instead of one per question
+    lines = []
+    for q in rows:
+        where = f"(_{q['module']}, repeated {q['repetition_count']} times_)"
+        if q["importance"].lower() == "high":
+            lines.append(f"- **⭐ {q['question_text']}**  —  {where}")
+        else:
+            lines.append(f"- {q['question_text']}  —  {where}")
+    if lines:
+        st.markdown("\n".join(lines))
+
+@st.fragment
+@timed_rerun("question bank view")
+def render_question_bank_view():
+    """Filter, search and page through the current question bank; reruns on its own."""
+    index = st.session_state.pyq_question_index
+    st.subheader(f"📗 {st.session_state.pyq_subject_name}: {len(index)} questions")
+
+    module_counts = {m: len(qs) for m, qs in st.session_state.pyq_question_bank.items()}
+    module_options = [None] + list(module_counts)
+    if st.session_state.get("qb_module") not in module_options:
+        st.session_state.qb_module = None
+    col_module, col_importance = st.columns(2)
+    module = col_module.selectbox(
+        "Module:", module_options, key="qb_module",
+        format_func=lambda m: "All modules" if m is None else f"{m} ({module_counts[m]})"
     )
-
-    pdf.build(story)
-    buffer.seek(0)
-    return buffer
-
+    importance = col_importance.selectbox("Importance:", [None, "High", "Normal"], key="qb_importance",
+                                          format_func=lambda i: "All" if i is None else i)
+    col_search, col_reps = st.columns([2, 1])
+    query = col_search.text_input("Search questions:", key="qb_search")
+    min_reps = col_reps.number_input("Minimum repetitions:", min_value=0, value=0, step=1, key="qb_min_reps")
+
+    # Filter positions are recomputed only when a filter changes, never on page turns
+    filters = (id(index), query, module, importance, min_reps)
+    cached = st.session_state.pyq_question_filter
+    if cached is None or cached[0] != filters:
+        cached = (filters, filter_question_index(index, query, module, importance, min_reps))
+        st.session_state.pyq_question_filter = cached
+    positions = cached[1]
+
+    start, end = render_page_selector(len(positions), "qb_page", filters)
+    render_question_rows(index[i] for i in positions[start:end])
 
 # ---------------------- Streamlit App Setup ----------------------
 st.set_page_config(page_title="Padhai Karo", layout="centered")
 st.title("Padhai Karo - Your Personalized Engineering Tutor")
+st.sidebar.text_input("Student ID", key="student_id",
+                      help="Use the same ID on every visit to keep track of your weak areas across quizzes.")
 
 # Initialize session state keys if missing
 keys_to_init = [
     'quiz_data', 'user_answers', 'quiz_topic', 'start_time',
-    'syllabus_topics', 'pyq_question_bank', 'extracted_syllabus_preview'
+    'syllabus_topics', 'pyq_question_bank', 'extracted_syllabus_preview', 'quiz_results',
+    'pyq_subject_name', 'pyq_question_index', 'pyq_question_filter', 'pyq_bank_hash', 'weak_areas'
 ]
 for key in keys_to_init:
     if key not in st.session_state:
@@ -324,161 +268,245 @@ with st.expander("About this feature", expanded=False):
         "Provide syllabus (upload image/pdf or paste text), optional course objectives, "
         "and 4–6 previous year question papers (PDF or DOCX). The system will extract modules "
         "from the syllabus, parse PYQs, map questions to modules, count repetitions, "
-        "and mark high-importance questions."
+        "and mark high-importance questions. "
+        "Question banks are saved per subject: when a new paper comes out, enter the same subject "
+        "name and upload just the new paper(s) to merge them into the existing bank."
     )
 
-# Debugging options (toggle)
-with st.expander("Options / Debugging", expanded=False):
-    show_extracted_preview_by_default = st.checkbox("Automatically show extracted syllabus preview after extraction", value=True)
+@st.fragment
+@timed_rerun("PYQ generator")
+def render_pyq_generator():
+    """Saved banks, the PYQ form, the syllabus preview and generation; reruns on its own."""
+    # Saved question banks: load, search and filter without calling the AI
+    with st.expander("📚 Load a saved question bank", expanded=False):
+        saved_subjects = list_subjects()
+        if not saved_subjects:
+            st.caption("No saved question banks yet. Generated banks are saved here automatically.")
+        else:
+            subject_labels = {
+                f"{s['name']} ({s['question_count']} questions, {s['paper_count']} papers)": s["name"]
+                for s in saved_subjects
+            }
+            saved_subject = subject_labels[st.selectbox("Subject:", list(subject_labels), key="saved_bank_subject")]
+            module_counts = list_modules(saved_subject)
+            module_options = [None] + list(module_counts)
+            if st.session_state.get("saved_bank_module") not in module_options:
+                st.session_state.saved_bank_module = None
+            col_module, col_search = st.columns(2)
+            saved_module = col_module.selectbox(
+                "Module:", module_options, key="saved_bank_module",
+                format_func=lambda m: "All modules" if m is None else f"{m} ({module_counts[m]})"
+            )
+            bank_search = col_search.text_input("Search questions:", key="saved_bank_search")
+            col_imp, col_reps = st.columns(2)
+            only_high = col_imp.checkbox("Only high-importance questions", key="saved_bank_only_high")
+            min_reps = col_reps.number_input("Minimum repetitions:", min_value=0, value=0, step=1, key="saved_bank_min_reps")
+
+            # Filtered, counted and paged in SQL: only one page of rows leaves the database
+            filters = dict(query=bank_search, module=saved_module, importance="High" if only_high else None,
+                           min_repetitions=min_reps)
+            total = count_questions(saved_subject, **filters)
+            start, end = render_page_selector(total, "saved_bank_page", (saved_subject, *filters.values()))
+            render_question_rows(search_questions(saved_subject, **filters, limit=PAGE_SIZE, offset=start))
+
+            if st.button("Use this question bank", key="load_saved_bank"):
+                question_data = bank_to_question_data(load_subject_bank(saved_subject))
+                set_question_bank(saved_subject, question_data)
+                submit_question_bank_export(saved_subject, question_data, st.session_state.pyq_bank_hash, "PDF")
+
+    # Debugging options (toggle)
+    with st.expander("Options / Debugging", expanded=False):
+        show_extracted_preview_by_default = st.checkbox("Automatically show extracted syllabus preview after extraction", value=True)
+        if st.checkbox("Show rerun timings", key="show_rerun_timings"):
+            render_rerun_timings()
+        if st.checkbox("Show AI model latency", key="show_model_stats"):
+            st.json(model_stats())
+        if st.checkbox("Show syllabus quiz prefetch stats", key="show_prefetch_stats"):
+            st.json(get_quiz_prefetcher().stats())
+
+    with st.form("pyq_bank_form"):
+        subject_name = st.text_input("Subject Name:", placeholder="e.g., 'Data Structures and Algorithms'")
+
+        syllabus_input_type = st.radio("How would you like to provide the syllabus?",
+                                       ["Upload Syllabus File", "Paste Syllabus Text"])
+
+        syllabus_file = None
+        pasted_syllabus_text = None
+
+        if syllabus_input_type == "Upload Syllabus File":
+            syllabus_file = st.file_uploader("Upload Syllabus (Image or PDF):", type=['png', 'jpg', 'jpeg', 'pdf'])
+        else:
+            pasted_syllabus_text = st.text_area("Paste your syllabus text here:", height=200)
 
-with st.form("pyq_bank_form"):
-    subject_name = st.text_input("Subject Name:", placeholder="e.g., 'Data Structures and Algorithms'")
+        # Button to extract & preview (for uploaded syllabus)
+        extract_preview_btn = st.form_submit_button("Extract & Preview Syllabus")
 
-    syllabus_input_type = st.radio("How would you like to provide the syllabus?",
-                                   ["Upload Syllabus File", "Paste Syllabus Text"])
+        course_objectives = st.text_area("Paste Course Objectives (Optional):", height=150)
 
-    syllabus_file = None
-    pasted_syllabus_text = None
+        pyq_files = st.file_uploader(
+            "Upload Previous Year Question Papers (PDF or DOCX, 4-6 files; only new papers for an existing subject):",
+            type=['pdf', 'docx'],
+            accept_multiple_files=True
+        )
 
-    if syllabus_input_type == "Upload Syllabus File":
-        syllabus_file = st.file_uploader("Upload Syllabus (Image or PDF):", type=['png', 'jpg', 'jpeg', 'pdf'])
-    else:
-        pasted_syllabus_text = st.text_area("Paste your syllabus text here:", height=200)
+        generate_btn = st.form_submit_button("Generate Module-wise Question Bank")
 
-    # Button to extract & preview (for uploaded syllabus)
-    extract_preview_btn = st.form_submit_button("Extract & Preview Syllabus")
+    # Handle extraction & preview step (user pressed Extract & Preview Syllabus)
+    if 'extract_preview_btn' in locals() and extract_preview_btn:
+        if syllabus_input_type == "Upload Syllabus File":
+            if not syllabus_file:
+                st.warning("Please upload a syllabus file to extract.")
+            else:
+                try:
+                    with st.spinner("Extracting text from syllabus..."):
+                        extracted = process_syllabus(syllabus_file)
+                        st.session_state.extracted_syllabus_preview = extracted or ""
+                        if show_extracted_preview_by_default:
+                            st.success("Syllabus extracted. Please review and edit if needed.")
+                except UploadTooLarge as e:
+                    st.warning(str(e))
+        else:
+            # pasted text
+            if pasted_syllabus_text and pasted_syllabus_text.strip():
+                st.session_state.extracted_syllabus_preview = pasted_syllabus_text
+                st.success("Syllabus text taken from paste. You can edit it below before generating.")
+            else:
+                st.warning("Please paste some syllabus text in the box.")
+
+    # Show editable preview if available
+    if st.session_state.extracted_syllabus_preview is not None:
+        st.subheader("Editable Syllabus Preview (you can correct OCR mistakes)")
+        edited = st.text_area("Edit extracted syllabus text before generating (this will be used by the AI):",
+                              value=st.session_state.extracted_syllabus_preview, height=250, key="edited_syllabus_text")
+        # Keep session state in sync
+        st.session_state.extracted_syllabus_preview = edited
+
+    # Handle generation (Generate Module-wise Question Bank button)
+    if 'generate_btn' in locals() and generate_btn:
+        # A stored bank for this subject only needs the new papers merged in
+        stored_bank = load_subject_bank(subject_name) if subject_name else None
+
+        # Basic validations
+        if not subject_name:
+            st.warning("Please enter a subject name.")
+        elif stored_bank is None and (not st.session_state.extracted_syllabus_preview or not st.session_state.extracted_syllabus_preview.strip()):
+            st.warning("Please extract/paste and confirm syllabus text (use 'Extract & Preview Syllabus').")
+        elif stored_bank is None and (not pyq_files or len(pyq_files) < 4 or len(pyq_files) > 6):
+            st.warning("Please upload between 4 and 6 PYQ files.")
+        elif stored_bank is not None and (not pyq_files or len(pyq_files) > 6):
+            st.warning(f"A question bank for {stored_bank['subject']} already exists. Upload 1-6 new PYQ files to add them to it.")
+        else:
+            with st.spinner("Processing PYQ files and generating your question bank..."):
+                try:
+                    papers = {paper_hash(f): f for f in pyq_files}
+                    parsed_result = None
 
-    course_objectives = st.text_area("Paste Course Objectives (Optional):", height=150)
+                    if stored_bank is None:
+                        # Use the edited/preserved syllabus text
+                        syllabus_text_final = st.session_state.extracted_syllabus_preview
 
-    pyq_files = st.file_uploader(
-        "Upload Previous Year Question Papers (PDF or DOCX, 4-6 files):",
-        type=['pdf', 'docx'],
-        accept_multiple_files=True
-    )
+                        # Concatenate PYQs text
+                        pyqs_text = process_pyqs(pyq_files)
 
-    generate_btn = st.form_submit_button("Generate Module-wise Question Bank")
+                        # Generate module-wise question bank via AI (supports debug)
+                        parsed_result= generate_module_question_bank(syllabus_text_final, pyqs_text, course_objectives)
 
-# Handle extraction & preview step (user pressed Extract & Preview Syllabus)
-if 'extract_preview_btn' in locals() and extract_preview_btn:
-    if syllabus_input_type == "Upload Syllabus File":
-        if not syllabus_file:
-            st.warning("Please upload a syllabus file to extract.")
-        else:
-            with st.spinner("Extracting text from syllabus..."):
-                extracted = process_syllabus(syllabus_file)
-                st.session_state.extracted_syllabus_preview = extracted or ""
-                if show_extracted_preview_by_default:
-                    st.success("Syllabus extracted. Please review and edit if needed.")
-    else:
-        # pasted text
-        if pasted_syllabus_text and pasted_syllabus_text.strip():
-            st.session_state.extracted_syllabus_preview = pasted_syllabus_text
-            st.success("Syllabus text taken from paste. You can edit it below before generating.")
-        else:
-            st.warning("Please paste some syllabus text in the box.")
-
-# Show editable preview if available
-if st.session_state.extracted_syllabus_preview is not None:
-    st.subheader("Editable Syllabus Preview (you can correct OCR mistakes)")
-    edited = st.text_area("Edit extracted syllabus text before generating (this will be used by the AI):",
-                          value=st.session_state.extracted_syllabus_preview, height=250, key="edited_syllabus_text")
-    # Keep session state in sync
-    st.session_state.extracted_syllabus_preview = edited
-
-# Handle generation (Generate Module-wise Question Bank button)
-if 'generate_btn' in locals() and generate_btn:
-    # Basic validations
-    if not subject_name:
-        st.warning("Please enter a subject name.")
-    elif not st.session_state.extracted_syllabus_preview or not st.session_state.extracted_syllabus_preview.strip():
-        st.warning("Please extract/paste and confirm syllabus text (use 'Extract & Preview Syllabus').")
-    elif not pyq_files or len(pyq_files) < 4 or len(pyq_files) > 6:
-        st.warning("Please upload between 4 and 6 PYQ files.")
-    else:
-        with st.spinner("Processing PYQ files and generating your question bank..."):
-            try:
-                # Use the edited/preserved syllabus text
-                syllabus_text_final = st.session_state.extracted_syllabus_preview
+                        if parsed_result:
+                            # Merged instead if someone stored this subject's bank meanwhile
+                            stored_bank = store_generated_bank(subject_name, parsed_result, {h: f.name for h, f in papers.items()})
+                            parsed_result = bank_to_question_data(stored_bank)
+                    else:
+                        # Incremental update: only papers not merged before are sent to the AI
+                        new_papers = {h: f for h, f in papers.items() if h not in stored_bank["papers"]}
+                        if not new_papers:
+                            st.info("All uploaded papers are already part of this question bank.")
+                        extracted = {}
+                        for h, f in new_papers.items():
+                            module_questions = extract_paper_questions(stored_bank["modules"], extract_pyq_text(f), course_objectives)
+                            if module_questions is None:
+                                st.error(f"Could not process {f.name}; it was skipped.")
+                                continue
+                            extracted[h] = (f.name, module_questions)
+                        if extracted:
+                            # Merged into the latest stored bank, so concurrent uploads are all kept
+                            stored_bank, merge_stats = merge_subject_papers(subject_name, extracted)
+                            for h, stats in merge_stats.items():
+                                st.info(f"{extracted[h][0]}: {stats['new']} new and {stats['repeated']} repeated questions merged.")
+                        parsed_result = bank_to_question_data(stored_bank)
+
+                    if not parsed_result:
+                        st.error("Failed to generate the question bank. Try again or check inputs.")
+                    else:
+                        set_question_bank(subject_name, parsed_result)
+                        # Start the PDF right away; the question list below does not wait for it
+                        submit_question_bank_export(subject_name, parsed_result, st.session_state.pyq_bank_hash, "PDF")
+                        st.success(f"Module-wise Question Bank for {subject_name} generated successfully.")
 
-                # Concatenate PYQs text
-                pyqs_text = process_pyqs(pyq_files)
+                except Exception as e:
+                    st.error(f"Error while generating question bank: {e}")
 
-                # Generate module-wise question bank via AI (supports debug)
-                parsed_result= generate_module_question_bank(syllabus_text_final, pyqs_text, course_objectives)
+    # The generated or loaded bank stays on screen until a new one replaces it
+    if st.session_state.pyq_question_bank:
+        render_question_bank_view()
+        # Export (Download button appears once the background job finishes)
+        render_export_download(st.session_state.pyq_subject_name)
 
-                if not parsed_result:
-                    st.error("Failed to generate the question bank. Try again or check inputs.")
-                else:
-                    st.session_state.pyq_question_bank = parsed_result
-
-                    st.success(f"Module-wise Question Bank for {subject_name} generated successfully.")
-                    # Display modules
-                    for module_name, questions in parsed_result.items():
-                        questions_sorted = sorted(
-                            questions,
-                            key=lambda q: (0 if q.get("importance", "").lower() == "high" else 1,
-                                           -int(q.get("repetition_count", 0)))
-                        )
-                        with st.expander(f"📗 {module_name} ({len(questions_sorted)} questions)"):
-                            for q in questions_sorted:
-                                q_text = q.get("question_text", "").strip()
-                                rep = q.get("repetition_count", 0)
-                                imp = q.get("importance", "Normal")
-                                if imp.lower() == "high":
-                                    st.markdown(f"**⭐ {q_text}**  —  (_repeated {rep} times_)")
-                                else:
-                                    st.markdown(f"- {q_text}  —  (_repeated {rep} times_)")
-
-                    # PDF export (Download button)
-                    try:
-                        pdf_buffer = export_question_bank_pdf(subject_name, parsed_result)
-                        st.download_button(
-                            label="📥 Download Question Bank PDF",
-                            data=pdf_buffer,
-                            file_name=f"{subject_name.replace(' ', '_')}_Question_Bank.pdf",
-                            mime="application/pdf"
-                        )
-                    except Exception as e:
-                        st.error(f"Could not create PDF: {e}")
-
-
-            except Exception as e:
-                st.error(f"Error while generating question bank: {e}")
+render_pyq_generator()
 
 # ---------------------- QUIZ FLOW (Existing App Functionality) ----------------------
-# STATE 1: A quiz is active
-if st.session_state.quiz_data and st.session_state.user_answers is None:
+def get_quiz_results():
+    """
+    Results of the submitted quiz, computed once per (quiz, answers) and kept in
+    session state together with the remediation plan, so reruns of the results
+    view neither rescore nor re-enter the plan functions.
+    """
+    quiz = st.session_state.quiz_data
+    key = (quiz.content_hash, st.session_state.user_answers)
+    results = st.session_state.quiz_results
+    if results is None or results["key"] != key:
+        correct, score, incorrect_questions = quiz.score(st.session_state.user_answers)
+        try:
+            # How other students did on these questions, read before this attempt is added
+            miss_rates = get_performance_store().miss_rates(q.content_hash for q in quiz)
+        except Exception as e:
+            print(f"Could not load miss rates: {e}")
+            miss_rates = {}
+        results = {"key": key, "plan": None, "correct": correct, "score": score,
+                   "incorrect_questions": incorrect_questions, "miss_rates": miss_rates,
+                   "attempt": record_attempt(quiz, st.session_state.user_answers)}
+        st.session_state.quiz_results = results
+    return results
+
+@st.fragment
+@timed_rerun("quiz form")
+def render_quiz_form():
     st.header(f"Quiz on: {st.session_state.quiz_topic}")
+    # Prepare remediation for every question while the user is answering
+    prefetch_remediations(get_remediation_jobs(), get_remediation_store(),
+                          st.session_state.quiz_topic, st.session_state.quiz_data)
     with st.form("quiz_form"):
-        temp_user_answers = {}
+        temp_user_answers = []
         for i, q in enumerate(st.session_state.quiz_data):
-            st.subheader(f"Question {i+1}: {q['question_text']}")
-            temp_user_answers[i] = st.radio("Choose one:", q['options'], key=f"q{i}", index=None)
+            st.subheader(f"Question {i+1}: {q.question_text}")
+            # The radio returns the option index; only the label shows the text
+            temp_user_answers.append(st.radio("Choose one:", range(len(q.options)), format_func=q.options.__getitem__,
+                                              key=f"q{i}", index=None))
 
         if st.form_submit_button("Submit Answers"):
-            st.session_state.user_answers = temp_user_answers
-            st.rerun()
-
-# STATE 2: A quiz has been submitted and results are shown
-elif st.session_state.user_answers:
+            st.session_state.user_answers = tuple(temp_user_answers)
+            get_quiz_results()
+            # Switching to the results view needs the whole page
+            st.rerun(scope="app")
+
+@st.fragment
+@timed_rerun("results view")
+def render_results():
     st.header("Your Results")
     quiz_data = st.session_state.quiz_data
     user_answers = st.session_state.user_answers
-
-    score = 0
-    incorrect_questions = []
-    for i, q in enumerate(quiz_data):
-        try:
-            if user_answers.get(i, "").strip() == q['correct_answer'].strip():
-                score += 1
-            else:
-                incorrect_questions.append(q)
-        except Exception:
-            # defensive: if missing keys or trimming issues
-            if user_answers.get(i, "") == q.get('correct_answer', ""):
-                score += 1
-            else:
-                incorrect_questions.append(q)
+    results = get_quiz_results()
+    score = results["score"]
+    incorrect_questions = results["incorrect_questions"]
 
     score_percent = score / len(quiz_data) if len(quiz_data) > 0 else 0
     if score_percent >= 0.9:
@@ -490,21 +518,48 @@ elif st.session_state.user_answers:
 
     st.subheader("Detailed Feedback")
     for i, q in enumerate(quiz_data):
-        expanded = (user_answers.get(i, "").strip() != q.get('correct_answer', '').strip())
-        with st.expander(f"Question {i+1}: Review", expanded=expanded):
-            st.markdown(f"**Question:** {q['question_text']}")
-            if user_answers.get(i, "").strip() == q.get('correct_answer', '').strip():
-                st.success(f"Your answer: {user_answers.get(i)} (Correct)")
+        is_correct = results["correct"][i]
+        with st.expander(f"Question {i+1}: Review", expanded=not is_correct):
+            st.markdown(f"**Question:** {q.question_text}")
+            answer = user_answers[i] if i < len(user_answers) else None
+            answer_text = q.options[answer] if answer is not None else "No answer"
+            if is_correct:
+                st.success(f"Your answer: {answer_text} (Correct)")
             else:
-                st.error(f"Your answer: {user_answers.get(i)} (Incorrect)")
-                st.success(f"Correct answer: {q.get('correct_answer', '')}")
-            st.info(f"**Explanation:** {q.get('explanation', 'No explanation provided.')}")
+                st.error(f"Your answer: {answer_text} (Incorrect)")
+                st.success(f"Correct answer: {q.correct_answer}")
+            st.info(f"**Explanation:** {q.explanation or 'No explanation provided.'}")
+            miss_rate = results["miss_rates"].get(q.content_hash)
+            if miss_rate is not None:
+                st.caption(f"Missed in {miss_rate:.0%} of earlier attempts by all students.")
 
     if incorrect_questions:
-        incorrect_questions_tuple = tuple(tuple(d.items()) for d in incorrect_questions)
-        with st.spinner("Generating your personalized plan..."):
-            learning_path = generate_learning_path(st.session_state.quiz_topic, incorrect_questions_tuple)
-            study_resources = get_study_resources(st.session_state.quiz_topic, incorrect_questions_tuple)
+        if results["plan"] is None:
+            with st.spinner("Generating your personalized plan..."):
+                # Merged from per-question records (prefetched or cached from other students);
+                # only mistakes never seen before are sent to the AI
+                plan = remediation_plan(get_remediation_jobs(), get_remediation_store(),
+                                        st.session_state.quiz_topic, quiz_data, incorrect_questions)
+                if plan is not None:
+                    study_resources, learning_path = plan
+                else:
+                    study_resources = get_study_resources(st.session_state.quiz_topic, incorrect_questions)
+                    learning_path = None
+                if learning_path is None:
+                    learning_path = generate_learning_path(st.session_state.quiz_topic, incorrect_questions)
+            # Kept even if generation failed, so reruns do not wait on it again; the button below retries
+            results["plan"] = (study_resources, learning_path)
+        else:
+            study_resources, learning_path = results["plan"]
+
+        if not study_resources and not learning_path:
+            st.warning("Your personalized plan could not be generated right now.")
+            if st.button("Try again"):
+                # Failed LLM calls are cached as None too
+                get_study_resources.clear(st.session_state.quiz_topic, incorrect_questions)
+                generate_learning_path.clear(st.session_state.quiz_topic, incorrect_questions)
+                results["plan"] = None
+                st.rerun()
 
         if learning_path and "learning_path" in learning_path:
             st.divider()
@@ -532,12 +587,44 @@ elif st.session_state.user_answers:
 
     st.divider()
     if st.button("Start a New Quiz"):
+        # The home screen's weak areas should include this attempt
+        try:
+            results["attempt"].result(timeout=10)
+        except Exception as e:
+            print(f"Could not record quiz attempt: {e}")
         for key in keys_to_init:
             st.session_state[key] = None
-        st.rerun()
+        st.rerun(scope="app")
+
+# Leaving the syllabus topic list cancels this session's queued prefetches
+if st.session_state.quiz_data or st.session_state.user_answers or not st.session_state.syllabus_topics:
+    get_quiz_prefetcher().release(session_id())
+
+# STATE 1: A quiz is active
+if st.session_state.quiz_data and st.session_state.user_answers is None:
+    render_quiz_form()
+
+# STATE 2: A quiz has been submitted and results are shown
+elif st.session_state.user_answers:
+    render_results()
 
 # STATE 3: The initial home screen for generating a quiz
 else:
+    weak_areas = get_weak_areas()
+    if weak_areas:
+        st.header("Your Weakest Areas")
+        for area in weak_areas:
+            st.markdown(f"- **{area['topic']}**: {area['accuracy']:.0%} correct over {area['attempts']} questions")
+        if st.button("Retry my weakest areas"):
+            # Questions you missed, weakest first; no AI call
+            questions = get_performance_store().weakest_questions(current_student(), RETRY_QUESTIONS)
+            if questions:
+                st.session_state.quiz_topic = "Weakest areas: " + ", ".join(a["topic"] for a in weak_areas)
+                st.session_state.quiz_data = Quiz(questions)
+                st.rerun()
+            else:
+                st.warning("No missed questions to retry yet.")
+
     st.header("1. Choose Your Quiz Method")
 
     topic_tab, syllabus_tab, notes_tab = st.tabs(["By Topic", "From Syllabus", "From My Notes"])
@@ -553,7 +640,7 @@ else:
                 if topic_input:
                     st.session_state.quiz_topic = topic_input
                     with st.spinner("Generating your quiz..."):
-                        st.session_state.quiz_data = generate_quiz_from_topic(topic_input, num_questions_topic, quiz_context_topic)
+                        st.session_state.quiz_data = generate_quiz_from_topic_sharded(topic_input, num_questions_topic, quiz_context_topic)
                         st.rerun()
                 else:
                     st.warning("Please enter a topic.")
@@ -572,43 +659,68 @@ else:
                     st.warning("Please paste your syllabus text.")
         else:
             st.info("Syllabus analyzed! Now configure your quiz below.")
+            # Generate the likeliest picks while the user is choosing
+            get_quiz_prefetcher().prefetch(session_id(), st.session_state.syllabus_topics,
+                                           SYLLABUS_QUIZ_QUESTIONS, SYLLABUS_QUIZ_CONTEXTS[0])
             with st.form("syllabus_quiz_form"):
                 selected_topic = st.selectbox("Choose a topic from your syllabus:", options=st.session_state.syllabus_topics)
-                num_questions_syllabus = st.slider("Number of Questions:", min_value=5, max_value=20, value=5, key="syllabus_q")
-                quiz_context_syllabus = st.selectbox("Quiz Purpose:", ("Quick Review", "Semester Exam Prep"), key="syllabus_c")
+                num_questions_syllabus = st.slider("Number of Questions:", min_value=5, max_value=20,
+                                                   value=SYLLABUS_QUIZ_QUESTIONS, key="syllabus_q")
+                quiz_context_syllabus = st.selectbox("Quiz Purpose:", SYLLABUS_QUIZ_CONTEXTS, key="syllabus_c")
                 if st.form_submit_button("Generate Quiz from Syllabus Topic"):
                     st.session_state.quiz_topic = selected_topic
                     with st.spinner("Generating your quiz..."):
-                        st.session_state.quiz_data = generate_quiz_from_topic(selected_topic, num_questions_syllabus, quiz_context_syllabus)
+                        quiz = get_quiz_prefetcher().take(session_id(), selected_topic,
+                                                          num_questions_syllabus, quiz_context_syllabus)
+                        if quiz is None:
+                            quiz = generate_quiz_from_topic_sharded(selected_topic, num_questions_syllabus, quiz_context_syllabus)
+                        st.session_state.quiz_data = quiz
                         st.rerun()
 
     # --- From My Notes ---
     with notes_tab:
         st.subheader("Upload your notes to generate a quiz")
         with st.form("notes_quiz_form"):
-            uploaded_file = st.file_uploader("Upload your notes (PDF, PPTX, DOCX)", type=['pdf', 'pptx', 'docx'])
+            uploaded_files = st.file_uploader(
+                "Upload your notes (PDF, PPTX, DOCX, or photos of handwritten notes):",
+                type=NOTE_FILE_TYPES,
+                accept_multiple_files=True
+            )
             num_questions_notes = st.slider("Number of Questions:", min_value=5, max_value=20, value=5, key="notes_q")
             if st.form_submit_button("Generate Quiz from My Notes"):
-                if uploaded_file is not None:
-                    extracted_text = ""
-                    with st.spinner(f"Reading your file: {uploaded_file.name}..."):
-                        file_bytes = uploaded_file.getvalue()
-                        try:
-                            if uploaded_file.type == "application/pdf":
-                                extracted_text = extract_text_from_pdf(file_bytes)
-                            elif "presentation" in uploaded_file.type or uploaded_file.type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
-                                extracted_text = extract_text_from_pptx(file_bytes)
-                            elif "wordprocessingml" in uploaded_file.type or uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                                extracted_text = extract_text_from_docx(file_bytes)
-                        except Exception as e:
-                            st.error(f"Could not read the file. Error: {e}")
+                if uploaded_files:
+                    texts = [None] * len(uploaded_files)
+                    started = time.perf_counter()
+                    with st.status(f"Reading {len(uploaded_files)} file(s)...", expanded=True) as status:
+                        progress = st.progress(0.0)
+                        # Files are read in parallel; each line appears as soon as its file is done
+                        for done, (i, name, text, error, seconds) in enumerate(extract_notes(uploaded_files), start=1):
+                            texts[i] = (name, text)
+                            progress.progress(done / len(uploaded_files), text=f"{done} of {len(uploaded_files)} files read")
+                            if error:
+                                st.write(f"⛔ {error}")
+                            elif text.strip():
+                                st.write(f"✅ {name} ({seconds:.1f}s)")
+                            else:
+                                st.write(f"⚠️ {name}: no text found ({seconds:.1f}s)")
+                        extracted_text, dropped = merge_notes(texts)
+                        summary = f"Read {len(uploaded_files)} file(s) in {time.perf_counter() - started:.1f}s"
+                        if dropped:
+                            summary += f", skipped {dropped} repeated lines"
+                        status.update(label=summary, state="complete", expanded=False)
 
                     if extracted_text:
-                        st.session_state.quiz_topic = f"Document: {uploaded_file.name}"
-                        with st.spinner("Generating quiz from document..."):
+                        if len(uploaded_files) == 1:
+                            st.session_state.quiz_topic = f"Document: {uploaded_files[0].name}"
+                        else:
+                            st.session_state.quiz_topic = f"Notes: {len(uploaded_files)} files"
+                        with st.spinner("Generating quiz from your notes..."):
                             st.session_state.quiz_data = generate_quiz_from_context(extracted_text, num_questions_notes)
                             st.rerun()
                     else:
-                        st.warning("Could not extract text from the document.")
+                        st.warning("Could not extract text from your notes.")
                 else:
-                    st.warning("Please upload a file.")
+                    st.warning("Please upload at least one file.")
+
+# Reruns that end early (st.rerun) are not recorded; fragments record their own time
+record_rerun("full app", _script_started)
@@ -0,0 +1,270 @@
+# batch_generate.py
+# Headless, offline question bank generation for many subjects at once.
+#
+# Input layout (one folder per subject):
+#   <input_dir>/<Subject Name>/syllabus.(pdf|png|jpg|jpeg|txt)
+#   <input_dir>/<Subject Name>/objectives.txt          (optional)
+#   <input_dir>/<Subject Name>/*.pdf|*.docx             (PYQ papers, or inside a pyqs/ subfolder)
+#
+# Usage:
+#   GEMINI_API_KEY=... python batch_generate.py <input_dir> <output_dir> --workers 4 --rpm 10
+#
+# Every subject gets <output_dir>/<subject_key>/question_bank.<ext> files and is
+# saved to the local question bank store. A subject already in the store only has
+# its new papers merged in, like an incremental update in the app; --force
+# regenerates it from this folder's papers alone, dropping papers merged since.
+# <output_dir>/manifest.json records status and per-step timings (also for
+# failures); re-running skips subjects already marked "done".
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.gemini_api import (
+    process_syllabus,
+    process_pyqs,
+    extract_pyq_text,
+    extract_paper_questions,
+    generate_module_question_bank,
+    set_rate_limit,
+)
+from utils.exporters import EXPORT_FORMATS
+from utils.question_bank import paper_hash, create_bank, bank_to_question_data, subject_key
+from utils.bank_store import load_subject_bank, save_subject_bank, merge_subject_papers
+
+SYLLABUS_NAMES = ("syllabus.pdf", "syllabus.png", "syllabus.jpg", "syllabus.jpeg", "syllabus.txt")
+PYQ_EXTENSIONS = (".pdf", ".docx")
+
+
+class LocalFile:
+    """
+    Minimal stand-in for a Streamlit UploadedFile backed by a file on disk.
+    Parsers memory-map `path` (utils/uploads.py) rather than calling getvalue().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.size = os.path.getsize(path)
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def discover_subjects(input_dir):
+    """{subject name: {"syllabus", "objectives", "pyqs"}} for every subject folder."""
+    subjects = {}
+    for entry in sorted(os.listdir(input_dir)):
+        subject_dir = os.path.join(input_dir, entry)
+        if not os.path.isdir(subject_dir):
+            continue
+        files = {f.lower(): os.path.join(subject_dir, f) for f in os.listdir(subject_dir)}
+        syllabus = next((files[n] for n in SYLLABUS_NAMES if n in files), None)
+        objectives = files.get("objectives.txt")
+
+        pyq_dir = files.get("pyqs") if os.path.isdir(files.get("pyqs", "")) else subject_dir
+        pyqs = sorted(
+            os.path.join(pyq_dir, f) for f in os.listdir(pyq_dir)
+            if f.lower().endswith(PYQ_EXTENSIONS) and not f.lower().startswith("syllabus.")
+        )
+        subjects[entry] = {"syllabus": syllabus, "objectives": objectives, "pyqs": pyqs}
+    return subjects
+
+
+def merge_new_papers(bank, pyq_files, course_objectives):
+    """
+    Merge the papers the stored bank has not seen yet into it. Returns the
+    saved bank and how many papers were added.
+    """
+    extracted = {}
+    try:
+        for f in pyq_files:
+            h = paper_hash(f)
+            if h in bank["papers"] or h in extracted:
+                continue
+            module_questions = extract_paper_questions(bank["modules"], extract_pyq_text(f), course_objectives)
+            if module_questions is None:
+                raise RuntimeError(f"could not extract the questions of {f.name}")
+            extracted[h] = (f.name, module_questions)
+    finally:
+        # Papers extracted before a failure are kept; a re-run only retries the rest.
+        # The merge reloads the bank, so papers merged meanwhile by another run are kept too.
+        if extracted:
+            bank, _ = merge_subject_papers(bank["subject"], extracted)
+    return bank, len(extracted)
+
+
+def _generate_bank(subject_name, sources, pyq_files, course_objectives, timings):
+    """Generate a new bank from the syllabus and all papers, replacing any stored one."""
+    if not sources["syllabus"]:
+        raise ValueError("no syllabus file (expected syllabus.pdf/.png/.jpg/.jpeg/.txt)")
+
+    t = time.perf_counter()
+    if sources["syllabus"].lower().endswith(".txt"):
+        with open(sources["syllabus"], encoding="utf-8") as f:
+            syllabus_text = f.read()
+    else:
+        syllabus_text = process_syllabus(LocalFile(sources["syllabus"]))
+    timings["syllabus"] = round(time.perf_counter() - t, 3)
+    if not syllabus_text.strip():
+        raise ValueError("could not extract any syllabus text")
+
+    t = time.perf_counter()
+    pyqs_text = process_pyqs(pyq_files)
+    timings["pyqs"] = round(time.perf_counter() - t, 3)
+
+    t = time.perf_counter()
+    question_data = generate_module_question_bank(syllabus_text, pyqs_text, course_objectives)
+    timings["generate"] = round(time.perf_counter() - t, 3)
+    if not question_data:
+        raise RuntimeError("question bank generation failed")
+
+    save_subject_bank(create_bank(subject_name, question_data,
+                                  {paper_hash(f): f.name for f in pyq_files}))
+    return question_data
+
+
+def generate_subject(subject_name, sources, output_dir, formats, force=False, timings=None):
+    """
+    Run the pipeline for one subject; returns the manifest record. `timings` is
+    filled in step by step, so a caller still has them when a step raises.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+
+    course_objectives = None
+    if sources["objectives"]:
+        with open(sources["objectives"], encoding="utf-8") as f:
+            course_objectives = f.read()
+
+    if not sources["pyqs"]:
+        raise ValueError("no PYQ papers (.pdf or .docx)")
+    pyq_files = [LocalFile(p) for p in sources["pyqs"]]
+
+    stored_bank = None if force else load_subject_bank(subject_name)
+    if stored_bank is not None:
+        t = time.perf_counter()
+        stored_bank, papers_added = merge_new_papers(stored_bank, pyq_files, course_objectives)
+        timings["merge"] = round(time.perf_counter() - t, 3)
+        question_data = bank_to_question_data(stored_bank)
+    else:
+        question_data = _generate_bank(subject_name, sources, pyq_files, course_objectives, timings)
+        papers_added = len(pyq_files)
+
+    t = time.perf_counter()
+    subject_dir = os.path.join(output_dir, subject_key(subject_name))
+    os.makedirs(subject_dir, exist_ok=True)
+    outputs = []
+    for export_format in formats:
+        exporter, extension, _ = EXPORT_FORMATS[export_format]
+        path = os.path.join(subject_dir, f"question_bank.{extension}")
+        with open(path, "wb") as f:
+            f.write(exporter(subject_name, question_data).getvalue())
+        outputs.append(os.path.relpath(path, output_dir))
+    timings["export"] = round(time.perf_counter() - t, 3)
+    timings["total"] = round(time.perf_counter() - started, 3)
+
+    return {
+        "status": "done",
+        "papers": len(pyq_files),
+        "papers_added": papers_added,
+        "merged": stored_bank is not None,
+        "modules": len(question_data),
+        "questions": sum(len(qs) for qs in question_data.values()),
+        "outputs": outputs,
+        "timings": timings,
+    }
+
+
+def run_subject(subject_name, sources, output_dir, formats, force=False):
+    """generate_subject() that returns a "failed" record, with the timings so far, instead of raising."""
+    timings = {}
+    started = time.perf_counter()
+    try:
+        return generate_subject(subject_name, sources, output_dir, formats, force, timings)
+    except Exception as e:
+        timings["total"] = round(time.perf_counter() - started, 3)
+        return {"status": "failed", "error": str(e), "traceback": traceback.format_exc(), "timings": timings}
+
+
+class Manifest:
+    """manifest.json in the output folder, rewritten atomically after every subject."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {"subjects": {}}
+
+    def is_done(self, subject_name):
+        return self.data["subjects"].get(subject_name, {}).get("status") == "done"
+
+    def record(self, subject_name, entry):
+        with self._lock:
+            entry["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            self.data["subjects"][subject_name] = entry
+            self.data["updated_at"] = entry["finished_at"]
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate module-wise question banks for many subjects.")
+    parser.add_argument("input_dir", help="folder with one sub-folder per subject")
+    parser.add_argument("output_dir", help="where exports and manifest.json are written")
+    parser.add_argument("--workers", type=int, default=4, help="subjects processed in parallel (default 4)")
+    parser.add_argument("--rpm", type=float, default=float(os.environ.get("GEMINI_RPM", "10")),
+                        help="global Gemini requests per minute across all workers (0 = unlimited)")
+    parser.add_argument("--formats", default="PDF",
+                        help=f"comma-separated export formats from: {', '.join(EXPORT_FORMATS)}")
+    parser.add_argument("--force", action="store_true",
+                        help="regenerate subjects already marked done, replacing their stored bank "
+                             "(papers merged into it later are dropped)")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        parser.error(f"unknown export format(s): {', '.join(unknown)}")
+
+    set_rate_limit(args.rpm)
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(args.output_dir, "manifest.json"))
+
+    subjects = discover_subjects(args.input_dir)
+    pending = {name: src for name, src in subjects.items() if args.force or not manifest.is_done(name)}
+    print(f"{len(subjects)} subjects found, {len(subjects) - len(pending)} already done, {len(pending)} to generate.")
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        futures = {
+            pool.submit(run_subject, name, src, args.output_dir, formats, args.force): name
+            for name, src in pending.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            entry = future.result()
+            if entry["status"] == "done":
+                merged = f", {entry['papers_added']} new papers merged" if entry["merged"] else ""
+                print(f"[done]   {name}: {entry['questions']} questions{merged} in {entry['timings']['total']}s")
+            else:
+                failures += 1
+                print(f"[failed] {name}: {entry['error']} after {entry['timings']['total']}s")
+            manifest.record(name, entry)
+
+    print(f"Finished: {len(pending) - failures} generated, {failures} failed. Manifest: {manifest.path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# benchmarks/bench_exports.py
+# Compares export time and output size of every question bank format.
+# Run from the repo root:  python -m benchmarks.bench_exports [--questions 1000]
+import argparse
+import random
+import time
+
+from utils.exporters import EXPORT_FORMATS
+
+
+def make_question_bank(num_questions, num_modules=8, seed=7):
+    """Synthetic bank with realistic question lengths and repetition counts."""
+    rng = random.Random(seed)
+    words = ("explain derive compare algorithm complexity tree graph stack queue heap "
+             "sorting hashing recursion dynamic programming traversal memory pointer").split()
+    bank = {f"Module {m + 1}: Topic {m + 1}": [] for m in range(num_modules)}
+    modules = list(bank)
+    for i in range(num_questions):
+        reps = rng.choice([1, 1, 1, 2, 2, 3, 4, 5, 6])
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(8, 30))).capitalize() + "?"
+        bank[modules[i % num_modules]].append({
+            "question_text": text,
+            "repetition_count": reps,
+            "importance": "High" if reps > 1 else "Normal",
+        })
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark question bank export formats.")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bank = make_question_bank(args.questions)
+    print(f"Question bank: {args.questions} questions, {len(bank)} modules")
+    print(f"{'Format':<10} {'best ms':>10} {'size KB':>10}")
+    for name, (exporter, _, _) in EXPORT_FORMATS.items():
+        timings = []
+        size = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = len(exporter("Benchmark Subject", bank).getvalue())
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<10} {min(timings) * 1000:>10.1f} {size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
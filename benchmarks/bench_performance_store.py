@@ -0,0 +1,73 @@
+# benchmarks/bench_performance_store.py
+# Weak-topic lookups from the incrementally maintained aggregates of
+# utils/performance.py vs. rescanning the raw attempt history, as history grows.
+#   python -m benchmarks.bench_performance_store --quizzes 100,1000 --students 10
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+from contextlib import closing
+
+from utils.bank_store import connect
+from utils.performance import SqlitePerformanceStore
+from utils.quiz import Quiz, Question
+
+TOPICS = ["Arrays", "Linked Lists", "Stacks", "Queues", "Trees", "Graphs", "Heaps", "Hashing"]
+
+
+def make_quiz(rng, topic, num_questions=10):
+    return Quiz(Question(f"{topic} question {rng.randrange(200)}?", ["a", "b", "c", "d"], rng.randrange(4))
+                for _ in range(num_questions))
+
+
+def scan_weak_topics(db_path, user_id, limit=3):
+    """What a lookup costs without aggregates: read the student's whole history."""
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute("SELECT topic_key, correct FROM attempts WHERE user_id = ?", (user_id,)).fetchall()
+    totals = defaultdict(lambda: [0, 0])
+    for r in rows:
+        totals[r["topic_key"]][0] += 1
+        totals[r["topic_key"]][1] += 1 - r["correct"]
+    return sorted(totals, key=lambda t: totals[t][1] / totals[t][0], reverse=True)[:limit]
+
+
+def ms(fn, *args, repeat=50):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark weak-topic lookups: aggregates vs. history scans.")
+    parser.add_argument("--quizzes", default="100,1000", help="quizzes per student, comma-separated")
+    parser.add_argument("--students", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    print(f"{args.students} students, 10 questions per quiz")
+    print(f"{'quizzes/student':>15} {'record ms':>10} {'aggregate lookup ms':>20} {'history scan ms':>16}")
+    for quizzes in [int(q) for q in args.quizzes.split(",")]:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="padhai_perf_bench_"), "padhai.db")
+        store = SqlitePerformanceStore(db_path)
+        record_times = []
+        now = time.time() - quizzes * 3600
+        for i in range(quizzes):
+            for s in range(args.students):
+                quiz = make_quiz(rng, rng.choice(TOPICS))
+                answers = tuple(rng.randrange(4) for _ in quiz)
+                start = time.perf_counter()
+                store.record_attempt(f"student-{s}", quiz[0].question_text.split(" question")[0], quiz, answers,
+                                     now=now + i * 3600)
+                record_times.append((time.perf_counter() - start) * 1000)
+        print(f"{quizzes:>15} {statistics.median(record_times):>10.2f} "
+              f"{ms(store.weak_topics, 'student-0'):>20.2f} {ms(scan_weak_topics, db_path, 'student-0'):>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
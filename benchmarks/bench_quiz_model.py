@@ -0,0 +1,87 @@
+# benchmarks/bench_quiz_model.py
+# Per-session memory and per-rerun work of a quiz held as free-form dicts
+# (option strings as answers, stripped and compared on every rerun, dict items
+# turned into tuples for cache keys) vs. the Quiz/Question model of utils/quiz.py.
+#   python -m benchmarks.bench_quiz_model --questions 20 --sessions 1000
+import time
+import random
+import argparse
+import tracemalloc
+
+from utils.jobs import content_hash
+from utils.quiz import Quiz
+
+_WORDS = ("insertion deletion rotation balance height traversal inorder preorder successor predecessor "
+          "recursion pointer null leaf root subtree complexity worst average search duplicate key").split()
+_rng = random.Random(11)
+
+
+def _sentence(n):
+    return " ".join(_rng.sample(_WORDS, n)).capitalize()
+
+
+def generated_quiz(num_questions):
+    """JSON the model returns for one quiz."""
+    quiz = []
+    for _ in range(num_questions):
+        options = [_sentence(4) for _ in range(4)]
+        quiz.append({"question_text": _sentence(12) + "?", "options": options,
+                     "correct_answer": _rng.choice(options), "explanation": _sentence(20) + "."})
+    return quiz
+
+
+def legacy_rerun(quiz_data, user_answers):
+    # Results view per rerun before utils/quiz.py: hash, rescore, tuple-ify mistakes
+    key = content_hash(quiz_data, user_answers)
+    correct = [user_answers.get(i, "").strip() == q["correct_answer"].strip() for i, q in enumerate(quiz_data)]
+    incorrect = [q for q, ok in zip(quiz_data, correct) if not ok]
+    return key, sum(correct), tuple(tuple(d.items()) for d in incorrect)
+
+
+def model_rerun(quiz, answers):
+    key = (quiz.content_hash, answers)
+    correct, score, incorrect = quiz.score(answers)
+    return key, score, incorrect
+
+
+def session_memory(build, sessions):
+    """Bytes allocated per session by `build()` (kept alive, like session state)."""
+    tracemalloc.start()
+    kept = [build() for _ in range(sessions)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(kept)
+
+
+def per_call_us(fn, *args, repeat=2000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quiz model against dict quizzes.")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args()
+
+    raw = generated_quiz(args.questions)
+    legacy_answers = {i: _rng.choice(q["options"]) for i, q in enumerate(raw)}
+    quiz = Quiz.from_dicts(raw)
+    answers = tuple(q.options.index(legacy_answers[i]) for i, q in enumerate(quiz))
+    assert legacy_rerun(raw, legacy_answers)[1] == model_rerun(quiz, answers)[1]
+
+    # Each session parses its own copy of the generated JSON
+    legacy_mem = session_memory(lambda: ([dict(q, options=list(q["options"])) for q in raw], dict(legacy_answers)),
+                                args.sessions)
+    model_mem = session_memory(lambda: (Quiz.from_dicts(raw), tuple(answers)), args.sessions)
+
+    print(f"{args.questions}-question quiz, {args.sessions} sessions")
+    print(f"{'representation':<16} {'KB/session':>11} {'rerun us':>9}")
+    print(f"{'dicts':<16} {legacy_mem / 1024:>11.1f} {per_call_us(legacy_rerun, raw, legacy_answers):>9.1f}")
+    print(f"{'Quiz/Question':<16} {model_mem / 1024:>11.1f} {per_call_us(model_rerun, quiz, answers):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_quiz_prefetch.py
+# Share of syllabus-tab quizzes served instantly, pick latency and wasted
+# generations with and without speculative prefetching (utils/quiz_prefetch.py).
+#
+# Simulated students analyze the same syllabus, take a few seconds to choose a
+# topic (popular topics are chosen more often) and pick; Gemini is replaced by
+# a fixed generation latency:
+#   python -m benchmarks.bench_quiz_prefetch --students 40 --generate 2.0 --think 3.0
+import time
+import random
+import argparse
+import threading
+import statistics
+
+from utils.quiz_prefetch import QuizPrefetcher
+
+TOPICS = ["Arrays", "Linked Lists", "Stacks", "Queues", "Trees", "Graphs", "Heaps", "Hashing",
+          "Sorting", "Searching", "Dynamic Programming", "Greedy Algorithms"]
+
+
+def run(students, generate_seconds, think_seconds, prefetch, topics_per_session, workers, seed=3):
+    rng = random.Random(seed)
+    generations = []
+    lock = threading.Lock()
+
+    def generate(topic, num_questions, quiz_context):
+        with lock:
+            generations.append(topic)
+        time.sleep(generate_seconds)
+        return f"quiz on {topic}"
+
+    prefetcher = QuizPrefetcher(generate, max_workers=workers, max_pending=workers * 4)
+    # Zipf-like interest: earlier units and a few favourites are picked most
+    weights = [1 / (i + 1) for i in range(len(TOPICS))]
+    picks = [rng.choices(TOPICS, weights)[0] for _ in range(students)]
+    thinks = [rng.uniform(0.5, 2) * think_seconds for _ in range(students)]
+    latencies = [None] * students
+
+    def student(i):
+        owner = f"student-{i}"
+        if prefetch:
+            prefetcher.prefetch(owner, TOPICS, 5, "Quick Review", limit=topics_per_session)
+        time.sleep(thinks[i])
+        started = time.perf_counter()
+        quiz = prefetcher.take(owner, picks[i], 5, "Quick Review") if prefetch else None
+        if quiz is None:
+            generate(picks[i], 5, "Quick Review")
+        latencies[i] = time.perf_counter() - started
+        prefetcher.release(owner)
+
+    # Students arrive over the first few seconds
+    threads = []
+    for i in range(students):
+        threads.append(threading.Thread(target=student, args=(i,)))
+        threads[-1].start()
+        time.sleep(rng.uniform(0, 0.2))
+    for t in threads:
+        t.join()
+    stats = prefetcher.stats()
+    return {"instant_share": (stats["instant"] / students) if prefetch else 0.0,
+            "mean_latency": statistics.mean(latencies),
+            "p95_latency": sorted(latencies)[int(0.95 * (students - 1))],
+            "generations": len(generations)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speculative syllabus quiz prefetching.")
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--generate", type=float, default=2.0, help="simulated seconds per quiz generation")
+    parser.add_argument("--think", type=float, default=3.0, help="mean seconds a student takes to pick a topic")
+    parser.add_argument("--topics", type=int, default=3, help="prefetch budget per session")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.students} students, {len(TOPICS)} topics, {args.generate}s generation, ~{args.think}s to pick")
+    print(f"{'mode':<12} {'instant share':>14} {'mean pick s':>12} {'p95 pick s':>11} {'generations':>12}")
+    for label, prefetch in (("no prefetch", False), ("prefetch", True)):
+        r = run(args.students, args.generate, args.think, prefetch, args.topics, args.workers)
+        print(f"{label:<12} {r['instant_share']:>14.0%} {r['mean_latency']:>12.2f} {r['p95_latency']:>11.2f} "
+              f"{r['generations']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_reruns.py
+# Rerun cost per interaction: a full run of app.py vs. the fragment the
+# interaction belongs to (PYQ generator, quiz form, results view).
+#
+# The app is driven headlessly with streamlit.testing (AppTest) and Gemini is
+# replaced by an instant fake, so the numbers are Streamlit/script time only:
+#   python -m benchmarks.bench_reruns --questions 20 --reruns 20
+# To measure an older app.py (where every interaction was a full rerun):
+#   git show <commit>:app.py > app_before.py
+#   python -m benchmarks.bench_reruns --script app_before.py
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+_WORDS = ("insertion deletion rotation balance height traversal inorder preorder successor predecessor "
+          "recursion pointer null leaf root subtree complexity worst average search duplicate key").split()
+_rng = random.Random(7)
+
+
+def _sentence(n=8):
+    return " ".join(_rng.sample(_WORDS, n)).capitalize() + "?"
+
+
+def fake_generate_content(task, prompt):
+    n = prompt.count("(Correct Answer:")
+    records = [{"index": i + 1, "sub_topic": _sentence(3), "study_strategy": "Simulated.",
+                "google_search_query": "simulated", "practice_task": "Simulated exercise.",
+                "level": _rng.randint(1, 3)} for i in range(n)]
+
+    class Response:
+        text = json.dumps({"remediations": records})
+    return Response()
+
+
+def seed_question_bank(num_questions):
+    """A saved bank so the PYQ generator renders a realistic search list."""
+    from utils.question_bank import create_bank
+    from utils.bank_store import save_subject_bank
+    question_data = {
+        f"Module {m}: Simulated": [
+            {"question_text": _sentence(), "repetition_count": _rng.randint(1, 6),
+             "importance": _rng.choice(["High", "Normal"])}
+            for _ in range(num_questions // 5)
+        ]
+        for m in range(1, 6)
+    }
+    save_subject_bank(create_bank("Data Structures", question_data, {}))
+
+
+def make_quiz(num_questions):
+    from utils.quiz import Quiz, Question
+    return Quiz(Question(_sentence(), [_sentence(3) for _ in range(4)], 1, "Simulated.")
+                for _ in range(num_questions))
+
+
+def rerun_times(at, reruns):
+    """Wall time of `reruns` full script runs, plus the in-app timings they recorded."""
+    at.session_state["rerun_timings"] = None
+    walls = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        walls.append((time.perf_counter() - start) * 1000)
+        assert not at.exception, at.exception
+    recorded = {}
+    for label, ms in at.session_state["rerun_timings"] or []:
+        recorded.setdefault(label, []).append(ms)
+    return walls, recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-app reruns vs. fragment reruns.")
+    parser.add_argument("--script", default="app.py")
+    parser.add_argument("--questions", type=int, default=20, help="questions in the simulated quiz")
+    parser.add_argument("--bank-questions", type=int, default=150, help="questions in the saved bank")
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "simulated")
+    os.environ["PADHAI_DATA_DIR"] = tempfile.mkdtemp(prefix="padhai_bench_")
+    os.environ.pop("PADHAI_DB_PATH", None)
+
+    import utils.gemini_api as gemini_api
+    from streamlit.testing.v1 import AppTest
+    gemini_api._generate_content = fake_generate_content
+    seed_question_bank(args.bank_questions)
+
+    at = AppTest.from_file(os.path.abspath(args.script), default_timeout=120)
+    at.run()
+    quiz = make_quiz(args.questions)
+    at.session_state["quiz_topic"] = "Binary Search Trees"
+    at.session_state["quiz_data"] = quiz
+    at.run()
+    timings = {"quiz form": rerun_times(at, args.reruns)}
+
+    # Answer every question wrong so the results view shows a full remediation plan
+    at.session_state["user_answers"] = (0,) * len(quiz)
+    at.run()
+    timings["results view"] = rerun_times(at, args.reruns)
+
+    print(f"{args.script}: {args.questions}-question quiz, {args.bank_questions}-question saved bank, "
+          f"{args.reruns} reruns per state")
+    print(f"{'state':<14} {'full rerun ms':>14} {'fragment rerun ms':>18} {'PYQ generator ms':>17}")
+    mean = lambda xs: f"{statistics.mean(xs):.1f}" if xs else "n/a"
+    for state, (walls, recorded) in timings.items():
+        print(f"{state:<14} {mean(walls):>14} {mean(recorded.get(state)):>18} "
+              f"{mean(recorded.get('PYQ generator')):>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_sharded_quiz.py
+# Latency of a 20-question quiz generated as one call vs. as concurrent shards.
+#
+# Gemini is simulated with an output-bound latency model (fixed overhead plus a
+# cost per generated question) so the comparison is repeatable and free:
+#   python -m benchmarks.bench_sharded_quiz --overhead 1.0 --per-question 0.6
+# Pass --real to call Gemini instead (needs GEMINI_API_KEY, costs quota).
+import os
+import re
+import json
+import time
+import argparse
+import random
+
+import utils.gemini_api as gemini_api
+
+_WORDS = ("insertion deletion rotation balance height traversal inorder preorder successor predecessor "
+          "recursion pointer null leaf root subtree complexity worst average search duplicate key").split()
+_rng = random.Random(42)
+
+
+def simulated_generate_content(overhead, per_question):
+    def generate(task, prompt):
+        n = int(re.search(r"exactly (\d+) questions", prompt).group(1))
+        time.sleep(overhead + per_question * n)
+        quiz = []
+        for _ in range(n):
+            quiz.append({
+                "question_text": " ".join(_rng.sample(_WORDS, 8)).capitalize() + "?",
+                "options": ["A", "B", "C", "D"],
+                "correct_answer": "B",
+                "explanation": "Simulated.",
+            })
+
+        class Response:
+            text = json.dumps(quiz)
+        return Response()
+    return generate
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded quiz generation.")
+    parser.add_argument("--overhead", type=float, default=1.0, help="simulated per-call overhead (s)")
+    parser.add_argument("--per-question", type=float, default=0.6, help="simulated seconds per generated question")
+    parser.add_argument("--topic", default="Binary Search Trees")
+    parser.add_argument("--real", action="store_true", help="call Gemini instead of the simulation")
+    args = parser.parse_args()
+
+    if not args.real:
+        os.environ.setdefault("GEMINI_API_KEY", "simulated")
+        gemini_api._generate_content = simulated_generate_content(args.overhead, args.per_question)
+
+    context = "Semester Exam Prep"
+    rows = [
+        ("5 questions, single call", gemini_api.generate_quiz_from_topic, 5),
+        ("20 questions, single call", gemini_api.generate_quiz_from_topic, 20),
+        ("20 questions, sharded", gemini_api.generate_quiz_from_topic_sharded, 20),
+    ]
+    print(f"{'mode':<28} {'seconds':>8} {'questions':>10}")
+    for label, fn, n in rows:
+        elapsed, quiz = timed(fn, args.topic, n, context)
+        print(f"{label:<28} {elapsed:>8.2f} {len(quiz or []):>10}")
+
+
+if __name__ == "__main__":
+    main()
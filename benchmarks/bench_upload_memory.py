@@ -0,0 +1,150 @@
+# benchmarks/bench_upload_memory.py
+# Peak memory per concurrent PYQ upload: the old getvalue() + io.BytesIO path
+# vs. parsing straight from the upload (utils/uploads.py).
+#
+# Builds a text-heavy (or scanned-like) PDF, then for each concurrency level extracts N copies
+# at once in a fresh process and reports the peak RSS growth per upload:
+#   python -m benchmarks.bench_upload_memory --pages 150 --concurrency 1,4,8
+#   python -m benchmarks.bench_upload_memory --pages 25 --scanned
+# Modes:
+#   legacy  in-memory upload, getvalue() + io.BytesIO copy, text built with +=
+#   stream  in-memory upload (like Streamlit's UploadedFile), parsed in place
+#   mmap    file on disk (batch CLI), memory-mapped
+# In-memory modes hold the upload before the baseline is taken (Streamlit keeps
+# it anyway); in mmap mode the mapped file pages count toward RSS as they are
+# read, but they are page cache and reclaimable, so compare peak RSS too.
+import io
+import os
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+import PyPDF2
+
+MODES = ("legacy", "stream", "mmap")
+
+
+def make_pdf(path, pages, scanned=False):
+    """Text-heavy PDF, or with `scanned` a page-sized noise image per page (like a scan)."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import ImageReader
+    from PIL import Image
+    c = canvas.Canvas(path)
+    for p in range(pages):
+        if scanned:
+            scan = Image.frombytes("L", (1000, 1400), os.urandom(1000 * 1400))
+            c.drawImage(ImageReader(scan), 0, 0, width=595, height=842)
+            c.drawString(40, 20, f"Q{p} Explain the amortized cost of rebalancing a search tree.")
+        else:
+            for line in range(60):
+                c.drawString(40, 800 - line * 13, f"Q{p}.{line} Explain the amortized cost of operation {line} "
+                                                  f"on a balanced search tree with {p * 60 + line} keys.")
+        c.showPage()
+    c.save()
+
+
+class InMemoryUpload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile."""
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def legacy_extract(upload):
+    # The extraction path before utils/uploads.py
+    file_bytes = upload.getvalue()
+    reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+    text = ""
+    for page in reader.pages:
+        text += (page.extract_text() or "") + "\n"
+    return text
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss():
+    # Linux: resets VmHWM to the current RSS, so setup does not count as peak
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _measure(mode, path, concurrency, results):
+    from utils.gemini_api import extract_pyq_text
+    from batch_generate import LocalFile
+
+    if mode == "mmap":
+        uploads = [LocalFile(path) for _ in range(concurrency)]
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+        # One upload per user session, as Streamlit keeps them
+        uploads = [InMemoryUpload(os.path.basename(path), bytes(bytearray(data))) for _ in range(concurrency)]
+        del data
+    extract = legacy_extract if mode == "legacy" else extract_pyq_text
+
+    texts = [None] * concurrency
+    errors = []
+
+    def run(i):
+        try:
+            texts[i] = extract(uploads[i])
+        except Exception as e:
+            errors.append(str(e))
+
+    _reset_peak_rss()
+    baseline = _status_kb("VmRSS")
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    results.put({"baseline_kb": baseline, "peak_kb": _status_kb("VmHWM"), "seconds": elapsed,
+                 "errors": sorted(set(errors))})
+
+
+def measure(mode, path, concurrency):
+    """Run one measurement in a fresh process so peak RSS starts clean."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(mode, path, concurrency, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak RSS per concurrent PDF upload.")
+    parser.add_argument("--pages", type=int, default=150)
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--scanned", action="store_true", help="image pages, like a scanned paper")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="padhai_upload_bench_")
+    path = os.path.join(workdir, "paper.pdf")
+    make_pdf(path, args.pages, args.scanned)
+    print(f"PDF: {args.pages} {'scanned' if args.scanned else 'text'} pages, "
+          f"{os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    print(f"{'mode':<8} {'uploads':>8} {'peak RSS MB':>12} {'growth/upload MB':>17} {'seconds':>8}")
+    for mode in args.modes.split(","):
+        for level in [int(c) for c in args.concurrency.split(",")]:
+            r = measure(mode, path, level)
+            growth = (r["peak_kb"] - r["baseline_kb"]) / 1024 / level
+            print(f"{mode:<8} {level:>8} {r['peak_kb'] / 1024:>12.1f} {growth:>17.1f} {r['seconds']:>8.2f}"
+                  + (f"  rejected: {r['errors'][0]}" if r["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
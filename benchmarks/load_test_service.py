@@ -0,0 +1,118 @@
+# benchmarks/load_test_service.py
+# Concurrent-request capacity of one api_service.py worker.
+#
+# By default starts the service in-process on a free port with Gemini replaced
+# by a simulated call of fixed latency, so the numbers show how many requests
+# a single worker keeps in flight rather than Gemini's own limits:
+#   python -m benchmarks.load_test_service --latency 2.0 --concurrency 10,50,200,500
+# Against a real deployment (real Gemini calls, costs quota):
+#   python -m benchmarks.load_test_service --url http://localhost:8000 --concurrency 5,20
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlparse
+
+SIMULATED_QUIZ = [
+    {"question_text": f"Simulated question {i}?", "options": ["A", "B", "C", "D"],
+     "correct_answer": "A", "explanation": "Simulated."}
+    for i in range(5)
+]
+
+
+def start_simulated_service(latency):
+    """Run api_service on a free local port with a fake, fixed-latency Gemini."""
+    import uvicorn
+    import utils.gemini_api as gemini_api
+    from api_service import app
+
+    class _Response:
+        text = json.dumps(SIMULATED_QUIZ)
+
+    async def fake_generate_content_async(task, prompt):
+        await asyncio.sleep(latency)
+        return _Response()
+
+    os.environ.setdefault("GEMINI_API_KEY", "simulated")
+    gemini_api._generate_content_async = fake_generate_content_async
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           backlog=4096, limit_concurrency=None))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def post_json(host, port, path, payload):
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    status = int(raw.split(b" ", 2)[1])
+    return status
+
+
+async def run_level(url, concurrency, rounds):
+    parsed = urlparse(url)
+    payload = {"topic": "Binary Search Trees", "num_questions": 5, "quiz_context": "Quick Review"}
+    latencies, errors = [], 0
+
+    async def one_client():
+        nonlocal errors
+        for _ in range(rounds):
+            start = time.perf_counter()
+            try:
+                status = await post_json(parsed.hostname, parsed.port or 80, "/quiz/topic", payload)
+                if status != 200:
+                    errors += 1
+            except OSError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": p(0.50),
+        "p95": p(0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test api_service.py.")
+    parser.add_argument("--url", help="running service to test; default starts a simulated one in-process")
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated Gemini latency in seconds")
+    parser.add_argument("--concurrency", default="10,50,200,500")
+    parser.add_argument("--rounds", type=int, default=2, help="sequential requests per client")
+    args = parser.parse_args()
+
+    url = args.url or start_simulated_service(args.latency)
+    print(f"Target: {url}" + ("" if args.url else f" (simulated Gemini latency {args.latency}s)"))
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 s':>7} {'p95 s':>7}")
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        r = asyncio.run(run_level(url, level, args.rounds))
+        print(f"{r['concurrency']:>8} {r['requests']:>9} {r['errors']:>7} {r['throughput']:>8.1f} "
+              f"{r['p50']:>7.2f} {r['p95']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
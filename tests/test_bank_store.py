@@ -0,0 +1,125 @@
+from contextlib import closing
+
+import pytest
+
+from utils.bank_store import (
+    connect, count_questions, list_modules, list_subjects, load_subject_bank, merge_subject_papers,
+    save_subject_bank, search_questions,
+)
+from utils.question_bank import bank_to_question_data, build_question_index, create_bank, merge_paper
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "padhai.db")
+
+
+def make_bank():
+    bank = create_bank("Data Structures", {
+        "Module 1: Sorting": [
+            {"question_text": "Explain bubble sort with an example.", "repetition_count": 1},
+            {"question_text": "Explain merge sort algorithm.", "repetition_count": 2, "importance": "High"},
+        ],
+        "Module 2: Graphs": [
+            {"question_text": "Explain BFS traversal of a graph.", "repetition_count": 3},
+        ],
+    }, {"p0": "2022.pdf"})
+    merge_paper(bank, "p1", "2023.pdf", {"Module 2: Graphs": ["Describe BFS traversal of graphs with suitable examples."]})
+    return bank
+
+
+def test_save_and_load_round_trip(db):
+    bank = make_bank()
+    save_subject_bank(bank, db)
+    assert load_subject_bank("data structures", db) == bank
+    assert load_subject_bank("Networks", db) is None
+    assert list_subjects(db) == [{"name": "Data Structures", "updated_at": bank["updated_at"],
+                                  "question_count": 3, "paper_count": 2}]
+
+
+def texts(rows):
+    return [r["question_text"] for r in rows]
+
+
+def test_search_matches_variants_prefixes_and_all_words(db):
+    save_subject_bank(make_bank(), db)
+    # "describe" only appears in a variant of the BFS question
+    assert texts(search_questions("Data Structures", "Describe", db_path=db)) == ["Explain BFS traversal of a graph."]
+    assert texts(search_questions("Data Structures", "trav", db_path=db)) == ["Explain BFS traversal of a graph."]
+    assert len(search_questions("Data Structures", "sort", db_path=db)) == 2
+    assert texts(search_questions("Data Structures", "merge sort", db_path=db)) == ["Explain merge sort algorithm."]
+    # FTS syntax in user input is searched for literally, not parsed
+    assert search_questions("Data Structures", 'sort" OR "graph', db_path=db) == []
+    assert count_questions("Data Structures", "sort", module="Module 2: Graphs", db_path=db) == 0
+
+
+def test_search_order_matches_the_question_index(db):
+    bank = create_bank("DSA", {
+        "Module 1: Sorting": [
+            {"question_text": "Explain bubble sort.", "repetition_count": 1},
+            {"question_text": "Explain heap sort.", "repetition_count": 1, "importance": "High"},
+        ],
+        "Module 2: Graphs": [
+            {"question_text": "Explain BFS.", "repetition_count": 3},
+            {"question_text": "Explain DFS.", "repetition_count": 1, "importance": "High"},
+        ],
+    }, {"p0": "2022.pdf"})
+    save_subject_bank(bank, db)
+    index = build_question_index(bank_to_question_data(bank))
+    assert texts(search_questions("DSA", db_path=db)) == texts(index) == [
+        "Explain heap sort.", "Explain DFS.", "Explain BFS.", "Explain bubble sort.",
+    ]
+    assert list_modules("DSA", db) == {"Module 1: Sorting": 2, "Module 2: Graphs": 2}
+    assert texts(search_questions("DSA", module="Module 2: Graphs", db_path=db)) == ["Explain DFS.", "Explain BFS."]
+
+
+def test_deleting_a_subject_cascades(db):
+    save_subject_bank(make_bank(), db)
+    save_subject_bank(create_bank("Networks", {"Module 1": [{"question_text": "Explain TCP."}]}, {"n0": "n.pdf"}), db)
+    with closing(connect(db)) as conn, conn:
+        conn.execute("DELETE FROM subjects WHERE name = 'Data Structures'")
+    with closing(connect(db)) as conn:
+        for table in ("modules", "papers", "questions", "question_papers"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == (0 if table == "question_papers" else 1)
+        assert conn.execute("SELECT rowid FROM questions_fts WHERE questions_fts MATCH 'sort'").fetchall() == []
+    assert load_subject_bank("Data Structures", db) is None
+    assert texts(search_questions("Networks", "tcp", db_path=db)) == ["Explain TCP."]
+
+
+def test_resaving_replaces_the_subject(db):
+    bank = make_bank()
+    save_subject_bank(bank, db)
+    bank["clusters"] = bank["clusters"][:1]
+    save_subject_bank(bank, db)
+    assert count_questions("Data Structures", db_path=db) == 1
+    assert search_questions("Data Structures", "graph", db_path=db) == []
+
+
+def test_pages_cover_the_result_once(db):
+    bank = create_bank("DSA", {
+        f"Module {m}": [{"question_text": f"Explain topic {m}{i}.", "repetition_count": 1 + i % 3} for i in range(7)]
+        for m in range(3)
+    }, {"p0": "2022.pdf"})
+    save_subject_bank(bank, db)
+    assert count_questions("DSA", db_path=db) == 21
+    assert count_questions("DSA", min_repetitions=3, db_path=db) == 6
+    everything = search_questions("DSA", db_path=db)
+    pages = [search_questions("DSA", limit=5, offset=offset, db_path=db) for offset in range(0, 25, 5)]
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 1]
+    assert sum(pages, []) == everything
+    assert search_questions("DSA", module="Module 1", limit=5, offset=5, db_path=db) == \
+        search_questions("DSA", module="Module 1", db_path=db)[5:]
+
+
+def test_merge_subject_papers_reloads_the_stored_bank(db):
+    stale = make_bank()
+    save_subject_bank(stale, db)
+    paper = {"Module 1: Sorting": ["Explain bubble sort."]}
+    merge_subject_papers("Data Structures", {"p2": ("2024.pdf", paper)}, db)
+    # A caller holding the old copy merges another paper without losing p2
+    bank, stats = merge_subject_papers("Data Structures", {"p3": ("2025.pdf", paper), "p2": ("2024.pdf", paper)}, db)
+    assert stats["p2"] == {"new": 0, "repeated": 0}
+    assert set(bank["papers"]) == {"p0", "p1", "p2", "p3"} and "p2" not in stale["papers"]
+    assert load_subject_bank("Data Structures", db)["clusters"][0]["repetition_count"] == 3
+    with pytest.raises(ValueError):
+        merge_subject_papers("Networks", {"p2": ("2024.pdf", paper)}, db)
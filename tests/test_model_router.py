@@ -0,0 +1,134 @@
+import time
+import asyncio
+
+import pytest
+
+import utils.model_router as model_router
+from utils.model_router import DEFAULT_ROUTES, HEDGE_MIN_SAMPLES, ModelRouter
+from utils.gemini_api import _module_question_bank_prompt
+
+
+@pytest.fixture(autouse=True)
+def fast_hedging(monkeypatch):
+    monkeypatch.setattr(model_router, "MIN_HEDGE_DELAY", 0.05)
+
+
+def warm(router, model, seconds=0.05):
+    for _ in range(HEDGE_MIN_SAMPLES):
+        router._histogram(model).observe(seconds)
+
+
+def test_every_tier_hedges_to_a_different_model():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    for task, route in DEFAULT_ROUTES.items():
+        for tier in route["tiers"]:
+            size = tier[0] or 10 ** 6
+            model, alternate, _ = router.route(task, "x" * size)
+            assert model == tier[1]
+            assert alternate != model, task
+
+
+def test_question_bank_tiers_are_reachable():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    small = _module_question_bank_prompt("s" * 4_000, "p" * 12_000)
+    # Inputs are trimmed to 16k syllabus + 32k PYQ characters
+    largest = _module_question_bank_prompt("s" * 100_000, "p" * 100_000)
+    assert router.route("question_bank", small)[0] == "gemini-2.5-pro"
+    assert router.route("question_bank", largest)[0] == "gemini-2.5-flash"
+
+
+def test_context_quiz_routes_long_notes_to_a_faster_model():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    assert router.route("context_quiz", "x" * 20_000)[0] == "gemini-2.5-flash"
+    assert router.route("context_quiz", "x" * 300_000)[0] == "gemini-2.5-flash-lite"
+
+
+def test_unknown_task_uses_quiz_route():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    assert router.route("nope", "prompt") == router.route("quiz", "prompt")
+
+
+def test_route_overrides_from_env(monkeypatch):
+    monkeypatch.setenv("PADHAI_MODEL_ROUTES", '{"quiz": {"deadline": 45}, "new": {"tiers": [[null, "m", "a"]]}}')
+    router = ModelRouter()
+    assert router.route("quiz", "p")[2] == 45
+    assert router.route("new", "p") == ("m", "a", DEFAULT_ROUTES["quiz"]["deadline"])
+
+
+def latency_call(latencies, calls):
+    def call(model, prompt, timeout):
+        calls.append(model)
+        time.sleep(latencies[model])
+        return model
+    return call
+
+
+def test_slow_call_is_hedged_to_the_alternate():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    warm(router, "gemini-2.5-flash")
+    calls = []
+    result = router.call("quiz", "p", latency_call({"gemini-2.5-flash": 1.0, "gemini-2.5-flash-lite": 0.01}, calls))
+    assert result == "gemini-2.5-flash-lite"
+    assert calls == ["gemini-2.5-flash", "gemini-2.5-flash-lite"]
+    assert router.counters["hedges"] == 1 and router.counters["hedge_wins"] == 1
+
+
+def test_failed_call_fails_over_without_waiting_for_p95():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    warm(router, "gemini-2.5-flash", seconds=30)
+
+    def call(model, prompt, timeout):
+        if model == "gemini-2.5-flash":
+            raise RuntimeError("quota")
+        return model
+
+    started = time.monotonic()
+    assert router.call("quiz", "p", call) == "gemini-2.5-flash-lite"
+    assert time.monotonic() - started < 1
+    assert router.counters["failovers"] == 1
+
+
+def test_deadline_raises_timeout():
+    routes = {"quiz": {"tiers": [(None, "a")], "alternate": "b", "deadline": 0.2}}
+    router = ModelRouter(routes=routes)
+    warm(router, "a")
+    with pytest.raises(TimeoutError):
+        router.call("quiz", "p", latency_call({"a": 1.0, "b": 1.0}, []))
+    assert router.counters["timeouts"] == 1
+
+
+class SlowLimiter:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def acquire(self):
+        time.sleep(self.seconds)
+
+    async def acquire_async(self):
+        await asyncio.sleep(self.seconds)
+
+
+def test_limiter_wait_is_not_counted_as_model_latency():
+    router = ModelRouter(routes=DEFAULT_ROUTES, limiter=SlowLimiter(0.3))
+    router.call("quiz", "p", latency_call({"gemini-2.5-flash": 0.01}, []))
+    asyncio.run(router.call_async("quiz", "p", lambda model, prompt, timeout: asyncio.sleep(0.01)))
+    histogram = router.histograms["gemini-2.5-flash"]
+    assert histogram.count == 2
+    assert histogram.total < 0.2
+
+
+def test_async_slow_call_is_hedged_and_loser_cancelled():
+    router = ModelRouter(routes=DEFAULT_ROUTES)
+    warm(router, "gemini-2.5-flash")
+    cancelled = []
+
+    async def call(model, prompt, timeout):
+        try:
+            await asyncio.sleep(1.0 if model == "gemini-2.5-flash" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return model
+
+    assert asyncio.run(router.call_async("quiz", "p", call)) == "gemini-2.5-flash-lite"
+    assert cancelled == ["gemini-2.5-flash"]
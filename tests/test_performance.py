@@ -0,0 +1,95 @@
+import pytest
+
+from utils.performance import (
+    HALF_LIFE_DAYS, SqlitePerformanceStore, attempt_updates, topic_key, _decayed_value, _log_add,
+)
+from utils.quiz import Quiz, Question
+
+HALF_LIFE = HALF_LIFE_DAYS * 86400
+T0 = 1_700_000_000.0
+
+
+def quiz(topic, n=2):
+    return Quiz(Question(f"{topic} question {i}?", ["a", "b", "c"], 0) for i in range(n))
+
+
+def test_decayed_sum_halves_every_half_life():
+    total = _log_add(None, 4, T0)
+    assert _decayed_value(total, T0) == pytest.approx(4)
+    assert _decayed_value(total, T0 + HALF_LIFE) == pytest.approx(2)
+    total = _log_add(total, 1, T0 + HALF_LIFE)
+    assert _decayed_value(total, T0 + 2 * HALF_LIFE) == pytest.approx(1.5)
+    assert _log_add(total, 0, T0) == total
+    assert _decayed_value(None, T0) == 0.0
+
+
+def test_weakness_weights_recent_answers_more():
+    q = quiz("Trees", 1)
+    _, questions, topics, _ = attempt_updates("Trees", q, (1,), {}, {}, {}, T0)
+    assert topics["trees"]["weakness"] == pytest.approx(1.0)
+    # A correct answer one half-life later: misses 0.5 (decayed) over attempts 1.5
+    _, questions, topics, _ = attempt_updates("Trees", q, (0,), {}, questions, topics, T0 + HALF_LIFE)
+    assert topics["trees"]["weakness"] == pytest.approx(1 / 3)
+    assert topics["trees"]["attempts"] == 2 and topics["trees"]["correct"] == 1
+    row = questions[q[0].content_hash]
+    assert (row["attempts"], row["misses"]) == (2, 1)
+    assert row["weakness"] == pytest.approx(1 / 3)
+
+
+def test_weakness_does_not_change_without_new_attempts():
+    _, _, topics, _ = attempt_updates("Trees", quiz("Trees"), (0, 1), {}, {}, {}, T0)
+    later = _decayed_value(topics["trees"]["log_misses"], T0 + 10 * HALF_LIFE) / \
+        _decayed_value(topics["trees"]["log_attempts"], T0 + 10 * HALF_LIFE)
+    assert later == pytest.approx(topics["trees"]["weakness"]) == pytest.approx(0.5)
+
+
+def test_retried_questions_count_toward_their_own_topics():
+    trees, graphs = quiz("Trees", 1), quiz("Graphs", 1)
+    known = {}
+    _, _, _, known = attempt_updates("Trees", trees, (1,), known, {}, {}, T0)
+    _, _, _, known = attempt_updates("Graphs", graphs, (1,), known, {}, {}, T0)
+    retry = Quiz([trees[0], graphs[0]])
+    entries, _, topics, _ = attempt_updates("My weakest areas", retry, (0, 1), known, {}, {}, T0 + 60)
+    assert [e["topic_key"] for e in entries] == ["trees", "graphs"]
+    assert [e["correct"] for e in entries] == [1, 0]
+    assert set(topics) == {"trees", "graphs"}
+    assert topics["graphs"]["topic"] == "Graphs"
+
+
+def test_topic_key_normalizes_case_and_spaces():
+    assert topic_key("  Binary   Search Trees ") == "binary search trees"
+    assert topic_key(None) == ""
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqlitePerformanceStore(str(tmp_path / "padhai.db"))
+
+
+def test_weak_topics_are_ordered_by_weakness(store):
+    store.record_attempt("ana", "Trees", quiz("Trees", 4), (1, 1, 1, 0), now=T0)
+    store.record_attempt("ana", "Graphs", quiz("Graphs", 4), (0, 0, 1, 0), now=T0)
+    store.record_attempt("ana", "Stacks", quiz("Stacks", 4), (0, 0, 0, 0), now=T0)
+    store.record_attempt("ben", "Stacks", quiz("Stacks", 4), (1, 1, 1, 1), now=T0)
+    weak = store.weak_topics("ana")
+    assert [w["topic"] for w in weak] == ["Trees", "Graphs"]
+    assert weak[0]["accuracy"] == pytest.approx(0.25)
+    assert weak[0]["attempts"] == 4
+    assert store.weak_topics("nobody") == []
+
+
+def test_weakest_questions_are_missed_ones_weakest_first(store):
+    trees = quiz("Trees", 3)
+    store.record_attempt("ana", "Trees", trees, (1, 0, 1), now=T0)
+    store.record_attempt("ana", "Trees", trees, (0, 0, 1), now=T0 + HALF_LIFE)
+    assert store.weakest_questions("ana") == [trees[2], trees[0]]
+    assert store.weakest_questions("ana", limit=1) == [trees[2]]
+
+
+def test_miss_rates_cover_all_students(store):
+    trees = quiz("Trees", 2)
+    store.record_attempt("ana", "Trees", trees, (1, 0), now=T0)
+    store.record_attempt("ben", "Trees", trees, (0, 0), now=T0)
+    rates = store.miss_rates(q.content_hash for q in trees)
+    assert rates == {trees[0].content_hash: 0.5, trees[1].content_hash: 0.0}
+    assert store.miss_rates(["unknown"]) == {}
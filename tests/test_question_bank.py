@@ -0,0 +1,131 @@
+import pytest
+
+from utils.question_bank import CLUSTER_THRESHOLD, create_bank, merge_paper, merge_generated_bank, bank_to_question_data
+from utils.text_similarity import question_similarity
+
+# Different questions that a character-level ratio rates as near-identical
+NEAR_MISSES = [
+    ("Explain bubble sort with an example.", "Explain quick sort with an example."),
+    ("Explain BFS traversal of a graph.", "Explain DFS traversal of a graph."),
+    ("Compare TCP and IP headers.", "Compare UDP and IP headers."),
+    ("Explain merge sort algorithm.", "Explain heap sort algorithm."),
+    ("Write an algorithm for insertion sort.", "Write an algorithm for selection sort."),
+    ("Explain encryption in RSA.", "Explain decryption in RSA."),
+    ("Explain directed graph representation.", "Explain undirected graph representation."),
+    ("Explain layer2 switching.", "Explain layer3 switching."),
+]
+
+SAME_QUESTION = [
+    ("Explain quick sort with an example.", "Q3. Describe Quick Sort with suitable examples."),
+    ("Define a spanning tree.", "What is a spanning tree?"),
+    ("Explain the working of quick sort.", "Explain quick sort."),
+    ("Explain Dijkstra's shortest path algorithm.", "Explain Dijkstras shortest path algorithms."),
+    # OCR typo in a long word
+    ("Explain the Bellman Ford algorithm.", "Explain the Bellman Ford algorithrn."),
+]
+
+
+@pytest.mark.parametrize("a, b", NEAR_MISSES)
+def test_near_misses_are_different_questions(a, b):
+    assert question_similarity(a, b) < CLUSTER_THRESHOLD
+
+
+@pytest.mark.parametrize("a, b", SAME_QUESTION)
+def test_rewordings_are_the_same_question(a, b):
+    assert question_similarity(a, b) >= CLUSTER_THRESHOLD
+
+
+def test_adding_a_concept_is_a_different_question():
+    assert question_similarity("What is a tree?", "What is a binary tree?") < CLUSTER_THRESHOLD
+
+
+def make_bank():
+    return create_bank("DSA", {
+        "Module 1: Sorting": [
+            {"question_text": "Explain bubble sort with an example.", "repetition_count": 1},
+            {"question_text": "Explain merge sort algorithm.", "repetition_count": 2, "importance": "High"},
+        ],
+        "Module 2: Graphs": [
+            {"question_text": "Explain BFS traversal of a graph.", "repetition_count": 1},
+        ],
+    }, {"p0": "2022.pdf"})
+
+
+def test_merge_paper_keeps_near_misses_apart():
+    bank = make_bank()
+    stats = merge_paper(bank, "p1", "2023.pdf", {
+        "Module 1: Sorting": ["Explain quick sort with an example.", "Explain heap sort algorithm."],
+        "Module 2: Graphs": ["Explain DFS traversal of a graph."],
+    })
+    assert stats == {"new": 3, "repeated": 0}
+    assert len(bank["clusters"]) == 6
+    assert all(c["repetition_count"] == 1 for c in bank["clusters"][3:])
+
+
+def test_merge_paper_counts_repeats():
+    bank = make_bank()
+    stats = merge_paper(bank, "p1", "2023.pdf", {
+        "Sorting": ["Describe bubble sort with suitable examples.", "Explain bubble sort."],
+    })
+    # Both texts match the same cluster, which is counted once per paper
+    assert stats == {"new": 0, "repeated": 1}
+    bubble = bank["clusters"][0]
+    assert bubble["repetition_count"] == 2
+    assert bubble["importance"] == "High"
+    assert bubble["papers"] == ["p1"]
+    assert bubble["variants"] == ["Describe bubble sort with suitable examples."]
+
+
+def test_merge_paper_skips_papers_already_merged():
+    bank = make_bank()
+    paper = {"Module 2: Graphs": ["Explain BFS traversal of a graph."]}
+    assert merge_paper(bank, "p1", "2023.pdf", paper) == {"new": 0, "repeated": 1}
+    assert merge_paper(bank, "p1", "2023.pdf", paper) == {"new": 0, "repeated": 0}
+    assert merge_paper(bank, "p0", "2022.pdf", paper) == {"new": 0, "repeated": 0}
+    graphs = bank_to_question_data(bank)["Module 2: Graphs"]
+    assert [q["repetition_count"] for q in graphs] == [2]
+
+
+def test_merge_generated_bank_keeps_existing_papers():
+    bank = make_bank()
+    merge_paper(bank, "p1", "2023.pdf", {"Module 2: Graphs": ["Explain DFS traversal of a graph."]})
+    stats = merge_generated_bank(bank, {
+        "Module 1: Sorting": [{"question_text": "Describe bubble sort with suitable examples.", "repetition_count": 2},
+                              {"question_text": "Explain quick sort.", "repetition_count": 1}],
+    }, {"p2": "2024.pdf"})
+    assert stats == {"new": 1, "repeated": 1}
+    assert set(bank["papers"]) == {"p0", "p1", "p2"}
+    assert bank["clusters"][0]["repetition_count"] == 3
+    assert [c["question_text"] for c in bank["clusters"][3:]] == ["Explain DFS traversal of a graph.", "Explain quick sort."]
+    # Nothing new: the same papers again change nothing
+    assert merge_generated_bank(bank, {"Module 1: Sorting": [{"question_text": "Explain quick sort."}]},
+                                {"p2": "2024.pdf"}) == {"new": 0, "repeated": 0}
+
+
+def test_merge_generated_bank_never_counts_a_paper_twice():
+    bank = make_bank()
+    result = {"Module 1: Sorting": [{"question_text": "Explain bubble sort.", "repetition_count": 2}]}
+    merge_generated_bank(bank, result, {"p1": "2023.pdf"})
+    # A repeated job for the same paper, or one without its papers, adds nothing
+    assert merge_generated_bank(bank, result, {"p1": "2023.pdf"}) == {"new": 0, "repeated": 0}
+    with pytest.raises(ValueError):
+        merge_generated_bank(bank, result, {})
+    # The result for p1 + p2 already includes p1's counts
+    with pytest.raises(ValueError):
+        merge_generated_bank(bank, result, {"p1": "2023.pdf", "p2": "2024.pdf"})
+    assert bank["clusters"][0]["repetition_count"] == 3
+    assert set(bank["papers"]) == {"p0", "p1"}
+
+
+def test_merge_paper_keeps_other_modules_apart():
+    bank = make_bank()
+    merge_paper(bank, "p1", "2023.pdf", {
+        "Module 3: Trees": ["Explain AVL tree rotations."],
+        "Module 4": ["Explain hashing with chaining."],
+        "Unit II - Graph Algorithms": ["Explain DFS traversal of a graph."],
+        "Module 1": ["Explain quick sort."],
+    })
+    assert bank["modules"] == ["Module 1: Sorting", "Module 2: Graphs", "Module 3: Trees", "Module 4"]
+    assert [c["module"] for c in bank["clusters"][3:]] == [
+        "Module 3: Trees", "Module 4", "Module 2: Graphs", "Module 1: Sorting",
+    ]
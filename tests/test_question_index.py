@@ -0,0 +1,49 @@
+from utils.question_bank import build_question_index, filter_question_index
+
+QUESTION_DATA = {
+    "Module 1: Sorting": [
+        {"question_text": "Explain bubble sort.", "repetition_count": 1, "importance": "Normal"},
+        {"question_text": "Explain quick sort with an example.", "repetition_count": 3, "importance": "High"},
+    ],
+    "Module 2: Graphs": [
+        {"question_text": "Define BFS.", "repetition_count": 2, "importance": "High"},
+        {"question_text": "Define DFS.", "repetition_count": 1, "importance": "Normal"},
+    ],
+}
+
+
+def texts(index, positions):
+    return [index[i]["question_text"] for i in positions]
+
+
+def test_index_orders_high_importance_then_repetitions():
+    index = build_question_index(QUESTION_DATA)
+    assert [r["question_text"] for r in index] == [
+        "Explain quick sort with an example.", "Define BFS.", "Explain bubble sort.", "Define DFS.",
+    ]
+    assert index[0]["search_key"] == "explain quick sort with an example"
+
+
+def test_filter_without_filters_returns_everything():
+    index = build_question_index(QUESTION_DATA)
+    assert filter_question_index(index) == list(range(len(index)))
+
+
+def test_filter_query_needs_every_word():
+    index = build_question_index(QUESTION_DATA)
+    assert texts(index, filter_question_index(index, query="quick SORT")) == ["Explain quick sort with an example."]
+    assert texts(index, filter_question_index(index, query="sort")) == [
+        "Explain quick sort with an example.", "Explain bubble sort.",
+    ]
+    assert filter_question_index(index, query="heap sort") == []
+
+
+def test_filter_by_module_importance_and_repetitions():
+    index = build_question_index(QUESTION_DATA)
+    assert texts(index, filter_question_index(index, module="Module 2: Graphs")) == ["Define BFS.", "Define DFS."]
+    assert texts(index, filter_question_index(index, importance="high")) == [
+        "Explain quick sort with an example.", "Define BFS.",
+    ]
+    assert texts(index, filter_question_index(index, min_repetitions=2, module="Module 1: Sorting")) == [
+        "Explain quick sort with an example.",
+    ]
@@ -0,0 +1,100 @@
+import pickle
+
+import pytest
+
+from utils.jobs import content_hash
+from utils.quiz import Quiz, Question
+
+OPTIONS = ["Stack", "Queue", "Heap", "Tree"]
+
+
+def generated(correct_answer, options=OPTIONS, text="Which structure is LIFO?"):
+    return {"question_text": text, "options": list(options), "correct_answer": correct_answer,
+            "explanation": "Last in, first out."}
+
+
+@pytest.mark.parametrize("correct_answer, index", [
+    ("Queue", 1), ("  Queue ", 1), ("queue", 1), ("C", 2), ("(d)", 3), ("b)", 1), ("A.", 0),
+])
+def test_from_dict_resolves_the_answer_index(correct_answer, index):
+    assert Question.from_dict(generated(correct_answer)).answer_index == index
+
+
+def test_an_option_named_like_a_letter_wins_over_the_letter():
+    q = Question.from_dict(generated("B", options=["A", "B", "C"]))
+    assert q.answer_index == 1 and q.correct_answer == "B"
+    q = Question.from_dict(generated("C", options=["C", "B", "A"]))
+    assert q.correct_answer == "C"
+
+
+@pytest.mark.parametrize("data", [
+    generated("Graph"),
+    generated("E"),
+    generated("Stack", options=["Stack"]),
+    generated("Stack", text="  "),
+    {"question_text": "Q?", "options": "Stack, Queue", "correct_answer": "Stack"},
+    "not a dict",
+])
+def test_from_dict_rejects_malformed_questions(data):
+    assert Question.from_dict(data) is None
+
+
+def test_from_dicts_drops_malformed_questions():
+    quiz = Quiz.from_dicts([generated("Stack"), generated("Graph"), None])
+    assert len(quiz) == 1
+    assert Quiz.from_dicts({"quiz": []}).questions == ()
+
+
+def test_to_dict_round_trip():
+    q = Question.from_dict(generated("a."))
+    assert q.to_dict() == generated("Stack")
+    assert Question.from_dict(q.to_dict()) == q
+
+
+def test_content_hash_matches_the_dict_based_key():
+    q = Question("Which structure is LIFO?", OPTIONS, 0)
+    assert q.content_hash == content_hash("Which structure is LIFO?", OPTIONS, "Stack")
+
+
+def test_content_hash_depends_on_text_options_and_answer_only():
+    q = Question("Which structure is LIFO?", OPTIONS, 0, "Last in, first out.")
+    assert Question("Which structure is LIFO?", OPTIONS, 0, "Another explanation.") == q
+    assert Question("Which structure is LIFO?", OPTIONS, 1) != q
+    assert Question("Which structure is LIFO?", OPTIONS[::-1], 3) != q
+    assert Question("Which structure is FIFO?", OPTIONS, 0) != q
+    assert len({q, Question("Which structure is LIFO?", OPTIONS, 0)}) == 1
+
+
+def test_quiz_hash_depends_on_question_order():
+    a, b = Question("A?", OPTIONS, 0), Question("B?", OPTIONS, 1)
+    assert Quiz([a, b]) == Quiz([a, b])
+    assert Quiz([a, b]).content_hash != Quiz([b, a]).content_hash
+
+
+def test_questions_and_quizzes_are_immutable():
+    q = Question("A?", OPTIONS, 0)
+    with pytest.raises(AttributeError):
+        q.answer_index = 1
+    with pytest.raises(AttributeError):
+        Quiz([q]).questions = ()
+
+
+def test_pickle_round_trip():
+    quiz = Quiz([Question("A?", OPTIONS, 0, "why"), Question("B?", OPTIONS, 2)])
+    restored = pickle.loads(pickle.dumps(quiz))
+    assert restored == quiz
+    assert restored[0].explanation == "why"
+
+
+def test_score():
+    quiz = Quiz([Question("A?", OPTIONS, 0), Question("B?", OPTIONS, 1), Question("C?", OPTIONS, 2)])
+    correct, score, incorrect = quiz.score((0, 3, None))
+    assert correct == (True, False, False)
+    assert score == 1
+    assert incorrect == (quiz[1], quiz[2])
+
+
+def test_score_counts_missing_answers_as_wrong():
+    quiz = Quiz([Question("A?", OPTIONS, 0), Question("B?", OPTIONS, 1)])
+    assert quiz.score((0,)) == ((True, False), 1, (quiz[1],))
+    assert quiz.score(())[1] == 0
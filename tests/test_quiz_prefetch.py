@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+import utils.quiz_prefetch as quiz_prefetch
+from utils.quiz_prefetch import QuizPrefetcher
+
+TOPICS = ["Sorting", "Graphs", "Trees", "Hashing", "Heaps"]
+
+
+class FakeGenerate:
+    """Records calls. A blocking fake waits for `gate`, so its jobs stay running or queued."""
+    def __init__(self, blocking=False):
+        self.calls = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        if not blocking:
+            self.gate.set()
+
+    def __call__(self, topic, num_questions, quiz_context):
+        self.calls.append(topic)
+        self.started.set()
+        self.gate.wait(5)
+        return f"quiz about {topic}"
+
+
+@pytest.fixture
+def generate():
+    fake = FakeGenerate(blocking=True)
+    yield fake
+    fake.gate.set()
+
+
+def finish(prefetcher):
+    for job in list(prefetcher._jobs.values()):
+        job["future"].result(timeout=5)
+
+
+def test_each_session_prefetches_within_its_budget():
+    prefetcher = QuizPrefetcher(FakeGenerate(), max_workers=2, max_pending=10)
+    prefetcher.prefetch("ana", TOPICS, 5, "Quick Review", limit=2)
+    prefetcher.prefetch("ana", TOPICS, 5, "Quick Review", limit=2)
+    finish(prefetcher)
+    assert prefetcher.counters["started"] == 2
+    # Another session shares the finished jobs and adds its own up to its budget
+    prefetcher.prefetch("ben", TOPICS[::-1], 5, "Quick Review", limit=3)
+    finish(prefetcher)
+    assert prefetcher.counters["started"] == 5
+
+
+def test_topics_beyond_max_pending_are_skipped(generate):
+    prefetcher = QuizPrefetcher(generate, max_workers=1, max_pending=2)
+    prefetcher.prefetch("ana", TOPICS, 5, "Quick Review", limit=5)
+    assert prefetcher.counters["started"] == 2
+    assert prefetcher.counters["skipped"] == 3
+    assert prefetcher.stats()["pending"] == 2
+
+
+def test_release_cancels_queued_jobs_nobody_else_wants(generate):
+    prefetcher = QuizPrefetcher(generate, max_workers=1, max_pending=10)
+    prefetcher.prefetch("ana", TOPICS[:3], 5, "Quick Review", limit=3)
+    prefetcher.prefetch("ben", TOPICS[2:3], 5, "Quick Review", limit=1)
+    assert generate.started.wait(5)
+    prefetcher.release("ana")
+    # The running job cannot be interrupted and ben still wants Trees
+    assert prefetcher.counters["cancelled"] == 1
+    assert prefetcher.key("Graphs", 5, "Quick Review") not in prefetcher._jobs
+    assert prefetcher.key("Trees", 5, "Quick Review") in prefetcher._jobs
+    generate.gate.set()
+    finish(prefetcher)
+    assert generate.calls == ["Sorting", "Trees"]
+
+
+def test_a_prefetched_quiz_is_served_once_per_session():
+    prefetcher = QuizPrefetcher(FakeGenerate(), max_workers=1, max_pending=10)
+    prefetcher.prefetch("ana", ["Sorting"], 5, "Quick Review", limit=1)
+    finish(prefetcher)
+    assert prefetcher.take("ana", " sorting ", 5, "Quick Review") == "quiz about Sorting"
+    # A retake of the same topic gets a fresh quiz
+    assert prefetcher.take("ana", "Sorting", 5, "Quick Review") is None
+    assert prefetcher.take("ben", "Sorting", 5, "Quick Review") == "quiz about Sorting"
+    # Other settings are another quiz
+    assert prefetcher.take("cal", "Sorting", 10, "Quick Review") is None
+    assert {k: prefetcher.counters[k] for k in ("instant", "waited", "missed")} == \
+        {"instant": 2, "waited": 0, "missed": 2}
+
+
+def test_finished_quizzes_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(quiz_prefetch.time, "monotonic", lambda: now[0])
+    prefetcher = QuizPrefetcher(FakeGenerate(), max_workers=1, max_pending=10, ttl=60)
+    prefetcher.prefetch("ana", ["Sorting"], 5, "Quick Review", limit=1)
+    finish(prefetcher)
+    assert prefetcher.stats()["ready"] == 1
+    now[0] += 60
+    assert prefetcher.stats()["ready"] == 1
+    now[0] += 1
+    assert prefetcher.stats()["ready"] == 0
+    assert prefetcher.counters["expired"] == 1
+    assert prefetcher.take("ben", "Sorting", 5, "Quick Review") is None
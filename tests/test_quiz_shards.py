@@ -0,0 +1,77 @@
+import utils.gemini_api as gemini_api
+from utils.gemini_api import merge_quiz_shards, QUIZ_TOP_UP_ATTEMPTS
+from utils.quiz import Quiz, Question
+
+ALGORITHMS = ["bubble sort", "insertion sort", "selection sort", "merge sort", "quick sort",
+              "heap sort", "binary search", "linear search", "BFS", "DFS"]
+
+
+def question(text, answer="O(n^2)", options=("O(n)", "O(n log n)", "O(n^2)", "O(log n)")):
+    return Question(text, list(options), list(options).index(answer))
+
+
+def test_distinct_questions_on_one_topic_are_kept():
+    shards = [
+        Quiz([question(f"What is the worst-case time complexity of {a}?") for a in ALGORITHMS[:5]]),
+        Quiz([question(f"What is the worst-case time complexity of {a}?") for a in ALGORITHMS[5:]]),
+    ]
+    assert len(merge_quiz_shards(shards, 10)) == 10
+
+
+def test_questions_differing_in_one_term_are_kept():
+    stack = Question("Which data structure follows the LIFO principle?", ["Stack", "Queue"], 0)
+    queue = Question("Which data structure follows the FIFO principle?", ["Stack", "Queue"], 1)
+    search = Question("What is the average time complexity of search in a balanced BST?",
+                      ["O(1)", "O(log n)"], 1)
+    insert = Question("What is the average time complexity of insert in a balanced BST?",
+                      ["O(1)", "O(log n)"], 1)
+    merged = merge_quiz_shards([Quiz([stack, search]), Quiz([queue, insert])], 4)
+    assert list(merged) == [stack, search, queue, insert]
+
+
+def test_repeated_questions_are_dropped():
+    original = question("What is the worst-case time complexity of bubble sort?")
+    reworded = question("Q2. What is the worst case time complexity of Bubble Sort")
+    same_words = question("What is the worst-case time complexity of the bubble sort algorithm?")
+    different_answer = question("What is the worst-case time complexity of the bubble sort algorithm?",
+                                answer="O(n)", options=("O(n)", "O(n^2)"))
+    merged = merge_quiz_shards([Quiz([original]), Quiz([reworded, same_words]), None], 5)
+    assert list(merged) == [original]
+    # Text alone is not enough: same wording with another answer is a different question
+    assert len(merge_quiz_shards([Quiz([original, different_answer])], 5)) == 2
+
+
+def test_merge_caps_at_requested_length():
+    shards = [Quiz([question(f"What is the worst-case time complexity of {a}?") for a in ALGORITHMS])]
+    assert len(merge_quiz_shards(shards, 4)) == 4
+
+
+def fake_shards(monkeypatch, duplicates_per_call):
+    """Shards that return `duplicates_per_call[i]` repeats of one question on call i."""
+    calls = []
+
+    def generate(topic, num_questions, quiz_context, focus, avoid=None):
+        i = len(calls)
+        calls.append(num_questions)
+        repeats = duplicates_per_call[i] if i < len(duplicates_per_call) else 0
+        fresh = [question(f"What is the worst-case time complexity of algorithm call{i}q{n}?")
+                 for n in range(num_questions - repeats)]
+        return Quiz(fresh + [question("What is a stack?", answer="O(n)")] * repeats)
+
+    monkeypatch.setattr(gemini_api, "_generate_quiz_shard", generate)
+    return calls
+
+
+def test_sharded_quiz_tops_up_until_complete(monkeypatch):
+    # Two shards of 6, the second all repeats but one; the first top-up is half repeats too
+    calls = fake_shards(monkeypatch, [0, 5, 2])
+    quiz = gemini_api._sharded_quiz("Sorting", 12, "Quick Review", 6)
+    assert len(quiz) == 12
+    assert calls == [6, 6, 4, 2]
+
+
+def test_sharded_quiz_returns_short_quiz_when_budget_runs_out(monkeypatch):
+    calls = fake_shards(monkeypatch, [0, 5, 4, 2, 2])
+    quiz = gemini_api._sharded_quiz("Sorting", 12, "Quick Review", 6)
+    assert len(calls) == 2 + QUIZ_TOP_UP_ATTEMPTS
+    assert 7 <= len(quiz) < 12
@@ -0,0 +1,50 @@
+from utils.quiz import Question
+from utils.remediation import build_learning_path, build_study_plan
+
+
+def record(sub_topic, level, practice="Solve three exercises."):
+    return {"sub_topic": sub_topic, "study_strategy": f"Read about {sub_topic}.",
+            "google_search_query": sub_topic, "practice_task": practice, "level": level}
+
+
+def questions(n):
+    return [Question(f"Question {i}?", ["a", "b"], 0) for i in range(n)]
+
+
+def test_learning_path_orders_prerequisites_first():
+    records = [record("Tree rotations", 3), record("Recursion", 1), record("Tree rotations", 3),
+               record("BST insertion", 2)]
+    path = build_learning_path(records, questions(4))["learning_path"]
+    assert [s["step_title"] for s in path] == [
+        "Rebuild the basics of Recursion", "Practice BST insertion", "Apply Tree rotations",
+    ]
+    assert path[0]["step_rationale"].endswith("BST insertion builds on it.")
+    assert "2 questions" in path[2]["step_rationale"]
+
+
+def test_learning_path_does_not_repeat_the_study_plan():
+    records = [record("Recursion", 1), record("BST insertion", 2)]
+    strategies = {item["study_strategy"] for item in build_study_plan(records)["study_plan"]}
+    path = build_learning_path(records, questions(2))["learning_path"]
+    assert not strategies & {step["step_details"] for step in path}
+
+
+def test_learning_path_keeps_the_most_missed_sub_topics():
+    records = [record("Hashing", 1), record("Heaps", 3), record("Heaps", 3), record("Graphs", 2),
+               record("Graphs", 2), record("Tries", 2), record("Tries", 2)]
+    path = build_learning_path(records, questions(7), max_steps=3)["learning_path"]
+    assert [s["step_title"] for s in path] == ["Practice Graphs", "Practice Tries", "Apply Heaps"]
+
+
+def test_learning_path_needs_practice_tasks():
+    records = [record("Recursion", 1), record("Heaps", 2, practice="")]
+    assert build_learning_path(records, questions(2)) is None
+
+
+def test_study_plan_keeps_the_most_missed_sub_topics():
+    records = [record("Hashing", 1), record("Heaps", 3), record("Graphs", 2), record("Heaps", 3),
+               record("Graphs", 2), record("Tries", 2), record("Graphs", 2)]
+    plan = build_study_plan(records, max_items=3)["study_plan"]
+    assert [item["sub_topic"] for item in plan] == ["Graphs", "Heaps", "Hashing"]
+    assert plan[0]["google_search_link"] == "https://www.google.com/search?q=Graphs"
+    assert len(build_study_plan(records)["study_plan"]) == 3
@@ -0,0 +1,106 @@
+import io
+import zipfile
+
+import pytest
+
+import utils.uploads as uploads
+from utils.uploads import UploadTooLarge, check_page_count, check_upload_size, open_upload, read_upload, upload_hash
+
+DATA = bytes(range(256)) * 64
+
+
+class LocalFile:
+    """A file on disk, like the batch CLI's uploads."""
+    def __init__(self, path):
+        self.path = str(path)
+        self.name = path.name
+
+
+class Stream(io.RawIOBase):
+    """A readable stream that cannot seek, like a network body."""
+    def __init__(self, data, name="paper.pdf"):
+        self._data = io.BytesIO(data)
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+def test_files_on_disk_are_memory_mapped(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(DATA)
+    with open_upload(LocalFile(path)) as stream:
+        assert isinstance(stream, uploads._MappedReader)
+        assert stream.read(4) == DATA[:4]
+        assert stream.seek(-4, io.SEEK_END) == len(DATA) - 4
+        assert stream.read() == DATA[-4:]
+
+
+def test_mapped_files_open_as_zip(tmp_path):
+    path = tmp_path / "notes.docx"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("word/document.xml", "<w:document/>")
+    with open_upload(LocalFile(path)) as stream, zipfile.ZipFile(stream) as z:
+        assert z.read("word/document.xml") == b"<w:document/>"
+
+
+def test_empty_files_are_not_mapped(tmp_path):
+    path = tmp_path / "empty.pdf"
+    path.write_bytes(b"")
+    with open_upload(LocalFile(path)) as stream:
+        assert stream.read() == b""
+
+
+def test_seekable_uploads_are_read_in_place():
+    upload = io.BytesIO(DATA)
+    upload.read(100)
+    with open_upload(upload) as stream:
+        assert stream is upload
+        assert stream.tell() == 0
+
+
+@pytest.mark.parametrize("max_memory, rolled", [(len(DATA) * 2, False), (1024, True)])
+def test_unseekable_streams_are_spooled(monkeypatch, max_memory, rolled):
+    monkeypatch.setattr(uploads, "SPOOL_MAX_MEMORY", max_memory)
+    with open_upload(Stream(DATA)) as stream:
+        assert stream._rolled is rolled
+        assert stream.seekable()
+        assert stream.read() == DATA
+
+
+def test_every_kind_of_upload_hashes_the_same(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(DATA)
+    assert upload_hash(LocalFile(path)) == upload_hash(io.BytesIO(DATA)) == upload_hash(Stream(DATA))
+
+
+def test_upload_size_limit(tmp_path, monkeypatch):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(DATA)
+    check_upload_size(LocalFile(path), max_mb=1)
+    with pytest.raises(UploadTooLarge, match="paper.pdf is 0.0 MB; the limit is 0.01 MB."):
+        check_upload_size(LocalFile(path), max_mb=0.01)
+    # The default limit is read when the check runs
+    upload = io.BytesIO(DATA)
+    upload.name = "paper.pdf"
+    upload.read(10)
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_MB", 0.01)
+    with pytest.raises(UploadTooLarge):
+        read_upload(upload)
+    # Measuring a stream leaves its position alone
+    assert upload.tell() == 10
+
+
+def test_page_count_limit(monkeypatch):
+    check_page_count("paper.pdf", 300)
+    with pytest.raises(UploadTooLarge, match="paper.pdf has 301 pages; the limit is 300."):
+        check_page_count("paper.pdf", 301)
+    check_page_count("paper.pdf", 5, max_pages=5)
+    with pytest.raises(UploadTooLarge):
+        check_page_count("paper.pdf", 6, max_pages=5)
+    monkeypatch.setattr(uploads, "MAX_PDF_PAGES", 10)
+    with pytest.raises(UploadTooLarge):
+        check_page_count("paper.pdf", 11)
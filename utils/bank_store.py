@@ -0,0 +1,308 @@
+# ---------------------- Persistent Question Bank Store (SQLite) ----------------------
+# Subjects, modules, source papers and question clusters live in a local SQLite
+# database so a bank generated once can be loaded, searched and filtered by any
+# later user without calling Gemini again.
+import os
+import re
+import json
+import sqlite3
+import threading
+from contextlib import closing
+
+from utils.question_bank import subject_key, create_bank, merge_paper, merge_generated_bank
+
+DATA_DIR = os.environ.get("PADHAI_DATA_DIR", "data")
+DB_PATH = os.environ.get("PADHAI_DB_PATH", os.path.join(DATA_DIR, "padhai.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS modules (
+    id INTEGER PRIMARY KEY,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (subject_id, name)
+);
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    hash TEXT NOT NULL,
+    name TEXT,
+    added_at TEXT,
+    initial INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (subject_id, hash)
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question_text TEXT NOT NULL,
+    variants TEXT NOT NULL DEFAULT '[]',
+    repetition_count INTEGER NOT NULL DEFAULT 1,
+    importance TEXT NOT NULL DEFAULT 'Normal'
+);
+CREATE TABLE IF NOT EXISTS question_papers (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    PRIMARY KEY (question_id, paper_id)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions (subject_id, module_id, position);
+CREATE INDEX IF NOT EXISTS idx_questions_importance ON questions (subject_id, importance, repetition_count DESC);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (
+    question_text, variants, content='questions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+    INSERT INTO questions_fts (rowid, question_text, variants) VALUES (new.id, new.question_text, new.variants);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question_text, variants)
+    VALUES ('delete', old.id, old.question_text, old.variants);
+END;
+"""
+
+
+# Databases whose schema this process has already created; WAL mode is stored in the file
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _init_db(db_path):
+    with _init_lock:
+        if db_path in _initialized:
+            return
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(sqlite3.connect(db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+        _initialized.add(db_path)
+
+
+def connect(db_path=None):
+    """Open the store. The database and schema are created on first use in this process."""
+    db_path = os.path.abspath(db_path or DB_PATH)
+    _init_db(db_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _save_bank(conn, bank):
+    key = subject_key(bank["subject"])
+    conn.execute("DELETE FROM subjects WHERE key = ?", (key,))
+    subject_id = conn.execute(
+        "INSERT INTO subjects (key, name, updated_at) VALUES (?, ?, ?)",
+        (key, bank["subject"], bank.get("updated_at")),
+    ).lastrowid
+
+    module_ids = {}
+    modules = list(bank["modules"]) + [c["module"] for c in bank["clusters"] if c["module"] not in bank["modules"]]
+    for position, name in enumerate(dict.fromkeys(modules)):
+        module_ids[name] = conn.execute(
+            "INSERT INTO modules (subject_id, position, name) VALUES (?, ?, ?)",
+            (subject_id, position, name),
+        ).lastrowid
+
+    paper_ids = {}
+    for h, paper in bank["papers"].items():
+        paper_ids[h] = conn.execute(
+            "INSERT INTO papers (subject_id, hash, name, added_at, initial) VALUES (?, ?, ?, ?, ?)",
+            (subject_id, h, paper.get("name"), paper.get("added_at"), int(paper.get("initial", False))),
+        ).lastrowid
+
+    for position, cluster in enumerate(bank["clusters"]):
+        question_id = conn.execute(
+            "INSERT INTO questions (subject_id, module_id, position, question_text, variants, repetition_count, importance) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (subject_id, module_ids[cluster["module"]], position, cluster["question_text"],
+             json.dumps(cluster.get("variants", []), ensure_ascii=False),
+             cluster["repetition_count"], cluster.get("importance", "Normal")),
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR IGNORE INTO question_papers (question_id, paper_id) VALUES (?, ?)",
+            [(question_id, paper_ids[h]) for h in cluster.get("papers", []) if h in paper_ids],
+        )
+
+
+def save_subject_bank(bank, db_path=None):
+    """Insert or replace the whole bank for `bank["subject"]` in one transaction."""
+    with closing(connect(db_path)) as conn, conn:
+        _save_bank(conn, bank)
+
+
+def _load_bank(conn, subject_name):
+    subject = conn.execute("SELECT * FROM subjects WHERE key = ?", (subject_key(subject_name),)).fetchone()
+    if subject is None:
+        return None
+
+    modules = {r["id"]: r["name"] for r in conn.execute(
+        "SELECT id, name FROM modules WHERE subject_id = ? ORDER BY position", (subject["id"],))}
+    papers = {}
+    paper_hashes = {}
+    for r in conn.execute("SELECT * FROM papers WHERE subject_id = ? ORDER BY id", (subject["id"],)):
+        papers[r["hash"]] = {"name": r["name"], "added_at": r["added_at"], "initial": bool(r["initial"])}
+        paper_hashes[r["id"]] = r["hash"]
+
+    sources = {}
+    for r in conn.execute(
+            "SELECT qp.question_id, qp.paper_id FROM question_papers qp "
+            "JOIN questions q ON q.id = qp.question_id WHERE q.subject_id = ?", (subject["id"],)):
+        sources.setdefault(r["question_id"], []).append(paper_hashes[r["paper_id"]])
+
+    clusters = []
+    for r in conn.execute("SELECT * FROM questions WHERE subject_id = ? ORDER BY position", (subject["id"],)):
+        clusters.append({
+            "id": len(clusters),
+            "module": modules[r["module_id"]],
+            "question_text": r["question_text"],
+            "variants": json.loads(r["variants"]),
+            "repetition_count": r["repetition_count"],
+            "importance": r["importance"],
+            "papers": sources.get(r["id"], []),
+        })
+
+    return {
+        "subject": subject["name"],
+        "modules": list(modules.values()),
+        "papers": papers,
+        "clusters": clusters,
+        "updated_at": subject["updated_at"],
+    }
+
+
+def load_subject_bank(subject_name, db_path=None):
+    """Stored bank for a subject (same shape as question_bank.create_bank), or None."""
+    with closing(connect(db_path)) as conn:
+        return _load_bank(conn, subject_name)
+
+
+def update_subject_bank(subject_name, update, db_path=None):
+    """
+    Save `update(bank)` for the subject's current stored bank (None if it has
+    none) in one write transaction, so concurrent updates of a subject never
+    overwrite each other's merges. Slow work such as Gemini calls must happen
+    before this call; `update` only merges. Returns the saved bank.
+    """
+    with closing(connect(db_path)) as conn, conn:
+        # Take the write lock before reading, so no other update can slip in between
+        conn.execute("BEGIN IMMEDIATE")
+        bank = update(_load_bank(conn, subject_name))
+        _save_bank(conn, bank)
+        return bank
+
+
+def merge_subject_papers(subject_name, papers, db_path=None):
+    """
+    Merge extracted papers ({paper hash: (file name, {module: [question_text]})})
+    into the subject's stored bank. Papers another update merged meanwhile are
+    skipped. Returns the saved bank and {paper hash: merge_paper stats}.
+    """
+    stats = {}
+
+    def merge(bank):
+        if bank is None:
+            raise ValueError(f"{subject_name} has no stored question bank")
+        for h, (name, module_questions) in papers.items():
+            stats[h] = merge_paper(bank, h, name, module_questions)
+        return bank
+
+    return update_subject_bank(subject_name, merge, db_path), stats
+
+
+def store_generated_bank(subject_name, question_data, papers, db_path=None):
+    """Save a generated bank for `papers` as the subject's bank, or merge it into the stored one."""
+    def store(bank):
+        if bank is None:
+            return create_bank(subject_name, question_data, papers)
+        merge_generated_bank(bank, question_data, papers)
+        return bank
+
+    return update_subject_bank(subject_name, store, db_path)
+
+
+def list_subjects(db_path=None):
+    """Summary rows for every stored subject, most recently updated first."""
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(
+            "SELECT s.name, s.updated_at, "
+            "(SELECT COUNT(*) FROM questions q WHERE q.subject_id = s.id) AS question_count, "
+            "(SELECT COUNT(*) FROM papers p WHERE p.subject_id = s.id) AS paper_count "
+            "FROM subjects s ORDER BY s.updated_at DESC"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def list_modules(subject_name, db_path=None):
+    """{module name: question count} for a stored subject, in module order."""
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(
+            "SELECT m.name, (SELECT COUNT(*) FROM questions q WHERE q.module_id = m.id) AS question_count "
+            "FROM modules m JOIN subjects s ON s.id = m.subject_id WHERE s.key = ? ORDER BY m.position",
+            (subject_key(subject_name),),
+        ).fetchall()
+        return {r["name"]: r["question_count"] for r in rows}
+
+
+def _fts_query(text):
+    # Quote every word so user input can never be parsed as FTS5 syntax; prefix match the last one
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+
+
+def _question_filter(subject_name, query, module, importance, min_repetitions):
+    """FROM/JOIN/WHERE clause and parameters shared by search and count queries."""
+    sql = ("FROM questions q JOIN modules m ON m.id = q.module_id "
+           "JOIN subjects s ON s.id = q.subject_id")
+    where = ["s.key = ?", "q.repetition_count >= ?"]
+    params = [subject_key(subject_name), min_repetitions]
+
+    fts = _fts_query(query) if query else None
+    if fts:
+        sql += " JOIN questions_fts ON questions_fts.rowid = q.id"
+        where.append("questions_fts MATCH ?")
+        params.append(fts)
+    if module:
+        where.append("m.name = ?")
+        params.append(module)
+    if importance:
+        where.append("q.importance = ?")
+        params.append(importance)
+    return sql + " WHERE " + " AND ".join(where), params
+
+
+def search_questions(subject_name, query=None, module=None, importance=None, min_repetitions=0,
+                     limit=None, offset=0, db_path=None):
+    """
+    Questions of one subject filtered in SQL, in the order of
+    question_bank.build_question_index: high importance first, then most
+    repeated, ties in module order.
+    `query` is matched with full-text search over question text and variants.
+    `limit` / `offset` select one page of the result.
+    """
+    clause, params = _question_filter(subject_name, query, module, importance, min_repetitions)
+    sql = ("SELECT q.question_text, q.repetition_count, q.importance, m.name AS module " + clause
+           + " ORDER BY CASE WHEN lower(q.importance) = 'high' THEN 0 ELSE 1 END, q.repetition_count DESC,"
+           " m.position, q.position")
+    if limit:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    with closing(connect(db_path)) as conn:
+        return [dict(r) for r in conn.execute(sql, params)]
+
+
+def count_questions(subject_name, query=None, module=None, importance=None, min_repetitions=0, db_path=None):
+    """Number of questions search_questions() would return without a limit."""
+    clause, params = _question_filter(subject_name, query, module, importance, min_repetitions)
+    with closing(connect(db_path)) as conn:
+        return conn.execute("SELECT COUNT(*) " + clause, params).fetchone()[0]
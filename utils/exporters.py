@@ -0,0 +1,299 @@
+# ---------------------- Question Bank Exporters ----------------------
+# Every format is rendered from the same intermediate document built by
+# build_question_bank_document(), so numbering, importance stars and the
+# "Top 10 Most Repeated" section are identical across PDF/Markdown/DOCX/CSV/JSON.
+import io
+import csv
+import json
+from datetime import datetime
+
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib import colors
+from docx import Document
+
+# Bump whenever any exporter changes its output so cached exports are rebuilt
+EXPORT_TEMPLATE_VERSION = 1
+
+TOP_REPEATED_LIMIT = 10
+
+
+def importance_stars(repetition_count):
+    """★★ for questions repeated 5+ times, ★ for 3+, nothing otherwise."""
+    if repetition_count >= 5:
+        return "★★"
+    elif repetition_count >= 3:
+        return "★"
+    return ""
+
+
+def build_question_bank_document(subject_name, question_data):
+    """
+    Build the format-independent representation of a module-wise question bank.
+    `question_data` is the {module_name: [question dicts]} mapping produced by
+    generate_module_question_bank().
+    """
+    modules = []
+    all_questions = []
+    for m_index, (module_name, questions) in enumerate(question_data.items(), start=1):
+        module_questions = []
+        for q_index, q in enumerate(questions, start=1):
+            reps = int(q.get("repetition_count", 1))
+            entry = {
+                "number": f"{m_index}.{q_index}",
+                "module": module_name,
+                "question_text": q.get("question_text", "").strip(),
+                "repetition_count": reps,
+                "importance": q.get("importance", "Normal"),
+                "stars": importance_stars(reps),
+            }
+            module_questions.append(entry)
+            all_questions.append(entry)
+        modules.append({"number": m_index, "name": module_name, "questions": module_questions})
+
+    # Stable sort keeps syllabus order among equally repeated questions
+    top_repeated = sorted(all_questions, key=lambda q: q["repetition_count"], reverse=True)[:TOP_REPEATED_LIMIT]
+
+    return {
+        "subject": subject_name,
+        "generated_on": datetime.now().strftime("%B %d, %Y"),
+        "modules": modules,
+        "top_repeated": top_repeated,
+    }
+
+
+# ---------------------- PDF ----------------------
+def export_question_bank_pdf(subject_name, question_data):
+    """
+    Generate a professional module-wise question bank PDF (Streamlit-compatible).
+    Returns a BytesIO buffer instead of writing to a file.
+    """
+    document = build_question_bank_document(subject_name, question_data)
+
+    buffer = io.BytesIO()
+    pdf = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=60,
+        rightMargin=60,
+        topMargin=60,
+        bottomMargin=50,
+    )
+
+    story = []
+    styles = getSampleStyleSheet()
+
+    # --- Styles ---
+    title_style = ParagraphStyle(
+        "TitleStyle",
+        parent=styles["Heading1"],
+        fontName="Helvetica-Bold",
+        fontSize=22,
+        leading=28,
+        alignment=TA_CENTER,
+        spaceAfter=30,
+    )
+
+    subtitle_style = ParagraphStyle(
+        "SubtitleStyle",
+        parent=styles["Normal"],
+        fontName="Helvetica",
+        fontSize=14,
+        leading=18,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor("#555555"),
+        spaceAfter=12,
+    )
+
+    module_title_style = ParagraphStyle(
+        "ModuleTitle",
+        parent=styles["Heading2"],
+        fontName="Helvetica-Bold",
+        fontSize=16,
+        leading=22,
+        textColor=colors.HexColor("#1F4E79"),
+        spaceBefore=16,
+        spaceAfter=8,
+    )
+
+    question_style = ParagraphStyle(
+        "QuestionStyle",
+        parent=styles["Normal"],
+        fontName="Helvetica",
+        fontSize=11.5,
+        leading=18,
+        alignment=TA_JUSTIFY,
+        spaceBefore=4,
+        spaceAfter=3,
+    )
+
+    top10_title_style = ParagraphStyle(
+        "Top10Title",
+        parent=styles["Heading2"],
+        fontName="Helvetica-Bold",
+        fontSize=15,
+        leading=22,
+        textColor=colors.HexColor("#9C27B0"),
+        spaceBefore=24,
+        spaceAfter=10,
+    )
+
+    top10_item_style = ParagraphStyle(
+        "Top10Item",
+        parent=styles["Normal"],
+        fontName="Helvetica",
+        fontSize=11.5,
+        leading=18,
+        spaceBefore=2,
+    )
+
+    footer_style = ParagraphStyle(
+        "FooterStyle",
+        parent=styles["Normal"],
+        fontSize=9,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor("#999999"),
+        spaceBefore=30,
+    )
+
+    # --- 1. Cover Page ---
+    story.append(Spacer(1, 2 * inch))
+    story.append(Paragraph("Module-wise Question Bank", title_style))
+    story.append(Paragraph(f"Subject: {document['subject']}", subtitle_style))
+    story.append(Paragraph(f"Generated on: {document['generated_on']}", subtitle_style))
+    story.append(Spacer(1, 0.5 * inch))
+    story.append(Paragraph("Generated and created by <b>Padhai Karo</b>", subtitle_style))
+    story.append(PageBreak())
+
+    # --- 2. Module-wise Questions ---
+    for module in document["modules"]:
+        story.append(Paragraph(f"Module {module['number']} – {module['name']}", module_title_style))
+        story.append(Paragraph(f"Total Questions: {len(module['questions'])}", question_style))
+        story.append(Spacer(1, 6))
+
+        for q in module["questions"]:
+            star = f"{q['stars']} " if q["stars"] else ""
+            full_text = f"<b>{q['number']}.</b> {star}{q['question_text']}"
+            story.append(Paragraph(full_text, question_style))
+
+        story.append(Spacer(1, 12))
+
+    # --- 3. Top 10 Most Repeated ---
+    story.append(Paragraph("Top 10 Most Repeated (Must-Prepare)", top10_title_style))
+    for rank, q in enumerate(document["top_repeated"], start=1):
+        line = f"{rank}. {q['stars']} {q['question_text']} (<b>{q['number']}</b>)"
+        story.append(Paragraph(line, top10_item_style))
+
+    # --- 4. Footer ---
+    story.append(Spacer(1, 30))
+    story.append(
+        Paragraph("Generated by Padhai Karo – AI-powered learning assistant", footer_style)
+    )
+
+    pdf.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+# ---------------------- Markdown ----------------------
+def export_question_bank_markdown(subject_name, question_data):
+    """Module-wise question bank as Markdown text in a BytesIO buffer."""
+    document = build_question_bank_document(subject_name, question_data)
+    lines = [
+        "# Module-wise Question Bank",
+        "",
+        f"**Subject:** {document['subject']}  ",
+        f"**Generated on:** {document['generated_on']}",
+        "",
+    ]
+    for module in document["modules"]:
+        lines.append(f"## Module {module['number']} – {module['name']}")
+        lines.append("")
+        lines.append(f"Total Questions: {len(module['questions'])}")
+        lines.append("")
+        for q in module["questions"]:
+            star = f"{q['stars']} " if q["stars"] else ""
+            lines.append(f"- **{q['number']}.** {star}{q['question_text']}")
+        lines.append("")
+
+    lines.append("## Top 10 Most Repeated (Must-Prepare)")
+    lines.append("")
+    for rank, q in enumerate(document["top_repeated"], start=1):
+        star = f"{q['stars']} " if q["stars"] else ""
+        lines.append(f"{rank}. {star}{q['question_text']} (**{q['number']}**)")
+    lines.append("")
+    lines.append("_Generated by Padhai Karo – AI-powered learning assistant_")
+    lines.append("")
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+# ---------------------- DOCX ----------------------
+def export_question_bank_docx(subject_name, question_data):
+    """Module-wise question bank as a Word document in a BytesIO buffer."""
+    document = build_question_bank_document(subject_name, question_data)
+    doc = Document()
+    doc.add_heading("Module-wise Question Bank", level=0)
+    doc.add_paragraph(f"Subject: {document['subject']}")
+    doc.add_paragraph(f"Generated on: {document['generated_on']}")
+
+    for module in document["modules"]:
+        doc.add_heading(f"Module {module['number']} – {module['name']}", level=1)
+        doc.add_paragraph(f"Total Questions: {len(module['questions'])}")
+        for q in module["questions"]:
+            para = doc.add_paragraph()
+            para.add_run(f"{q['number']}. ").bold = True
+            star = f"{q['stars']} " if q["stars"] else ""
+            para.add_run(f"{star}{q['question_text']}")
+
+    doc.add_heading("Top 10 Most Repeated (Must-Prepare)", level=1)
+    for rank, q in enumerate(document["top_repeated"], start=1):
+        para = doc.add_paragraph()
+        star = f"{q['stars']} " if q["stars"] else ""
+        para.add_run(f"{rank}. {star}{q['question_text']} ")
+        para.add_run(f"({q['number']})").bold = True
+
+    doc.add_paragraph("Generated by Padhai Karo – AI-powered learning assistant")
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+# ---------------------- CSV ----------------------
+CSV_COLUMNS = ["number", "module", "question_text", "repetition_count", "importance", "stars", "top10_rank"]
+
+def export_question_bank_csv(subject_name, question_data):
+    """One row per question; `top10_rank` is filled for the most repeated questions."""
+    document = build_question_bank_document(subject_name, question_data)
+    top_ranks = {q["number"]: rank for rank, q in enumerate(document["top_repeated"], start=1)}
+
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for module in document["modules"]:
+        for q in module["questions"]:
+            writer.writerow({**q, "top10_rank": top_ranks.get(q["number"], "")})
+    # BOM so Excel opens the ★ characters correctly
+    return io.BytesIO(text.getvalue().encode("utf-8-sig"))
+
+
+# ---------------------- JSON ----------------------
+def export_question_bank_json(subject_name, question_data):
+    """The intermediate document itself, as pretty-printed JSON."""
+    document = build_question_bank_document(subject_name, question_data)
+    return io.BytesIO(json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8"))
+
+
+# Format label -> (exporter, file extension, MIME type)
+EXPORT_FORMATS = {
+    "PDF": (export_question_bank_pdf, "pdf", "application/pdf"),
+    "Markdown": (export_question_bank_markdown, "md", "text/markdown"),
+    "DOCX": (export_question_bank_docx, "docx",
+             "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "CSV": (export_question_bank_csv, "csv", "text/csv"),
+    "JSON": (export_question_bank_json, "json", "application/json"),
+}
@@ -5,26 +5,69 @@ import streamlit as st
 import os
 import io
 import re
-import json
+import asyncio
 import PyPDF2
 from docx import Document
 from google.cloud import vision
-import google.generativeai as genai
-
-@st.cache_data
-def extract_topics_from_syllabus(syllabus_text):
-    """
-    Extracts a list of quiz topics from a given syllabus text using the Gemini API.
-    """
+from concurrent.futures import ThreadPoolExecutor
+from utils.jobs import RateLimiter
+from utils.model_router import ModelRouter
+from utils.quiz import Quiz, Question, question_hash_func
+from utils.text_similarity import normalize_text, question_similarity
+from utils.uploads import (
+    UploadTooLarge, open_upload, read_upload, check_upload_size, check_page_count
+)
+
+# ---------------------- Gemini calls (shared rate limit, routing) ----------------------
+# One limiter per process, so parallel workers (batch CLI, background jobs)
+# together stay under the account's requests-per-minute quota.
+_rate_limiter = RateLimiter(float(os.environ.get("GEMINI_RPM", "0")))
+
+def set_rate_limit(requests_per_minute):
+    """Cap Gemini calls from this process; 0 disables the limit."""
+    _rate_limiter.set_rate(requests_per_minute)
+
+def _get_api_key():
+    """GEMINI_API_KEY from the environment, falling back to Streamlit secrets."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        return api_key
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY")
-        if not api_key:
-            st.error("GEMINI_API_KEY secret not found!")
-            return None
-        
-        genai.configure(api_key=api_key)
-        
-        prompt = f"""
+        return st.secrets.get("GEMINI_API_KEY")
+    except Exception:
+        # No secrets.toml (headless CLI / HTTP service)
+        return None
+
+def _call_model(model_name, prompt, timeout):
+    model = genai.GenerativeModel(model_name)
+    return model.generate_content(prompt, request_options={"timeout": timeout})
+
+async def _call_model_async(model_name, prompt, timeout):
+    model = genai.GenerativeModel(model_name)
+    return await model.generate_content_async(prompt, request_options={"timeout": timeout})
+
+# Model choice, deadlines and hedging per task (see utils/model_router.py); the router
+# waits for the rate limiter before each call so limiter waits stay out of its latencies
+_router = ModelRouter(max_workers=int(os.environ.get("PADHAI_MODEL_WORKERS", "32")), limiter=_rate_limiter)
+
+def model_stats():
+    """Per-model latency histograms and hedging counters of this process."""
+    return _router.stats()
+
+def _generate_content(task, prompt):
+    return _router.call(task, prompt, _call_model)
+
+async def _generate_content_async(task, prompt):
+    return await _router.call_async(task, prompt, _call_model_async)
+
+def _parse_json_response(text):
+    cleaned_response = text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned_response)
+
+# ---------------------- Prompts ----------------------
+# Shared by the Streamlit (sync) functions and their *_async service variants.
+def _topics_prompt(syllabus_text):
+    return f"""
         You are an academic assistant. Analyze the following syllabus text and extract a list of main, quiz-worthy topics.
         Focus on specific, concrete subjects. For example, if you see "Unit 3: Trees and Graphs", you should extract "Trees" and "Graphs".
 
@@ -41,10 +84,97 @@ def extract_topics_from_syllabus(syllabus_text):
         Extract the topics now.
         """
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        data = json.loads(cleaned_response)
+def _topic_quiz_prompt(topic, num_questions, quiz_context):
+    return f"""
+        You are an expert quiz creator for engineering students. Your task is to create a professional, multiple-choice quiz on the topic of "{topic}".
+        The quiz should contain exactly {num_questions} questions.
+        The questions should be tailored for a student who is preparing for a "{quiz_context}".
+        
+        **Rules for Generation:**
+        1. The output MUST be a single, valid JSON array `[]`.
+        2. Each object must contain these exact keys: "question_text", "options", "correct_answer", "explanation".
+        3. The "correct_answer" value MUST be an exact, verbatim copy of one of the strings from the "options" array.
+        4. The position of the correct answer in the "options" array MUST be randomized.
+
+        Generate the quiz now.
+        """
+
+def _context_quiz_prompt(context_text, num_questions):
+    return f"""
+        You are an expert quiz creator. Based ONLY on the following text context, create a multiple-choice quiz with exactly {num_questions} questions.
+        The questions must be answerable using only the information in the provided text.
+
+        CONTEXT:
+        ---
+        {context_text}
+        ---
+
+        **Rules for Generation:**
+        1. The output MUST be a single, valid JSON array `[]`.
+        2. Each object must contain "question_text", "options", "correct_answer", and "explanation".
+        3. The "correct_answer" MUST be an exact copy of one of the "options".
+        4. The position of the correct answer in the "options" array MUST be randomized.
+
+        Generate the quiz now.
+        """
+
+def _mistakes_str(incorrect_questions):
+    return "\n".join([f"- {q.question_text} (Correct Answer: {q.correct_answer})" for q in incorrect_questions])
+
+def _study_resources_prompt(topic, incorrect_questions):
+    return f"""
+        You are a helpful academic tutor. A student struggled with the topic of "{topic}" and made mistakes on these questions:
+        {_mistakes_str(incorrect_questions)}
+        Based on these mistakes, identify 2-3 specific sub-topics they are weak in. For each sub-topic, provide a short study strategy and a concise Google search query.
+        **Rules for Generation:**
+        1. The output MUST be a JSON object with one key: "study_plan".
+        2. The value of "study_plan" should be a list of objects.
+        3. Each object must contain three keys: "sub_topic", "study_strategy", and "google_search_query".
+        Generate the study plan now.
+        """
+
+def _learning_path_prompt(topic, incorrect_questions):
+    return f"""
+        You are an expert academic coach. A student is studying "{topic}" and struggled with concepts revealed by these incorrect quiz answers:
+        {_mistakes_str(incorrect_questions)}
+        Create a personalized 3-step learning path to help them master the topic.
+        **Rules for Generation:**
+        1. The output MUST be a valid JSON object with one key: "learning_path".
+        2. The value of "learning_path" should be a list of 3 step objects.
+        3. Each step object must contain three keys: "step_title", "step_details", and "step_rationale".
+        Generate the learning path now.
+        """
+
+def _add_search_links(plan_data):
+    if "study_plan" in plan_data:
+        for item in plan_data["study_plan"]:
+            query = urllib.parse.quote_plus(item["google_search_query"])
+            item["google_search_link"] = f"https://www.google.com/search?q={query}"
+    return plan_data
+
+def _parse_quiz(text):
+    """A Quiz of the well-formed questions in a generated JSON array."""
+    return Quiz.from_dicts(_parse_json_response(text))
+
+def _valid_quiz(quiz, num_questions):
+    return isinstance(quiz, Quiz) and len(quiz) == num_questions
+
+# ---------------------- Streamlit functions ----------------------
+@st.cache_data
+def extract_topics_from_syllabus(syllabus_text):
+    """
+    Extracts a list of quiz topics from a given syllabus text using the Gemini API.
+    """
+    try:
+        api_key = _get_api_key()
+        if not api_key:
+            st.error("GEMINI_API_KEY secret not found!")
+            return None
+        
+        genai.configure(api_key=api_key)
+
+        response = _generate_content("topics", _topics_prompt(syllabus_text))
+        data = _parse_json_response(response.text)
         
         if "topics" in data and isinstance(data["topics"], list):
             return data["topics"]
@@ -61,34 +191,18 @@ def generate_quiz_from_topic(topic, num_questions, quiz_context):
     Generates a tailored quiz from a given topic, number of questions, and context.
     """
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY")
+        api_key = _get_api_key()
         if not api_key:
             st.error("GEMINI_API_KEY secret not found!")
             return None
         
         genai.configure(api_key=api_key)
-        
-        prompt = f"""
-        You are an expert quiz creator for engineering students. Your task is to create a professional, multiple-choice quiz on the topic of "{topic}".
-        The quiz should contain exactly {num_questions} questions.
-        The questions should be tailored for a student who is preparing for a "{quiz_context}".
-        
-        **Rules for Generation:**
-        1. The output MUST be a single, valid JSON array `[]`.
-        2. Each object must contain these exact keys: "question_text", "options", "correct_answer", "explanation".
-        3. The "correct_answer" value MUST be an exact, verbatim copy of one of the strings from the "options" array.
-        4. The position of the correct answer in the "options" array MUST be randomized.
-
-        Generate the quiz now.
-        """
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        quiz_data = json.loads(cleaned_response)
+        response = _generate_content("quiz", _topic_quiz_prompt(topic, num_questions, quiz_context))
+        quiz = _parse_quiz(response.text)
         
-        if isinstance(quiz_data, list) and len(quiz_data) == num_questions:
-            return quiz_data
+        if _valid_quiz(quiz, num_questions):
+            return quiz
         else:
             st.error("The generated quiz does not have the expected format or number of questions.")
             return None
@@ -102,38 +216,18 @@ def generate_quiz_from_context(context_text, num_questions):
     Generates a quiz based on the provided text content.
     """
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY")
+        api_key = _get_api_key()
         if not api_key:
             st.error("GEMINI_API_KEY secret not found!")
             return None
         
         genai.configure(api_key=api_key)
-        
-        prompt = f"""
-        You are an expert quiz creator. Based ONLY on the following text context, create a multiple-choice quiz with exactly {num_questions} questions.
-        The questions must be answerable using only the information in the provided text.
 
-        CONTEXT:
-        ---
-        {context_text}
-        ---
-
-        **Rules for Generation:**
-        1. The output MUST be a single, valid JSON array `[]`.
-        2. Each object must contain "question_text", "options", "correct_answer", and "explanation".
-        3. The "correct_answer" MUST be an exact copy of one of the "options".
-        4. The position of the correct answer in the "options" array MUST be randomized.
-
-        Generate the quiz now.
-        """
-
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        quiz_data = json.loads(cleaned_response)
+        response = _generate_content("context_quiz", _context_quiz_prompt(context_text, num_questions))
+        quiz = _parse_quiz(response.text)
         
-        if isinstance(quiz_data, list) and len(quiz_data) == num_questions:
-            return quiz_data
+        if _valid_quiz(quiz, num_questions):
+            return quiz
         else:
             st.error("The generated quiz does not have the expected format or number of questions.")
             return None
@@ -142,71 +236,341 @@ def generate_quiz_from_context(context_text, num_questions):
         st.error(f"An unexpected error occurred: {e}")
         return None
 
-@st.cache_data
-def get_study_resources(topic, incorrect_questions_tuple):
+@st.cache_data(hash_funcs={Question: question_hash_func})
+def get_study_resources(topic, incorrect_questions):
     """
     Generates study resources with strategies and reliable Google search links.
+    `incorrect_questions` is a tuple of Questions.
     """
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY")
+        api_key = _get_api_key()
         if not api_key: return None
         genai.configure(api_key=api_key)
-        incorrect_questions = [dict(q) for q in incorrect_questions_tuple]
-        mistakes_str = "\n".join([f"- {q['question_text']} (Correct Answer: {q['correct_answer']})" for q in incorrect_questions])
-        prompt = f"""
-        You are a helpful academic tutor. A student struggled with the topic of "{topic}" and made mistakes on these questions:
-        {mistakes_str}
-        Based on these mistakes, identify 2-3 specific sub-topics they are weak in. For each sub-topic, provide a short study strategy and a concise Google search query.
-        **Rules for Generation:**
-        1. The output MUST be a JSON object with one key: "study_plan".
-        2. The value of "study_plan" should be a list of objects.
-        3. Each object must contain three keys: "sub_topic", "study_strategy", and "google_search_query".
-        Generate the study plan now.
-        """
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        plan_data = json.loads(cleaned_response)
-        if "study_plan" in plan_data:
-            for item in plan_data["study_plan"]:
-                query = urllib.parse.quote_plus(item["google_search_query"])
-                item["google_search_link"] = f"https://www.google.com/search?q={query}"
-        return plan_data
+        response = _generate_content("study_plan", _study_resources_prompt(topic, incorrect_questions))
+        return _add_search_links(_parse_json_response(response.text))
     except Exception as e:
         print(f"Could not generate study resources: {e}")
         return None
 
-@st.cache_data
-def generate_learning_path(topic, incorrect_questions_tuple):
+@st.cache_data(hash_funcs={Question: question_hash_func})
+def generate_learning_path(topic, incorrect_questions):
     """
     Generates a personalized, step-by-step learning path.
+    `incorrect_questions` is a tuple of Questions.
     """
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY")
+        api_key = _get_api_key()
         if not api_key: return None
         genai.configure(api_key=api_key)
-        incorrect_questions = [dict(q) for q in incorrect_questions_tuple]
-        mistakes_str = "\n".join([f"- {q['question_text']} (Correct Answer: {q['correct_answer']})" for q in incorrect_questions])
-        prompt = f"""
-        You are an expert academic coach. A student is studying "{topic}" and struggled with concepts revealed by these incorrect quiz answers:
-        {mistakes_str}
-        Create a personalized 3-step learning path to help them master the topic.
+        response = _generate_content("study_plan", _learning_path_prompt(topic, incorrect_questions))
+        return _parse_json_response(response.text)
+    except Exception as e:
+        print(f"Could not generate learning path: {e}")
+        return None
+
+# ---------------------- Per-question remediation ----------------------
+def _remediation_prompt(topic, questions):
+    questions_str = "\n".join(
+        f"{i}. {q.question_text} (Correct Answer: {q.correct_answer})" for i, q in enumerate(questions, start=1)
+    )
+    return f"""
+        You are a helpful academic tutor preparing feedback for a quiz on "{topic}".
+        For EACH question below, assume a student answered it incorrectly. Identify the specific sub-topic that mistake reveals they are weak in, a short study strategy, a concise Google search query, a hands-on practice task and how foundational the sub-topic is.
+        {questions_str}
         **Rules for Generation:**
-        1. The output MUST be a valid JSON object with one key: "learning_path".
-        2. The value of "learning_path" should be a list of 3 step objects.
-        3. Each step object must contain three keys: "step_title", "step_details", and "step_rationale".
-        Generate the learning path now.
+        1. The output MUST be a JSON object with one key: "remediations".
+        2. The value of "remediations" should be a list with exactly one object per question.
+        3. Each object must contain six keys: "index" (the question number above), "sub_topic", "study_strategy", "google_search_query", "practice_task" (one concrete exercise to do after studying, different from the study strategy) and "level" (1 = prerequisite basics, 2 = core concept, 3 = advanced application).
+        Generate the remediations now.
         """
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        path_data = json.loads(cleaned_response)
-        return path_data
+
+def generate_question_remediations(topic, questions):
+    """
+    One remediation record per question ({"sub_topic", "study_strategy",
+    "google_search_query", "practice_task", "level"}), in the same order as
+    `questions`; entries the model skipped are None. Returns None if the call fails.
+    Safe to call from background threads (no st.* calls).
+    """
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = _generate_content("remediation", _remediation_prompt(topic, questions))
+        return _parse_remediations(response.text, len(questions))
     except Exception as e:
-        print(f"Could not generate learning path: {e}")
+        print(f"Could not generate question remediations: {e}")
+        return None
+
+def _parse_remediations(text, num_questions):
+    data = _parse_json_response(text)
+    records = [None] * num_questions
+    for item in data.get("remediations", []):
+        i = int(item.get("index", 0)) - 1
+        if 0 <= i < num_questions and item.get("sub_topic"):
+            records[i] = {
+                "sub_topic": item["sub_topic"],
+                "study_strategy": item.get("study_strategy", ""),
+                "google_search_query": item.get("google_search_query") or item["sub_topic"],
+                "practice_task": item.get("practice_task", ""),
+                "level": _remediation_level(item.get("level")),
+            }
+    return records
+
+def _remediation_level(value):
+    try:
+        return min(max(int(value), 1), 3)
+    except (TypeError, ValueError):
+        return 2
+
+# ---------------------- Async variants (HTTP service) ----------------------
+# Same prompts and parsing as above, but awaiting Gemini instead of blocking a
+# thread, and reporting problems with print() instead of st.error().
+async def extract_topics_from_syllabus_async(syllabus_text):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("topics", _topics_prompt(syllabus_text))
+        data = _parse_json_response(response.text)
+        if "topics" in data and isinstance(data["topics"], list):
+            return data["topics"]
+        return None
+    except Exception as e:
+        print(f"extract_topics_from_syllabus_async error: {e}")
+        return None
+
+async def generate_quiz_from_topic_async(topic, num_questions, quiz_context):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("quiz", _topic_quiz_prompt(topic, num_questions, quiz_context))
+        quiz = _parse_quiz(response.text)
+        return quiz if _valid_quiz(quiz, num_questions) else None
+    except Exception as e:
+        print(f"generate_quiz_from_topic_async error: {e}")
+        return None
+
+async def generate_quiz_from_context_async(context_text, num_questions):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("context_quiz", _context_quiz_prompt(context_text, num_questions))
+        quiz = _parse_quiz(response.text)
+        return quiz if _valid_quiz(quiz, num_questions) else None
+    except Exception as e:
+        print(f"generate_quiz_from_context_async error: {e}")
+        return None
+
+async def get_study_resources_async(topic, incorrect_questions):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("study_plan", _study_resources_prompt(topic, incorrect_questions))
+        return _add_search_links(_parse_json_response(response.text))
+    except Exception as e:
+        print(f"get_study_resources_async error: {e}")
+        return None
+
+async def generate_learning_path_async(topic, incorrect_questions):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("study_plan", _learning_path_prompt(topic, incorrect_questions))
+        return _parse_json_response(response.text)
+    except Exception as e:
+        print(f"generate_learning_path_async error: {e}")
         return None
+
+async def generate_question_remediations_async(topic, questions):
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        response = await _generate_content_async("remediation", _remediation_prompt(topic, questions))
+        return _parse_remediations(response.text, len(questions))
+    except Exception as e:
+        print(f"generate_question_remediations_async error: {e}")
+        return None
+
+
     
 
+# ---------------------- Sharded quiz generation ----------------------
+# A long quiz is one long, output-bound Gemini call. Splitting it into shards of
+# QUIZ_SHARD_SIZE questions generated concurrently, each steered to a different
+# sub-focus, keeps latency close to that of a single short quiz.
+QUIZ_SHARD_SIZE = 5
+# Questions this similar (content tokens) with the same correct answer are duplicates
+QUIZ_DUPLICATE_THRESHOLD = 0.9
+# Extra calls made to replace questions dropped as duplicates or malformed
+QUIZ_TOP_UP_ATTEMPTS = 2
+
+_SHARD_FOCUSES = [
+    "core definitions and fundamental concepts",
+    "worked problems and step-by-step reasoning",
+    "real-world applications and use cases",
+    "common misconceptions, edge cases and pitfalls",
+    "comparisons with related concepts and trade-offs",
+    "performance, complexity and limitations",
+]
+
+def _shard_sizes(num_questions, shard_size=QUIZ_SHARD_SIZE):
+    """Split N into near-equal shards of at most `shard_size`, e.g. 12 -> [4, 4, 4]."""
+    shards = -(-num_questions // shard_size)
+    base, extra = divmod(num_questions, shards)
+    return [base + 1 if i < extra else base for i in range(shards)]
+
+def _quiz_shard_prompt(topic, num_questions, quiz_context, focus, avoid=None):
+    prompt = _topic_quiz_prompt(topic, num_questions, quiz_context)
+    prompt += f"""
+        **Focus for this set:** concentrate on {focus} within "{topic}".
+        """
+    if avoid:
+        avoid_str = "\n".join(f"- {q}" for q in avoid)
+        prompt += f"""
+        **Do NOT repeat or rephrase any of these existing questions:**
+        {avoid_str}
+        """
+    return prompt
+
+def _is_duplicate_question(q, other):
+    # Near-exact only: shards on one topic share most of their wording, so
+    # "...follows LIFO?" and "...follows FIFO?" must both survive
+    if normalize_text(q.question_text) == normalize_text(other.question_text):
+        return True
+    return normalize_text(q.correct_answer) == normalize_text(other.correct_answer) \
+        and question_similarity(q.question_text, other.question_text) >= QUIZ_DUPLICATE_THRESHOLD
+
+def merge_quiz_shards(shards, num_questions):
+    """
+    Concatenate shard Quizzes (malformed questions were dropped when they were
+    parsed), dropping repeated questions (compared locally, no extra LLM
+    call). Returns a Quiz of at most `num_questions`.
+    """
+    merged = []
+    for shard in shards:
+        for q in shard or ():
+            if any(_is_duplicate_question(q, m) for m in merged):
+                continue
+            merged.append(q)
+    return Quiz(merged[:num_questions])
+
+def _generate_quiz_shard(topic, num_questions, quiz_context, focus, avoid=None):
+    # Runs on worker threads: report with print(), st.error() needs the script thread
+    try:
+        response = _generate_content("quiz", _quiz_shard_prompt(topic, num_questions, quiz_context, focus, avoid))
+        return _parse_quiz(response.text)
+    except Exception as e:
+        print(f"quiz shard ({focus}) error: {e}")
+        return None
+
+def generate_quiz_from_topic_sharded(topic, num_questions, quiz_context, shard_size=QUIZ_SHARD_SIZE):
+    """
+    Same result as generate_quiz_from_topic(), but quizzes longer than
+    `shard_size` are generated as concurrent shards, deduplicated and, if
+    questions were lost, topped up with up to QUIZ_TOP_UP_ATTEMPTS extra
+    calls. If it is still short, the shorter quiz is returned with a warning.
+    """
+    if num_questions <= shard_size:
+        return generate_quiz_from_topic(topic, num_questions, quiz_context)
+    try:
+        api_key = _get_api_key()
+        if not api_key:
+            st.error("GEMINI_API_KEY secret not found!")
+            return None
+        genai.configure(api_key=api_key)
+
+        quiz = _sharded_quiz(topic, num_questions, quiz_context, shard_size)
+        if not quiz:
+            st.error("The generated quiz does not have the expected format or number of questions.")
+            return None
+        if len(quiz) < num_questions:
+            st.warning(f"Only {len(quiz)} of {num_questions} distinct questions could be generated for this topic.")
+        return quiz
+    except Exception as e:
+        st.error(f"An unexpected error occurred: {e}")
+        return None
+
+def _sharded_quiz(topic, num_questions, quiz_context, shard_size):
+    # No st.* calls: also used by prefetch_quiz_from_topic() on background threads
+    sizes = _shard_sizes(num_questions, shard_size)
+    with ThreadPoolExecutor(max_workers=len(sizes)) as pool:
+        shards = list(pool.map(
+            lambda args: _generate_quiz_shard(topic, args[1], quiz_context, _SHARD_FOCUSES[args[0] % len(_SHARD_FOCUSES)]),
+            enumerate(sizes)
+        ))
+    quiz = merge_quiz_shards(shards, num_questions)
+
+    for _ in range(QUIZ_TOP_UP_ATTEMPTS):
+        missing = num_questions - len(quiz)
+        if missing <= 0:
+            break
+        gap = _generate_quiz_shard(topic, missing, quiz_context, "any aspect not yet covered",
+                                   avoid=[q.question_text for q in quiz])
+        quiz = merge_quiz_shards([quiz, gap], num_questions)
+    return quiz
+
+def prefetch_quiz_from_topic(topic, num_questions, quiz_context, shard_size=QUIZ_SHARD_SIZE):
+    """
+    generate_quiz_from_topic_sharded() for speculative prefetching on
+    background threads: no st.* calls, failures are printed and return None.
+    """
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+        if num_questions <= shard_size:
+            response = _generate_content("quiz", _topic_quiz_prompt(topic, num_questions, quiz_context))
+            quiz = _parse_quiz(response.text)
+        else:
+            # May be a few questions short, like the interactive path
+            return _sharded_quiz(topic, num_questions, quiz_context, shard_size) or None
+        return quiz if _valid_quiz(quiz, num_questions) else None
+    except Exception as e:
+        print(f"prefetch_quiz_from_topic ({topic}) error: {e}")
+        return None
+
+async def _generate_quiz_shard_async(topic, num_questions, quiz_context, focus, avoid=None):
+    try:
+        response = await _generate_content_async("quiz", _quiz_shard_prompt(topic, num_questions, quiz_context, focus, avoid))
+        return _parse_quiz(response.text)
+    except Exception as e:
+        print(f"quiz shard ({focus}) error: {e}")
+        return None
+
+async def generate_quiz_from_topic_sharded_async(topic, num_questions, quiz_context, shard_size=QUIZ_SHARD_SIZE):
+    if num_questions <= shard_size:
+        return await generate_quiz_from_topic_async(topic, num_questions, quiz_context)
+    try:
+        api_key = _get_api_key()
+        if not api_key: return None
+        genai.configure(api_key=api_key)
+
+        sizes = _shard_sizes(num_questions, shard_size)
+        shards = await asyncio.gather(*(
+            _generate_quiz_shard_async(topic, size, quiz_context, _SHARD_FOCUSES[i % len(_SHARD_FOCUSES)])
+            for i, size in enumerate(sizes)
+        ))
+        quiz = merge_quiz_shards(shards, num_questions)
+
+        for _ in range(QUIZ_TOP_UP_ATTEMPTS):
+            missing = num_questions - len(quiz)
+            if missing <= 0:
+                break
+            gap = await _generate_quiz_shard_async(topic, missing, quiz_context, "any aspect not yet covered",
+                                                   avoid=[q.question_text for q in quiz])
+            quiz = merge_quiz_shards([quiz, gap], num_questions)
+        # A quiz a few questions short beats a failed request
+        return quiz or None
+    except Exception as e:
+        print(f"generate_quiz_from_topic_sharded_async error: {e}")
+        return None
+
+
 # ---------------------- OCR for Images ----------------------
 def ocr_image_bytes(image_bytes):
     try:
@@ -222,58 +586,79 @@ def ocr_image_bytes(image_bytes):
 
 # ---------------------- Syllabus Processing ----------------------
 def process_syllabus(uploaded_file):
+    """Syllabus text of an image or PDF upload. Raises UploadTooLarge over the limits."""
     try:
-        file_bytes = uploaded_file.getvalue()
         filename = uploaded_file.name.lower()
         if filename.endswith(('.png', '.jpg', '.jpeg')):
-            return ocr_image_bytes(file_bytes)
+            return ocr_image_bytes(read_upload(uploaded_file))
         elif filename.endswith('.pdf'):
-            reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            text = ""
-            for p in reader.pages:
-                text += (p.extract_text() or "") + "\n"
-            return text
+            check_upload_size(uploaded_file)
+            with open_upload(uploaded_file) as stream:
+                return extract_text_from_pdf_stream(stream, uploaded_file.name)
         else:
             return ""
+    except UploadTooLarge:
+        raise
     except Exception as e:
         print(f"process_syllabus error: {e}")
         return ""
 
 # ---------------------- PYQ Processing ----------------------
+def extract_text_from_pdf_stream(stream, name="PDF"):
+    """
+    Text of a PDF read from a seekable stream. The page count is checked
+    against the limit before any page is parsed.
+    """
+    reader = PyPDF2.PdfReader(stream)
+    check_page_count(name, len(reader.pages))
+    text = []
+    for page in reader.pages:
+        text.append((page.extract_text() or "") + "\n")
+        # PyPDF2 keeps every object it resolved (including the scanned page
+        # images) until the reader is dropped; forgetting them after each page
+        # bounds memory to one page instead of the whole file.
+        reader.resolved_objects.clear()
+    return "".join(text)
+
+def extract_text_from_docx_stream(stream):
+    return "".join(para.text + "\n" for para in Document(stream).paragraphs)
+
 def extract_text_from_pdf_bytes(file_bytes):
-    text = ""
     try:
-        reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        for page in reader.pages:
-            text += (page.extract_text() or "") + "\n"
+        # io.BytesIO shares the bytes object until written to, so this is not a copy
+        return extract_text_from_pdf_stream(io.BytesIO(file_bytes))
     except Exception as e:
         print(f"extract_text_from_pdf_bytes error: {e}")
-    return text
+        return ""
 
 def extract_text_from_docx_bytes(file_bytes):
-    text = ""
     try:
-        doc = Document(io.BytesIO(file_bytes))
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+        return extract_text_from_docx_stream(io.BytesIO(file_bytes))
     except Exception as e:
         print(f"extract_text_from_docx_bytes error: {e}")
-    return text
+        return ""
 
-def process_pyqs(pyq_files):
-    combined = ""
-    for f in pyq_files:
-        try:
-            fb = f.getvalue()
-            name = f.name.lower()
-            combined += f"\n\n--- FILE: {f.name} ---\n"
+def extract_pyq_text(pyq_file):
+    """Text of a single PYQ paper (PDF or DOCX upload). Raises UploadTooLarge over the limits."""
+    try:
+        name = pyq_file.name.lower()
+        if not name.endswith(('.pdf', '.docx')):
+            return ""
+        check_upload_size(pyq_file)
+        with open_upload(pyq_file) as stream:
             if name.endswith('.pdf'):
-                combined += extract_text_from_pdf_bytes(fb)
-            elif name.endswith('.docx'):
-                combined += extract_text_from_docx_bytes(fb)
-        except Exception as e:
-            print(f"process_pyqs error: {e}")
-    return combined
+                return extract_text_from_pdf_stream(stream, pyq_file.name)
+            return extract_text_from_docx_stream(stream)
+    except UploadTooLarge:
+        raise
+    except Exception as e:
+        print(f"extract_pyq_text error: {e}")
+    return ""
+
+def process_pyqs(pyq_files):
+    # One parse per paper, straight from the upload; pieces are joined once
+    return "".join(f"\n\n--- FILE: {f.name} ---\n" + extract_pyq_text(f) for f in pyq_files)
+
 
 # ---------------------- AI Generator ----------------------
 def _clean_json_like(text):
@@ -283,18 +668,11 @@ def _clean_json_like(text):
         return text[start:end + 1]
     return text
 
-def generate_module_question_bank(syllabus_text, pyqs_text, course_objectives=None):
-    try:
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            from streamlit import secrets
-            api_key = secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=api_key)
-
-        def trim(s, n=20000):
-            return s if len(s) <= n else s[:n] + " [TRUNCATED]"
+def _module_question_bank_prompt(syllabus_text, pyqs_text, course_objectives=None):
+    def trim(s, n=20000):
+        return s if len(s) <= n else s[:n] + " [TRUNCATED]"
 
-        prompt = f"""
+    return f"""
 You are an expert academic analyzer. 
 From the syllabus and PYQs provided, generate a MODULE-WISE PYQ Question Bank.
 
@@ -327,121 +705,101 @@ Instructions:
 Generate now:
 """
 
-        model = genai.GenerativeModel("gemini-2.5-pro")
-        response = model.generate_content(prompt)
-        raw = response.text.strip()
-        json_str = _clean_json_like(raw)
-        data = json.loads(json_str)
-
-        # Normalize
-        output = {}
-        for module, qs in data.items():
-            clean_list = []
-            for q in qs:
-                qt = q.get("question_text", "").strip()
-                rep = int(q.get("repetition_count", 0))
-                imp = q.get("importance", "Normal")
-                clean_list.append({
-                    "question_text": qt,
-                    "repetition_count": rep,
-                    "importance": imp
-                })
-            output[module] = clean_list
-        return output
+def _parse_module_question_bank(raw):
+    json_str = _clean_json_like(raw.strip())
+    data = json.loads(json_str)
+
+    # Normalize
+    output = {}
+    for module, qs in data.items():
+        clean_list = []
+        for q in qs:
+            qt = q.get("question_text", "").strip()
+            rep = int(q.get("repetition_count", 0))
+            imp = q.get("importance", "Normal")
+            clean_list.append({
+                "question_text": qt,
+                "repetition_count": rep,
+                "importance": imp
+            })
+        output[module] = clean_list
+    return output
+
+def generate_module_question_bank(syllabus_text, pyqs_text, course_objectives=None):
+    try:
+        genai.configure(api_key=_get_api_key())
+        prompt = _module_question_bank_prompt(syllabus_text, pyqs_text, course_objectives)
+        response = _generate_content("question_bank", prompt)
+        return _parse_module_question_bank(response.text)
     except Exception as e:
         print(f"generate_module_question_bank error: {e}")
         return None
 
-# ---------------------- MODULE-WISE PYQ PDF EXPORT ----------------------
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER
-from reportlab.pdfgen import canvas as pdfcanvas
-import io
-from datetime import datetime
-
-class NumberedCanvas(pdfcanvas.Canvas):
-    """Custom canvas to add page numbers and footer text."""
-    def __init__(self, *args, footer_text: str = "", **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
-        self.footer_text = footer_text
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            super().showPage()
-        super().save()
-
-    def draw_page_number(self, page_count):
-        page_num_text = f"Page {self._pageNumber} of {page_count}"
-        width, height = A4
-        self.setFont("Helvetica", 9)
-        self.drawCentredString(width / 2.0, 15, page_num_text)
-        if self.footer_text:
-            self.drawString(36, 15, self.footer_text)
-
-def export_question_bank_pdf(subject_name, question_bank):
+async def generate_module_question_bank_async(syllabus_text, pyqs_text, course_objectives=None):
+    try:
+        genai.configure(api_key=_get_api_key())
+        prompt = _module_question_bank_prompt(syllabus_text, pyqs_text, course_objectives)
+        response = await _generate_content_async("question_bank", prompt)
+        return _parse_module_question_bank(response.text)
+    except Exception as e:
+        print(f"generate_module_question_bank_async error: {e}")
+        return None
+
+def _paper_questions_prompt(module_names, paper_text, course_objectives):
+    modules_str = "\n".join(f"- {m}" for m in module_names)
+    return f"""
+You are an expert academic analyzer.
+Extract every individual question from the previous year question paper below and
+assign each one to the most relevant module from this fixed list:
+{modules_str}
+
+--- PYQ PAPER ---
+{paper_text[:32000]}
+--- COURSE OBJECTIVES ---
+{course_objectives or '[none]'}
+-------------------------------
+
+Instructions:
+1. Use the module names EXACTLY as written in the list.
+2. Drop marks, question numbers and "OR" separators; keep only the question wording.
+3. List a question once even if it appears twice in this paper.
+4. Output ONLY a valid JSON object mapping module name to a list of question strings:
+{{
+  "Module 1": ["Explain bubble sort.", "..."],
+  "Module 2": []
+}}
+
+Generate now:
+"""
+
+def _parse_paper_questions(raw):
+    data = json.loads(_clean_json_like(raw.strip()))
+    output = {}
+    for module, qs in data.items():
+        output[module] = [str(q).strip() for q in qs if str(q).strip()]
+    return output
+
+def extract_paper_questions(module_names, paper_text, course_objectives=None):
     """
-    Export module-wise PYQ question bank as a PDF.
-    Uses ⭐ for high-importance questions and bullets for normal ones.
-    Continuous layout; no empty pages between modules.
+    Extracts the questions of ONE new PYQ paper and assigns each to one of the
+    existing modules. Returns {module_name: [question_text, ...]} or None.
+    Used for incremental question bank updates, so only the new paper is sent.
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
-                            rightMargin=36, leftMargin=36,
-                            topMargin=72, bottomMargin=54)
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(name="TitleCentered", parent=styles["Title"], alignment=TA_CENTER, spaceAfter=12)
-    module_style = styles["Heading3"]
-    body_style = styles["BodyText"]
-    footer_text = "Generated and created by Padhai Karo"
-
-    story = []
-
-    # Cover page
-    story.append(Spacer(1, 0.6 * inch))
-    story.append(Paragraph("Module-wise Question Bank", title_style))
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(Paragraph(f"Subject: <b>{subject_name}</b>", styles["Heading2"]))
-    story.append(Spacer(1, 0.1 * inch))
-    date_str = datetime.now().strftime("%B %d, %Y")
-    story.append(Paragraph(f"Generated on: {date_str}", styles["Normal"]))
-    story.append(Spacer(1, 0.4 * inch))
-    story.append(Paragraph(footer_text, styles["Normal"]))
-    story.append(PageBreak())
-
-    # Modules content
-    for module_name, questions in question_bank.items():
-        story.append(Paragraph(module_name, module_style))
-        story.append(Spacer(1, 0.08 * inch))
-        # sort: high importance first
-        qs_sorted = sorted(questions, key=lambda q: (0 if q.get("importance", "").lower() == "high" else 1,
-                                                     -int(q.get("repetition_count", 0))))
-        for q in qs_sorted:
-            qt = q.get("question_text", "").strip()
-            rep = q.get("repetition_count", 0)
-            imp = q.get("importance", "Normal")
-            if imp.lower() == "high":
-                para_text = f"<b>⭐ {qt}</b> — (repeated {rep} times)"
-            else:
-                para_text = f"• {qt} — (repeated {rep} times)"
-            story.append(Paragraph(para_text, body_style))
-            story.append(Spacer(1, 0.06 * inch))
-        story.append(Spacer(1, 0.12 * inch))
-
-    # Final footer
-    story.append(Spacer(1, 0.2 * inch))
-    story.append(Paragraph(footer_text, styles["Normal"]))
-
-    doc.build(story, canvasmaker=lambda *args, **kwargs: NumberedCanvas(*args, footer_text=footer_text, **kwargs))
-    buffer.seek(0)
-    return buffer
+    try:
+        genai.configure(api_key=_get_api_key())
+        prompt = _paper_questions_prompt(module_names, paper_text, course_objectives)
+        response = _generate_content("paper_questions", prompt)
+        return _parse_paper_questions(response.text)
+    except Exception as e:
+        print(f"extract_paper_questions error: {e}")
+        return None
+
+async def extract_paper_questions_async(module_names, paper_text, course_objectives=None):
+    try:
+        genai.configure(api_key=_get_api_key())
+        prompt = _paper_questions_prompt(module_names, paper_text, course_objectives)
+        response = await _generate_content_async("paper_questions", prompt)
+        return _parse_paper_questions(response.text)
+    except Exception as e:
+        print(f"extract_paper_questions_async error: {e}")
+        return None
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ---------------------- Stable content hashing ----------------------
+def content_hash(*parts):
+    """
+    Returns a stable SHA-256 hex digest for any JSON-serialisable values.
+    Dict key order does not affect the result.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------- Background jobs keyed by content ----------------------
+class KeyedJobCache:
+    """
+    Runs callables on a shared thread pool and keeps their futures by key.
+    Submitting a key that is already running or finished returns the existing
+    future, so identical work is done once and re-served instantly.
+    Finished entries are evicted least-recently-used beyond `max_entries`.
+    """
+    def __init__(self, max_workers=2, max_entries=64):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._futures.get(key)
+            # Failed jobs are retried on the next submit instead of being cached
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._futures[key] = future
+            self._evict()
+            return future
+
+    def get(self, key):
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+            return future
+
+    def _evict(self):
+        # Only finished jobs are dropped; running ones must stay reachable
+        overflow = len(self._futures) - self.max_entries
+        if overflow <= 0:
+            return
+        for key in [k for k, f in self._futures.items() if f.done()][:overflow]:
+            del self._futures[key]
+
+
+# ---------------------- Rate limiting ----------------------
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly at `per_minute` calls per
+    minute across all threads. A rate of 0 (or less) disables limiting.
+    """
+    def __init__(self, per_minute=0):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.set_rate(per_minute)
+
+    def set_rate(self, per_minute):
+        with self._lock:
+            self._interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+
+    def _reserve(self):
+        """Book the next free slot and return how long the caller must wait for it."""
+        with self._lock:
+            if not self._interval:
+                return 0.0
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+            return slot - now
+
+    def acquire(self):
+        # Sleep outside the lock so other threads can reserve later slots
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
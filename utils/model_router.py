@@ -0,0 +1,251 @@
+# ---------------------- Model Routing ----------------------
+# Picks the Gemini model for every call from its task and prompt size, gives
+# each call a deadline, and hedges slow calls: once a call has run longer than
+# its model's observed p95 latency (or has failed), the same prompt is sent to
+# the tier's alternate model and the first answer wins; the loser is
+# cancelled. Latencies are kept per model in histograms, so tiers, deadlines
+# and hedging can be tuned from real traffic (ModelRouter.stats()). Time spent
+# waiting for the rate limiter is not part of a model's latency.
+import os
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+# task -> {"tiers": [(max prompt chars or None, model[, alternate]), ...], "alternate": model,
+#          "deadline": seconds}
+# The first tier whose limit fits the prompt is used; a tier's own alternate
+# overrides the task's. Long inputs go to faster models, which answer long
+# prompts much sooner than pro.
+DEFAULT_ROUTES = {
+    "topics": {"tiers": [(None, "gemini-2.5-flash")], "alternate": "gemini-2.5-flash-lite", "deadline": 60},
+    "quiz": {"tiers": [(None, "gemini-2.5-flash")], "alternate": "gemini-2.5-flash-lite", "deadline": 90},
+    # Notes are sent whole: a few lecture handouts fit the first tier, whole books do not
+    "context_quiz": {"tiers": [(100_000, "gemini-2.5-flash"), (None, "gemini-2.5-flash-lite", "gemini-2.5-flash")],
+                     "alternate": "gemini-2.5-flash-lite", "deadline": 120},
+    "study_plan": {"tiers": [(None, "gemini-2.5-flash")], "alternate": "gemini-2.5-flash-lite", "deadline": 60},
+    "remediation": {"tiers": [(None, "gemini-2.5-flash")], "alternate": "gemini-2.5-flash-lite", "deadline": 60},
+    # The syllabus and PYQs are trimmed to 16k + 32k characters, so prompts stay under ~50k:
+    # a short syllabus with a few papers goes to pro, the rest to flash
+    "question_bank": {"tiers": [(24_000, "gemini-2.5-pro"), (None, "gemini-2.5-flash", "gemini-2.5-pro")],
+                      "alternate": "gemini-2.5-flash", "deadline": 300},
+    # Papers are already truncated to 32k characters before the call
+    "paper_questions": {"tiers": [(None, "gemini-2.5-pro")], "alternate": "gemini-2.5-flash", "deadline": 180},
+}
+
+# A model's p95 is trusted for hedging only after this many completed calls
+HEDGE_MIN_SAMPLES = 20
+# Never hedge sooner than this, whatever the histogram says
+MIN_HEDGE_DELAY = 1.0
+
+
+def load_routes():
+    """DEFAULT_ROUTES with per-task overrides from the PADHAI_MODEL_ROUTES JSON env var."""
+    routes = {task: dict(route) for task, route in DEFAULT_ROUTES.items()}
+    overrides = os.environ.get("PADHAI_MODEL_ROUTES")
+    if overrides:
+        try:
+            for task, route in json.loads(overrides).items():
+                routes.setdefault(task, dict(DEFAULT_ROUTES["quiz"])).update(route)
+        except (ValueError, AttributeError) as e:
+            print(f"Ignoring invalid PADHAI_MODEL_ROUTES: {e}")
+    return routes
+
+
+class LatencyHistogram:
+    """Thread-safe latency histogram with geometric buckets (0.1 s to ~10 min)."""
+    BOUNDS = [round(0.1 * 1.5 ** i, 3) for i in range(22)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        bucket = next((i for i, bound in enumerate(self.BOUNDS) if seconds <= bound), len(self.BOUNDS))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None without samples)."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    return self.BOUNDS[i] if i < len(self.BOUNDS) else float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            buckets = {f"<={b}s": n for b, n in zip(self.BOUNDS, self.counts) if n}
+            if self.counts[-1]:
+                buckets[f">{self.BOUNDS[-1]}s"] = self.counts[-1]
+            mean = self.total / self.count if self.count else None
+        return {"count": self.count, "mean": mean, "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95), "buckets": buckets}
+
+
+class ModelRouter:
+    """
+    Routes (task, prompt) to a model and runs the call with a deadline and a
+    hedged request. `call(model, prompt, timeout)` / `call_async(...)` do the
+    actual request; `timeout` is the time left before the deadline. An
+    optional `limiter` (utils.jobs.RateLimiter) is waited on before each
+    request, outside its latency measurement.
+    """
+    def __init__(self, routes=None, max_workers=32, limiter=None):
+        self.routes = routes or load_routes()
+        self.limiter = limiter
+        self.histograms = {}
+        self.counters = {"calls": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0, "failovers": 0}
+        self._lock = threading.Lock()
+        # Sync hedging needs the primary call off the caller's thread
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def route(self, task, prompt):
+        """(model, alternate, deadline seconds) for this task and prompt size."""
+        route = self.routes.get(task) or self.routes["quiz"]
+        tier = next(t for t in route["tiers"] if t[0] is None or len(prompt) <= t[0])
+        alternate = tier[2] if len(tier) > 2 else route["alternate"]
+        return tier[1], alternate, route["deadline"]
+
+    def _histogram(self, model):
+        with self._lock:
+            return self.histograms.setdefault(model, LatencyHistogram())
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def hedge_delay(self, model):
+        """Seconds after which a call to `model` is hedged (None until p95 is known)."""
+        histogram = self._histogram(model)
+        if histogram.count < HEDGE_MIN_SAMPLES:
+            return None
+        return max(MIN_HEDGE_DELAY, histogram.quantile(0.95))
+
+    def _timed(self, model, call, prompt, deadline_at):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        started = time.monotonic()
+        if started >= deadline_at:
+            raise TimeoutError("deadline passed while waiting for the rate limiter")
+        result = call(model, prompt, deadline_at - started)
+        self._histogram(model).observe(time.monotonic() - started)
+        return result
+
+    async def _timed_async(self, model, call_async, prompt, deadline_at):
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        started = time.monotonic()
+        if started >= deadline_at:
+            raise TimeoutError("deadline passed while waiting for the rate limiter")
+        result = await call_async(model, prompt, deadline_at - started)
+        self._histogram(model).observe(time.monotonic() - started)
+        return result
+
+    def _next_wait(self, deadline_at, hedge_at, hedged):
+        now = time.monotonic()
+        if hedged or hedge_at is None:
+            return deadline_at - now
+        return min(deadline_at, hedge_at) - now
+
+    def _timeout_error(self, task, deadline):
+        self._count("timeouts")
+        return TimeoutError(f"{task} call exceeded its {deadline}s deadline")
+
+    def call(self, task, prompt, call):
+        model, alternate, deadline = self.route(task, prompt)
+        self._count("calls")
+        started = time.monotonic()
+        deadline_at = started + deadline
+        hedge_after = self.hedge_delay(model)
+        if hedge_after is None or hedge_after >= deadline:
+            # Nothing to hedge against yet: call in this thread, bounded by the deadline
+            try:
+                return self._timed(model, call, prompt, deadline_at)
+            except Exception as e:
+                if time.monotonic() >= deadline_at:
+                    raise self._timeout_error(task, deadline) from e
+                raise
+        hedge_at = started + hedge_after
+
+        pending = {self._pool.submit(self._timed, model, call, prompt, deadline_at)}
+        hedged = False
+        hedge = error = None
+        while True:
+            wait = self._next_wait(deadline_at, hedge_at, hedged)
+            if wait <= 0 and (hedged or time.monotonic() >= deadline_at):
+                for f in pending:
+                    f.cancel()
+                raise self._timeout_error(task, deadline)
+            done, _ = concurrent.futures.wait(pending, timeout=max(wait, 0),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for f in done:
+                pending.discard(f)
+                if f.exception() is not None:
+                    error = f.exception()
+                    continue
+                # A running sync request cannot be interrupted; its result is dropped
+                for loser in pending:
+                    loser.cancel()
+                if f is hedge:
+                    self._count("hedge_wins")
+                return f.result()
+            if not hedged and (not pending or time.monotonic() >= hedge_at):
+                self._count("failovers" if not pending else "hedges")
+                hedged = True
+                hedge = self._pool.submit(self._timed, alternate, call, prompt, deadline_at)
+                pending.add(hedge)
+            elif not pending:
+                raise error
+
+    async def call_async(self, task, prompt, call_async):
+        model, alternate, deadline = self.route(task, prompt)
+        self._count("calls")
+        started = time.monotonic()
+        deadline_at = started + deadline
+        hedge_after = self.hedge_delay(model)
+        hedge_at = None if hedge_after is None or hedge_after >= deadline else started + hedge_after
+
+        pending = {asyncio.ensure_future(self._timed_async(model, call_async, prompt, deadline_at))}
+        hedged = hedge_at is None
+        hedge = error = None
+        try:
+            while True:
+                wait = self._next_wait(deadline_at, hedge_at, hedged)
+                if wait <= 0 and (hedged or time.monotonic() >= deadline_at):
+                    raise self._timeout_error(task, deadline)
+                done, _ = await asyncio.wait(pending, timeout=max(wait, 0), return_when=asyncio.FIRST_COMPLETED)
+                for f in done:
+                    pending.discard(f)
+                    if f.exception() is not None:
+                        error = f.exception()
+                        continue
+                    if f is hedge:
+                        self._count("hedge_wins")
+                    return f.result()
+                if not hedged and (not pending or time.monotonic() >= hedge_at):
+                    self._count("failovers" if not pending else "hedges")
+                    hedged = True
+                    hedge = asyncio.ensure_future(self._timed_async(alternate, call_async, prompt, deadline_at))
+                    pending.add(hedge)
+                elif not pending:
+                    raise error
+        finally:
+            # Cancel the loser (or everything on deadline / caller cancellation)
+            for f in pending:
+                f.cancel()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {**counters, "models": {m: h.snapshot() for m, h in histograms.items()}}
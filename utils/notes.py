@@ -0,0 +1,112 @@
+# ---------------------- Multi-file Notes ----------------------
+# Notes for "From My Notes" quizzes can be any mix of PDF, PPTX, DOCX and
+# photos of handwritten pages. Files are extracted in a worker pool (OCR for
+# images), so a batch takes about as long as its slowest file, and merged into
+# one corpus without the lines repeated across files (slide headers, copied
+# paragraphs), so the quiz prompt is spent on distinct material.
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pptx import Presentation
+
+from utils.gemini_api import extract_text_from_pdf_stream, extract_text_from_docx_stream, ocr_image_bytes
+from utils.text_similarity import normalize_text
+from utils.uploads import UploadTooLarge, open_upload, read_upload, check_upload_size
+
+NOTE_FILE_TYPES = ['pdf', 'pptx', 'docx', 'png', 'jpg', 'jpeg']
+NOTES_MAX_WORKERS = 4
+# Shorter lines ("Solution:", "Example") are structure, not content, and are never dropped
+MIN_DEDUP_WORDS = 3
+
+
+def extract_text_from_pptx_stream(stream):
+    text = []
+    for slide in Presentation(stream).slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                text.append(shape.text + "\n")
+    return "".join(text)
+
+
+_STREAM_EXTRACTORS = {
+    "pdf": lambda stream, name: extract_text_from_pdf_stream(stream, name),
+    "pptx": lambda stream, name: extract_text_from_pptx_stream(stream),
+    "docx": lambda stream, name: extract_text_from_docx_stream(stream),
+}
+_IMAGE_EXTENSIONS = ("png", "jpg", "jpeg")
+
+
+def extract_note_text(upload):
+    """
+    Text of one notes file, chosen by file extension ("" for unsupported or
+    unreadable files). Raises UploadTooLarge over the size or page limit.
+    """
+    extension = upload.name.rsplit(".", 1)[-1].lower()
+    try:
+        if extension in _IMAGE_EXTENSIONS:
+            # The Vision API needs the image bytes
+            return ocr_image_bytes(read_upload(upload))
+        extractor = _STREAM_EXTRACTORS.get(extension)
+        if extractor is None:
+            return ""
+        check_upload_size(upload)
+        with open_upload(upload) as stream:
+            return extractor(stream, upload.name)
+    except UploadTooLarge:
+        raise
+    except Exception as e:
+        print(f"extract_note_text error ({upload.name}): {e}")
+        return ""
+
+
+def _timed_extract(upload):
+    started = time.perf_counter()
+    try:
+        text, error = extract_note_text(upload), None
+    except UploadTooLarge as e:
+        text, error = "", str(e)
+    return text, error, time.perf_counter() - started
+
+
+def extract_notes(files, max_workers=NOTES_MAX_WORKERS):
+    """
+    Extracts every uploaded file in a worker pool and yields
+    (index, name, text, error, seconds) as each one finishes, so callers can
+    report progress while the others are still running. `error` is the
+    limit message for files that were rejected, else None.
+    """
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as pool:
+        futures = {pool.submit(_timed_extract, f): i for i, f in enumerate(files)}
+        for future in as_completed(futures):
+            i = futures[future]
+            text, error, seconds = future.result()
+            yield i, files[i].name, text, error, seconds
+
+
+def merge_notes(named_texts):
+    """
+    One corpus from [(name, text), ...] in upload order. A line already seen
+    (after normalization) in an earlier file or earlier in the same file is
+    dropped. Returns (corpus, number of dropped lines).
+    """
+    seen = set()
+    parts = []
+    dropped = 0
+    for name, text in named_texts:
+        kept = []
+        for line in re.split(r"\n+", text or ""):
+            key = normalize_text(line)
+            if not key:
+                continue
+            if len(key.split()) >= MIN_DEDUP_WORDS:
+                if key in seen:
+                    dropped += 1
+                    continue
+                seen.add(key)
+            kept.append(line.strip())
+        if kept:
+            parts.append(f"--- FILE: {name} ---\n" + "\n".join(kept))
+    return "\n\n".join(parts), dropped
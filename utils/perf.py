@@ -0,0 +1,64 @@
+# ---------------------- Rerun Timing ----------------------
+# Wall time of every full script run and every fragment rerun, kept in session
+# state. Before fragments every interaction paid the "full app" cost; now an
+# interaction inside the PYQ generator, quiz form or results view only pays
+# for that unit. Shown in the Options / Debugging panel and reported by
+# benchmarks/bench_reruns.py.
+import time
+import functools
+from collections import deque
+
+import streamlit as st
+
+RERUN_TIMINGS_KEY = "rerun_timings"
+MAX_TIMINGS = 200
+
+
+def record_rerun(label, started):
+    """Append the time since `started` (a perf_counter value) under `label`."""
+    timings = st.session_state.get(RERUN_TIMINGS_KEY)
+    if timings is None:
+        timings = st.session_state[RERUN_TIMINGS_KEY] = deque(maxlen=MAX_TIMINGS)
+    timings.append((label, (time.perf_counter() - started) * 1000))
+
+
+def timed_rerun(label):
+    """Decorator recording each call of a (fragment) function under `label`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # Also runs when the body calls st.rerun()
+                record_rerun(label, started)
+        return wrapper
+    return decorator
+
+
+def summarize_reruns(timings):
+    """{label: {"runs", "mean_ms", "max_ms", "last_ms"}} of recorded timings."""
+    summary = {}
+    for label, ms in timings or []:
+        entry = summary.setdefault(label, {"runs": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["runs"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["last_ms"] = ms
+    return {
+        label: {"runs": e["runs"], "mean_ms": e["total_ms"] / e["runs"], "max_ms": e["max_ms"], "last_ms": e["last_ms"]}
+        for label, e in summary.items()
+    }
+
+
+def render_rerun_timings():
+    summary = summarize_reruns(st.session_state.get(RERUN_TIMINGS_KEY))
+    if not summary:
+        st.caption("No reruns recorded yet.")
+        return
+    st.table([
+        {"unit": label, "runs": s["runs"], "mean ms": round(s["mean_ms"], 1),
+         "max ms": round(s["max_ms"], 1), "last ms": round(s["last_ms"], 1)}
+        for label, s in summary.items()
+    ])
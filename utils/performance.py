@@ -0,0 +1,318 @@
+# ---------------------- Per-student Performance Store ----------------------
+# Every submitted quiz is appended to an attempt log, and the aggregates that
+# weak-area features read are updated in the same write: per-(student, topic)
+# accuracy, per-(student, question) results and global per-question miss
+# rates. "Your weakest areas" and "Retry my weakest areas" are then indexed
+# reads of a few rows, never a scan of the history or an extra Gemini call.
+#
+# Weakness is a recency-weighted miss rate: misses and attempts are summed
+# with exponential decay (PADHAI_WEAKNESS_HALF_LIFE_DAYS). Both sums are kept
+# in log space relative to a fixed origin, so they never need rescaling and
+# their ratio only changes when the row is updated; it is stored and indexed.
+#
+# Backends: local SQLite (default, same database as the question banks) or
+# Firebase Realtime Database through Pyrebase when PADHAI_FIREBASE_CONFIG
+# points to a Pyrebase config JSON file.
+import os
+import json
+import math
+import time
+from contextlib import closing
+
+from utils.jobs import content_hash
+from utils.quiz import Question
+from utils.bank_store import connect
+
+HALF_LIFE_DAYS = float(os.environ.get("PADHAI_WEAKNESS_HALF_LIFE_DAYS", "14"))
+_DECAY_PER_SECOND = math.log(2) / (HALF_LIFE_DAYS * 86400)
+
+PERFORMANCE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    quiz_hash TEXT NOT NULL,
+    question_hash TEXT NOT NULL,
+    topic_key TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attempt_questions (
+    question_hash TEXT PRIMARY KEY,
+    topic_key TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    question TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS user_topic_stats (
+    user_id TEXT NOT NULL,
+    topic_key TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    log_attempts REAL,
+    log_misses REAL,
+    weakness REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, topic_key)
+);
+CREATE TABLE IF NOT EXISTS user_question_stats (
+    user_id TEXT NOT NULL,
+    question_hash TEXT NOT NULL,
+    topic_key TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    log_attempts REAL,
+    log_misses REAL,
+    weakness REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, question_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_user_topic_weakness ON user_topic_stats (user_id, weakness DESC);
+CREATE INDEX IF NOT EXISTS idx_user_question_weakness ON user_question_stats (user_id, weakness DESC);
+"""
+
+
+def topic_key(topic):
+    return " ".join((topic or "").lower().split())
+
+
+def _log_add(log_total, amount, now):
+    """log(total + amount * e^(decay * now)), i.e. add `amount` to a decayed sum kept in log space."""
+    if not amount:
+        return log_total
+    term = math.log(amount) + _DECAY_PER_SECOND * now
+    if log_total is None:
+        return term
+    high, low = max(log_total, term), min(log_total, term)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _decayed_value(log_total, now):
+    """The decayed sum as of `now`."""
+    return 0.0 if log_total is None else math.exp(log_total - _DECAY_PER_SECOND * now)
+
+
+def _updated_stats(row, attempts, misses, now):
+    """`row` (a stats dict, empty when new) with one more batch of attempts folded in."""
+    log_attempts = _log_add(row.get("log_attempts"), attempts, now)
+    log_misses = _log_add(row.get("log_misses"), misses, now)
+    return {
+        "attempts": row.get("attempts", 0) + attempts,
+        "log_attempts": log_attempts,
+        "log_misses": log_misses,
+        "weakness": math.exp(log_misses - log_attempts) if log_misses is not None else 0.0,
+        "updated_at": now,
+    }
+
+
+def attempt_updates(topic, quiz, answers, question_topics, question_rows, topic_rows, now):
+    """
+    Log entries and new aggregate rows for one submitted quiz, shared by both
+    backends. `question_topics` maps known question hashes to the (topic key,
+    topic) they were first asked under, so questions of a "weakest areas"
+    quiz count toward their own topics. `question_rows` / `topic_rows` are the
+    student's current rows by question hash / topic key.
+    Returns (log entries, question rows, topic rows, question topics).
+    """
+    correct, _, _ = quiz.score(answers)
+    entries = []
+    questions = {}
+    topics = {}
+    for q, ok in zip(quiz.questions, correct):
+        key, name = question_topics.get(q.content_hash) or (topic_key(topic), topic)
+        question_topics[q.content_hash] = (key, name)
+        entries.append({"question_hash": q.content_hash, "topic_key": key, "correct": int(ok)})
+        row = _updated_stats(question_rows.get(q.content_hash, {}), 1, int(not ok), now)
+        row["misses"] = question_rows.get(q.content_hash, {}).get("misses", 0) + int(not ok)
+        questions[q.content_hash] = {**row, "topic_key": key}
+        tally = topics.setdefault(key, {"topic": name, "attempts": 0, "correct": 0})
+        tally["attempts"] += 1
+        tally["correct"] += int(ok)
+    new_topic_rows = {}
+    for key, tally in topics.items():
+        current = topic_rows.get(key, {})
+        row = _updated_stats(current, tally["attempts"], tally["attempts"] - tally["correct"], now)
+        row["correct"] = current.get("correct", 0) + tally["correct"]
+        new_topic_rows[key] = {**row, "topic": tally["topic"]}
+    return entries, questions, new_topic_rows, question_topics
+
+
+def _weak_topic(row, now):
+    return {"topic": row["topic"], "attempts": row["attempts"],
+            "accuracy": row["correct"] / row["attempts"] if row["attempts"] else None,
+            "weakness": row["weakness"], "recent_misses": _decayed_value(row["log_misses"], now)}
+
+
+class SqlitePerformanceStore:
+    """Performance store in the local SQLite database (default backend)."""
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        with closing(connect(db_path)) as conn:
+            conn.executescript(PERFORMANCE_SCHEMA)
+
+    def record_attempt(self, user_id, topic, quiz, answers, now=None):
+        """Append one submitted quiz to the log and update the aggregates, in one transaction."""
+        now = time.time() if now is None else now
+        hashes = [q.content_hash for q in quiz.questions]
+        marks = ",".join("?" * len(hashes))
+        with closing(connect(self.db_path)) as conn, conn:
+            # Serializes concurrent writers, so aggregate updates are not lost
+            conn.execute("BEGIN IMMEDIATE")
+            question_topics = {r["question_hash"]: (r["topic_key"], r["topic"]) for r in conn.execute(
+                f"SELECT question_hash, topic_key, topic FROM attempt_questions WHERE question_hash IN ({marks})", hashes)}
+            question_rows = {r["question_hash"]: dict(r) for r in conn.execute(
+                f"SELECT * FROM user_question_stats WHERE user_id = ? AND question_hash IN ({marks})", [user_id, *hashes])}
+            keys = {key for key, _ in question_topics.values()} | {topic_key(topic)}
+            topic_rows = {r["topic_key"]: dict(r) for r in conn.execute(
+                f"SELECT * FROM user_topic_stats WHERE user_id = ? AND topic_key IN ({','.join('?' * len(keys))})",
+                [user_id, *keys])}
+
+            entries, questions, topics, question_topics = attempt_updates(
+                topic, quiz, answers, question_topics, question_rows, topic_rows, now)
+
+            conn.executemany(
+                "INSERT INTO attempts (user_id, quiz_hash, question_hash, topic_key, correct, answered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, quiz.content_hash, e["question_hash"], e["topic_key"], e["correct"], now) for e in entries])
+            conn.executemany(
+                "INSERT INTO attempt_questions (question_hash, topic_key, topic, question, attempts, misses) "
+                "VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT (question_hash) DO UPDATE SET "
+                "attempts = attempts + 1, misses = misses + excluded.misses",
+                [(q.content_hash, *question_topics[q.content_hash], json.dumps(q.to_dict(), ensure_ascii=False),
+                  1 - e["correct"]) for q, e in zip(quiz.questions, entries)])
+            conn.executemany(
+                "INSERT OR REPLACE INTO user_question_stats (user_id, question_hash, topic_key, attempts, misses, "
+                "log_attempts, log_misses, weakness, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(user_id, h, r["topic_key"], r["attempts"], r["misses"], r["log_attempts"], r["log_misses"],
+                  r["weakness"], r["updated_at"]) for h, r in questions.items()])
+            conn.executemany(
+                "INSERT OR REPLACE INTO user_topic_stats (user_id, topic_key, topic, attempts, correct, "
+                "log_attempts, log_misses, weakness, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(user_id, key, r["topic"], r["attempts"], r["correct"], r["log_attempts"], r["log_misses"],
+                  r["weakness"], r["updated_at"]) for key, r in topics.items()])
+
+    def weak_topics(self, user_id, limit=3):
+        """The student's weakest topics, weakest first (topics they never missed are left out)."""
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(
+                "SELECT * FROM user_topic_stats WHERE user_id = ? AND weakness > 0 "
+                "ORDER BY weakness DESC LIMIT ?", (user_id, limit)).fetchall()
+        now = time.time()
+        return [_weak_topic(r, now) for r in rows]
+
+    def weakest_questions(self, user_id, limit=10):
+        """Questions the student missed, weakest first, as Questions (for a retry quiz)."""
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(
+                "SELECT q.question FROM user_question_stats s JOIN attempt_questions q USING (question_hash) "
+                "WHERE s.user_id = ? AND s.weakness > 0 ORDER BY s.weakness DESC, s.updated_at DESC LIMIT ?",
+                (user_id, limit)).fetchall()
+        questions = [Question.from_dict(json.loads(r["question"])) for r in rows]
+        return [q for q in questions if q is not None]
+
+    def miss_rates(self, question_hashes):
+        """{question hash: share of all students' attempts that missed it} for known questions."""
+        hashes = list(question_hashes)
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(
+                f"SELECT question_hash, attempts, misses FROM attempt_questions "
+                f"WHERE question_hash IN ({','.join('?' * len(hashes))}) AND attempts > 0", hashes).fetchall()
+        return {r["question_hash"]: r["misses"] / r["attempts"] for r in rows}
+
+
+def _node(value):
+    # Firebase keys cannot contain . $ # [ ] /
+    return content_hash(value)[:24]
+
+
+class FirebasePerformanceStore:
+    """
+    Performance store in Firebase Realtime Database (Pyrebase). Layout:
+      attempts/<user>/<push id>              append-only log, one entry per quiz
+      questions/<question hash>              question, topic, global attempts / misses
+      user_topics/<user>/<topic>             per-topic aggregates
+      user_questions/<user>/<question hash>  per-question aggregates
+    Weak-area reads order by "weakness", so the database rules need
+    ".indexOn": ["weakness"] on user_topics/$user and user_questions/$user.
+    Aggregates are read and written back without a transaction (Pyrebase has
+    none); a student submits one quiz at a time, so only the global
+    per-question counters can race.
+    """
+    def __init__(self, config):
+        import pyrebase
+        self.db = pyrebase.initialize_app(config).database()
+
+    def _get(self, *path):
+        node = self.db
+        for part in path:
+            node = node.child(part)
+        return node.get().val()
+
+    def record_attempt(self, user_id, topic, quiz, answers, now=None):
+        now = time.time() if now is None else now
+        user = _node(user_id)
+        known = {q.content_hash: self._get("questions", q.content_hash) for q in quiz.questions}
+        question_topics = {h: (v["topic_key"], v["topic"]) for h, v in known.items() if v}
+        question_rows = {q.content_hash: self._get("user_questions", user, q.content_hash) or {}
+                         for q in quiz.questions}
+        keys = {key for key, _ in question_topics.values()} | {topic_key(topic)}
+        topic_rows = {key: self._get("user_topics", user, _node(key)) or {} for key in keys}
+
+        entries, questions, topics, question_topics = attempt_updates(
+            topic, quiz, answers, question_topics, question_rows, topic_rows, now)
+
+        self.db.child("attempts").child(user).push(
+            {"quiz_hash": quiz.content_hash, "answered_at": now, "results": entries})
+        # One multi-path update for every aggregate touched by this quiz
+        updates = {}
+        for q, entry in zip(quiz.questions, entries):
+            current = known.get(q.content_hash) or {}
+            key, name = question_topics[q.content_hash]
+            updates[f"questions/{q.content_hash}"] = {
+                "topic_key": key, "topic": name, "question": q.to_dict(),
+                "attempts": current.get("attempts", 0) + 1,
+                "misses": current.get("misses", 0) + 1 - entry["correct"]}
+            updates[f"user_questions/{user}/{q.content_hash}"] = questions[q.content_hash]
+        for key, row in topics.items():
+            updates[f"user_topics/{user}/{_node(key)}"] = row
+        self.db.update(updates)
+
+    def _weakest(self, collection, user_id, limit):
+        rows = (self.db.child(collection).child(_node(user_id))
+                .order_by_child("weakness").limit_to_last(limit).get().val()) or {}
+        rows = [dict(r, key=k) for k, r in rows.items() if r.get("weakness", 0) > 0]
+        return sorted(rows, key=lambda r: r["weakness"], reverse=True)
+
+    def weak_topics(self, user_id, limit=3):
+        now = time.time()
+        return [_weak_topic(r, now) for r in self._weakest("user_topics", user_id, limit)]
+
+    def weakest_questions(self, user_id, limit=10):
+        questions = []
+        for row in self._weakest("user_questions", user_id, limit):
+            stored = self._get("questions", row["key"])
+            q = Question.from_dict(stored["question"]) if stored else None
+            if q is not None:
+                questions.append(q)
+        return questions
+
+    def miss_rates(self, question_hashes):
+        rates = {}
+        for h in question_hashes:
+            stored = self._get("questions", h)
+            if stored and stored.get("attempts"):
+                rates[h] = stored["misses"] / stored["attempts"]
+        return rates
+
+
+def open_performance_store(db_path=None):
+    """Firebase when PADHAI_FIREBASE_CONFIG names a readable Pyrebase config, else local SQLite."""
+    config_path = os.environ.get("PADHAI_FIREBASE_CONFIG")
+    if config_path:
+        try:
+            with open(config_path) as f:
+                return FirebasePerformanceStore(json.load(f))
+        except Exception as e:
+            print(f"Firebase performance store unavailable, using SQLite: {e}")
+    return SqlitePerformanceStore(db_path)
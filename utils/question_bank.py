@@ -0,0 +1,289 @@
+# ---------------------- Per-subject Question Banks ----------------------
+# A stored bank keeps enough provenance (which papers were processed and which
+# papers each question cluster came from) that adding a new PYQ paper only
+# needs that one paper to be sent to Gemini and merged locally.
+import re
+import hashlib
+from datetime import datetime
+
+from utils.text_similarity import question_tokens, question_similarity, normalize_text
+from utils.uploads import upload_hash
+
+# Two question texts at or above this similarity are treated as the same question
+CLUSTER_THRESHOLD = 0.75
+MAX_VARIANTS = 5
+# Questions rendered per page of the question bank view
+PAGE_SIZE = 25
+
+
+def paper_hash(paper):
+    """
+    Identity of an uploaded paper (bytes or an upload object), used to skip
+    papers that were already merged. Uploads are hashed in chunks.
+    """
+    if isinstance(paper, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(paper).hexdigest()
+    return upload_hash(paper)
+
+
+def subject_key(subject_name):
+    return re.sub(r"[^a-z0-9]+", "_", subject_name.strip().lower()).strip("_")
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _importance(cluster):
+    # Same rule the generator prompt uses: repeated questions are high importance
+    if cluster["repetition_count"] > 1:
+        return "High"
+    return cluster.get("importance", "Normal")
+
+
+def create_bank(subject_name, question_data, papers):
+    """
+    Wrap a freshly generated {module: [questions]} result as a stored bank.
+    `papers` maps paper hash -> file name for the papers used to generate it.
+    Repetition counts for these initial papers come from the model, so the
+    clusters do not list individual source papers.
+    """
+    added_at = _now()
+    bank = {
+        "subject": subject_name,
+        "modules": list(question_data.keys()),
+        "papers": {h: {"name": name, "added_at": added_at, "initial": True} for h, name in papers.items()},
+        "clusters": [],
+        "updated_at": added_at,
+    }
+    for module_name, questions in question_data.items():
+        for q in questions:
+            text = q.get("question_text", "").strip()
+            if not text:
+                continue
+            bank["clusters"].append({
+                "id": len(bank["clusters"]),
+                "module": module_name,
+                "question_text": text,
+                "variants": [],
+                "repetition_count": max(int(q.get("repetition_count", 1)), 1),
+                "importance": q.get("importance", "Normal"),
+                "papers": [],
+            })
+    return bank
+
+
+# "Module 3:", "Unit II -", "4." at the start of a module name
+_MODULE_NUMBER = re.compile(r"\s*(?:(?:module|unit|chapter)\s*[-#.:]?\s*(\d+|[ivxl]+)\b|(\d+)\b)[\s.:)\-]*", re.I)
+_ROMAN = {"i": 1, "v": 5, "x": 10, "l": 50}
+
+
+def _roman(numeral):
+    return sum(-_ROMAN[a] if _ROMAN.get(b, 0) > _ROMAN[a] else _ROMAN[a] for a, b in zip(numeral, numeral[1:] + " "))
+
+
+def _module_parts(name):
+    """Module number (None if the name has none) and title tokens of a module name."""
+    match = _MODULE_NUMBER.match(name)
+    if not match:
+        return None, question_tokens(name)
+    number = (match.group(1) or match.group(2)).lower()
+    return int(number) if number.isdigit() else _roman(number), question_tokens(name[match.end():])
+
+
+def _closest_module(bank, module_name):
+    """
+    The bank module a model-given module name refers to. Names are compared by
+    module number and title words, never by spelling: "Module 4" is not
+    "Module 1" and "Module 3: Trees" is not "Module 1: Sorting". A name that
+    matches no module is added as a new one.
+    """
+    if module_name in bank["modules"]:
+        return module_name
+    number, words = _module_parts(module_name)
+    best, best_score = None, 0.0
+    for candidate in bank["modules"]:
+        candidate_number, candidate_words = _module_parts(candidate)
+        if number is not None and candidate_number is not None and number != candidate_number:
+            continue
+        if words and candidate_words:
+            score = 2 * len(words & candidate_words) / (len(words) + len(candidate_words))
+        else:
+            # A bare "Module 2" names the second module whatever its title
+            score = 1.0 if number is not None and number == candidate_number else 0.0
+        if score > best_score:
+            best, best_score = candidate, score
+    if best_score >= 0.5:
+        return best
+    bank["modules"].append(module_name)
+    return module_name
+
+
+def merge_paper(bank, paper_hash_value, paper_name, module_questions):
+    """
+    Merge the questions of one new paper ({module: [question_text]}) into the
+    bank's clusters in place. Matching questions bump the repetition count of
+    their cluster; unmatched ones start a new cluster.
+    Returns {"new": n, "repeated": n}.
+    """
+    stats = {"new": 0, "repeated": 0}
+    if paper_hash_value in bank["papers"]:
+        return stats
+
+    # Keyword -> cluster index, so each new question is only compared with
+    # clusters that share at least one keyword with it
+    index = {}
+    for i, cluster in enumerate(bank["clusters"]):
+        for word in question_tokens(cluster["question_text"]):
+            index.setdefault(word, set()).add(i)
+
+    for module_name, questions in module_questions.items():
+        module_name = _closest_module(bank, module_name)
+        for text in questions:
+            words = question_tokens(text)
+            candidates = set().union(*(index.get(w, ()) for w in words)) if words else set()
+            best_i, best_score = None, 0.0
+            for i in candidates:
+                cluster = bank["clusters"][i]
+                score = question_similarity(text, cluster["question_text"])
+                # Prefer the cluster in the module the model picked on near ties
+                if cluster["module"] == module_name:
+                    score += 0.01
+                if score > best_score:
+                    best_i, best_score = i, score
+
+            if best_i is not None and best_score >= CLUSTER_THRESHOLD:
+                cluster = bank["clusters"][best_i]
+                if paper_hash_value in cluster["papers"]:
+                    continue
+                cluster["papers"].append(paper_hash_value)
+                cluster["repetition_count"] += 1
+                cluster["importance"] = _importance(cluster)
+                if text != cluster["question_text"] and text not in cluster["variants"] \
+                        and len(cluster["variants"]) < MAX_VARIANTS:
+                    cluster["variants"].append(text)
+                stats["repeated"] += 1
+            else:
+                cluster = {
+                    "id": len(bank["clusters"]),
+                    "module": module_name,
+                    "question_text": text,
+                    "variants": [],
+                    "repetition_count": 1,
+                    "importance": "Normal",
+                    "papers": [paper_hash_value],
+                }
+                bank["clusters"].append(cluster)
+                for word in words:
+                    index.setdefault(word, set()).add(cluster["id"])
+                stats["new"] += 1
+
+    bank["papers"][paper_hash_value] = {"name": paper_name, "added_at": _now(), "initial": False}
+    bank["updated_at"] = _now()
+    return stats
+
+
+def merge_generated_bank(bank, question_data, papers):
+    """
+    Merge a freshly generated {module: [questions]} result for `papers`
+    (paper hash -> file name) into an existing bank in place, instead of
+    replacing it and losing the papers merged into it so far. Matching
+    questions add the model's repetition count to their cluster; the others
+    start new clusters. The counts cover every paper the result was generated
+    from, so they can only be added when every one of `papers` is new: if the
+    bank has all of them it is left unchanged, and a result without papers or
+    with only some of them already merged raises ValueError.
+    Returns {"new": n, "repeated": n}.
+    """
+    stats = {"new": 0, "repeated": 0}
+    if not papers:
+        raise ValueError("a generated bank needs the hashes of its papers to be merged into a stored bank")
+    known = [h for h in papers if h in bank["papers"]]
+    if len(known) == len(papers):
+        return stats
+    if known:
+        raise ValueError(f"{len(known)} of the {len(papers)} papers are already in the stored bank; "
+                         "generate from the new papers only")
+
+    for module_name, questions in question_data.items():
+        module_name = _closest_module(bank, module_name)
+        for q in questions:
+            text = q.get("question_text", "").strip()
+            if not text:
+                continue
+            count = max(int(q.get("repetition_count", 1)), 1)
+            best = max(bank["clusters"], key=lambda c: question_similarity(text, c["question_text"]), default=None)
+            if best is not None and question_similarity(text, best["question_text"]) >= CLUSTER_THRESHOLD:
+                best["repetition_count"] += count
+                if q.get("importance") == "High":
+                    best["importance"] = "High"
+                best["importance"] = _importance(best)
+                if text != best["question_text"] and text not in best["variants"] \
+                        and len(best["variants"]) < MAX_VARIANTS:
+                    best["variants"].append(text)
+                stats["repeated"] += 1
+            else:
+                bank["clusters"].append({
+                    "id": len(bank["clusters"]),
+                    "module": module_name,
+                    "question_text": text,
+                    "variants": [],
+                    "repetition_count": count,
+                    "importance": q.get("importance", "Normal"),
+                    "papers": [],
+                })
+                stats["new"] += 1
+
+    added_at = _now()
+    for h, name in papers.items():
+        bank["papers"].setdefault(h, {"name": name, "added_at": added_at, "initial": True})
+    bank["updated_at"] = added_at
+    return stats
+
+
+def bank_to_question_data(bank):
+    """The {module: [question dicts]} shape used by the UI and exporters."""
+    output = {module: [] for module in bank["modules"]}
+    for cluster in bank["clusters"]:
+        output.setdefault(cluster["module"], []).append({
+            "question_text": cluster["question_text"],
+            "repetition_count": cluster["repetition_count"],
+            "importance": cluster["importance"],
+        })
+    return output
+
+
+def build_question_index(question_data):
+    """
+    Every question of a {module: [question dicts]} bank as one flat list,
+    sorted once (high importance first, then most repeated) with a normalized
+    search key. Filters and pages are computed over this list, never by
+    re-sorting the modules.
+    """
+    index = []
+    for module_name, questions in question_data.items():
+        for q in questions:
+            text = q.get("question_text", "").strip()
+            index.append({
+                "module": module_name,
+                "question_text": text,
+                "repetition_count": int(q.get("repetition_count", 0) or 0),
+                "importance": q.get("importance", "Normal"),
+                "search_key": normalize_text(text),
+            })
+    # Stable sort, so ties keep their module order
+    index.sort(key=lambda r: (0 if r["importance"].lower() == "high" else 1, -r["repetition_count"]))
+    return index
+
+
+def filter_question_index(index, query=None, module=None, importance=None, min_repetitions=0):
+    """Positions in `index` matching every filter; all words of `query` must appear."""
+    words = normalize_text(query).split() if query else []
+    importance = importance.lower() if importance else None
+    return [
+        i for i, row in enumerate(index)
+        if row["repetition_count"] >= min_repetitions
+        and (module is None or row["module"] == module)
+        and (importance is None or row["importance"].lower() == importance)
+        and all(w in row["search_key"] for w in words)
+    ]
@@ -0,0 +1,142 @@
+# ---------------------- Quiz Model ----------------------
+# Generated quizzes are parsed once, at the Gemini boundary, into compact
+# Question / Quiz objects: options are a tuple, the correct answer is kept as
+# an index into it (resolved once instead of comparing stripped strings on
+# every rerun), and each question and quiz carries a stable content hash that
+# the remediation cache and the results memo use as their key. Answers are
+# option indices (None for unanswered). to_dict()/from_dict() keep the JSON
+# shape of the prompts and of api_service.py.
+import re
+
+from utils.jobs import content_hash
+
+# "B", "b)", "(B)", "B." style answers that name an option by its letter
+_LETTER_ANSWER = re.compile(r"^\(?([A-Za-z])[).:]?$")
+
+
+def _answer_index(options, correct_answer):
+    """Index of `correct_answer` in `options`, matched leniently; None if it is not one of them."""
+    answer = str(correct_answer or "").strip()
+    stripped = [o.strip() for o in options]
+    if answer in stripped:
+        return stripped.index(answer)
+    folded = [o.casefold() for o in stripped]
+    if answer.casefold() in folded:
+        return folded.index(answer.casefold())
+    match = _LETTER_ANSWER.match(answer)
+    if match:
+        i = ord(match.group(1).upper()) - ord("A")
+        if 0 <= i < len(options):
+            return i
+    return None
+
+
+class Question:
+    """One multiple-choice question; immutable and hashable by content."""
+    __slots__ = ("question_text", "options", "answer_index", "explanation", "content_hash")
+
+    def __init__(self, question_text, options, answer_index, explanation=""):
+        self.question_text = question_text
+        self.options = tuple(options)
+        self.answer_index = answer_index
+        self.explanation = explanation
+        # Same digest as the dict-based remediation keys, so stored records stay valid
+        self.content_hash = content_hash(question_text, list(self.options), self.correct_answer)
+
+    @property
+    def correct_answer(self):
+        return self.options[self.answer_index]
+
+    @classmethod
+    def from_dict(cls, data):
+        """A Question from a generated {"question_text", "options", "correct_answer", "explanation"} dict, or None if malformed."""
+        if not isinstance(data, dict):
+            return None
+        text = str(data.get("question_text") or "").strip()
+        options = data.get("options")
+        if not text or not isinstance(options, list) or len(options) < 2:
+            return None
+        options = [str(o).strip() for o in options]
+        answer_index = _answer_index(options, data.get("correct_answer"))
+        if answer_index is None:
+            return None
+        return cls(text, options, answer_index, str(data.get("explanation") or "").strip())
+
+    def to_dict(self):
+        return {"question_text": self.question_text, "options": list(self.options),
+                "correct_answer": self.correct_answer, "explanation": self.explanation}
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "content_hash"):
+            raise AttributeError("Question is immutable")
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        return isinstance(other, Question) and other.content_hash == self.content_hash
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def __repr__(self):
+        return f"Question({self.question_text!r}, answer={self.answer_index})"
+
+    def __reduce__(self):
+        return Question, (self.question_text, self.options, self.answer_index, self.explanation)
+
+
+class Quiz:
+    """An ordered, immutable sequence of Questions with a content hash over all of them."""
+    __slots__ = ("questions", "content_hash")
+
+    def __init__(self, questions):
+        object.__setattr__(self, "questions", tuple(questions))
+        object.__setattr__(self, "content_hash", content_hash([q.content_hash for q in self.questions]))
+
+    @classmethod
+    def from_dicts(cls, items):
+        """A Quiz of the well-formed questions in a generated JSON list (malformed ones are dropped)."""
+        if not isinstance(items, list):
+            return cls(())
+        return cls(q for q in map(Question.from_dict, items) if q is not None)
+
+    def to_dicts(self):
+        return [q.to_dict() for q in self.questions]
+
+    def score(self, answers):
+        """
+        (per-question correctness, score, incorrect questions) for a tuple of
+        selected option indices, one per question (None = unanswered).
+        """
+        correct = tuple(a == q.answer_index for q, a in zip(self.questions, answers))
+        correct += (False,) * (len(self.questions) - len(correct))
+        incorrect = tuple(q for q, ok in zip(self.questions, correct) if not ok)
+        return correct, sum(correct), incorrect
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Quiz is immutable")
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __iter__(self):
+        return iter(self.questions)
+
+    def __getitem__(self, i):
+        return self.questions[i]
+
+    def __eq__(self, other):
+        return isinstance(other, Quiz) and other.content_hash == self.content_hash
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def __repr__(self):
+        return f"Quiz({len(self.questions)} questions)"
+
+    def __reduce__(self):
+        return Quiz, (self.questions,)
+
+
+def question_hash_func(question):
+    """hash_funcs entry for st.cache_data, so cached functions key questions by content."""
+    return question.content_hash
@@ -0,0 +1,181 @@
+# ---------------------- Speculative Quiz Prefetch ----------------------
+# As soon as a syllabus has been analyzed, quizzes for a few of its topics are
+# generated in the background with the form's default settings, the topics
+# most picked by other students first, then the first topics of the list. A
+# pick that matches a finished prefetch is served instantly (to any session,
+# once per session, until it expires). Prefetching is budgeted: a small
+# worker pool, a cap on queued + running jobs across all sessions and a
+# per-session topic budget. When a session leaves the topic
+# list, its jobs that have not started yet are cancelled (unless another
+# session wants the same topic).
+import os
+import time
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError, TimeoutError as FutureTimeout
+
+PREFETCH_TOPICS = int(os.environ.get("PADHAI_PREFETCH_TOPICS", "3"))
+PREFETCH_WORKERS = int(os.environ.get("PADHAI_PREFETCH_WORKERS", "2"))
+# Queued + running prefetches across all sessions; further topics are skipped
+PREFETCH_MAX_PENDING = int(os.environ.get("PADHAI_PREFETCH_MAX_PENDING", "8"))
+# Finished quizzes nobody picked are dropped after this many seconds
+PREFETCH_TTL = 30 * 60
+# A pick whose prefetch is already running waits this long before generating itself
+PREFETCH_WAIT = 60
+MAX_TRACKED_SESSIONS = 1000
+MAX_TRACKED_TOPICS = 1000
+
+
+def _topic_key(topic):
+    return " ".join((topic or "").lower().split())
+
+
+class QuizPrefetcher:
+    """
+    Process-wide speculative quiz generation shared by all sessions.
+    `generate(topic, num_questions, quiz_context)` must be safe to call from a
+    worker thread (no st.* calls) and return a Quiz or None.
+    """
+    def __init__(self, generate, max_workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING, ttl=PREFETCH_TTL):
+        self._generate = generate
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        # key -> {"future", "owners": session ids waiting for it, "served": session ids it was
+        #         served to, "finished_at"}
+        self._jobs = {}
+        # session id -> keys it has prefetched (its budget), oldest sessions first
+        self._claims = OrderedDict()
+        self._popularity = Counter()
+        self._lock = threading.Lock()
+        self.counters = {"started": 0, "skipped": 0, "cancelled": 0, "expired": 0,
+                         "instant": 0, "waited": 0, "missed": 0}
+
+    @staticmethod
+    def key(topic, num_questions, quiz_context):
+        return _topic_key(topic), num_questions, quiz_context
+
+    def _expire(self):
+        now = time.monotonic()
+        for key, job in list(self._jobs.items()):
+            if job["finished_at"] is None and job["future"].done():
+                job["finished_at"] = now
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl:
+                del self._jobs[key]
+                self.counters["expired"] += 1
+
+    def _pending(self):
+        return sum(not job["future"].done() for job in self._jobs.values())
+
+    def pick_topics(self, topics, limit):
+        """Up to `limit` topics: those picked before by any session (most often first), then list order."""
+        with self._lock:
+            popularity = {t: self._popularity.get(_topic_key(t), 0) for t in topics}
+        ranked = sorted(topics, key=lambda t: -popularity[t])
+        picked, seen = [], set()
+        for topic in ranked:
+            if _topic_key(topic) not in seen:
+                seen.add(_topic_key(topic))
+                picked.append(topic)
+        return picked[:limit]
+
+    def prefetch(self, owner, topics, num_questions, quiz_context, limit=PREFETCH_TOPICS):
+        """
+        Start prefetches for `owner` (a session id) within its budget of
+        `limit` topics. Cheap to call on every rerun: topics already claimed
+        are not started again.
+        """
+        candidates = self.pick_topics(topics, limit)
+        with self._lock:
+            self._expire()
+            claimed = self._claims.setdefault(owner, set())
+            self._claims.move_to_end(owner)
+            while len(self._claims) > MAX_TRACKED_SESSIONS:
+                self._release(next(iter(self._claims)))
+            for topic in candidates:
+                if len(claimed) >= limit:
+                    break
+                key = self.key(topic, num_questions, quiz_context)
+                if key in claimed:
+                    continue
+                job = self._jobs.get(key)
+                if job is None:
+                    if self._pending() >= self.max_pending:
+                        self.counters["skipped"] += 1
+                        continue
+                    future = self._executor.submit(self._generate, topic, num_questions, quiz_context)
+                    job = self._jobs[key] = {"future": future, "owners": set(), "served": set(),
+                                                   "finished_at": None}
+                    self.counters["started"] += 1
+                job["owners"].add(owner)
+                claimed.add(key)
+
+    def _release(self, owner):
+        for key in self._claims.pop(owner, ()):
+            job = self._jobs.get(key)
+            if job is None:
+                continue
+            job["owners"].discard(owner)
+            # Running requests cannot be interrupted; queued ones are dropped
+            if not job["owners"] and job["future"].cancel():
+                del self._jobs[key]
+                self.counters["cancelled"] += 1
+
+    def release(self, owner):
+        """The session left the topic list: cancel its prefetches nobody else is waiting for."""
+        with self._lock:
+            if owner in self._claims:
+                self._release(owner)
+
+    def take(self, owner, topic, num_questions, quiz_context, wait=PREFETCH_WAIT):
+        """
+        The prefetched quiz for this pick, or None (caller generates it).
+        Finished prefetches are served instantly, to every session that picks
+        the topic but at most once per session; a running one is waited for up
+        to `wait` seconds; a queued one is not waited for.
+        """
+        key = self.key(topic, num_questions, quiz_context)
+        with self._lock:
+            self._popularity[key[0]] += 1
+            if len(self._popularity) > MAX_TRACKED_TOPICS:
+                self._popularity = Counter(dict(self._popularity.most_common(MAX_TRACKED_TOPICS // 2)))
+            job = self._jobs.get(key)
+            if job is None or owner in job["served"]:
+                future = None
+            elif not job["future"].running() and not job["future"].done():
+                # Still queued: generating now is faster than waiting for a worker
+                job["owners"].discard(owner)
+                if not job["owners"] and job["future"].cancel():
+                    del self._jobs[key]
+                    self.counters["cancelled"] += 1
+                future = None
+            else:
+                job["served"].add(owner)
+                future = job["future"]
+        if future is None:
+            return self._served("missed", None)
+        outcome = "instant" if future.done() else "waited"
+        try:
+            quiz = future.result(timeout=wait)
+        except (FutureTimeout, CancelledError):
+            quiz = None
+        except Exception as e:
+            print(f"quiz prefetch ({topic}) failed: {e}")
+            quiz = None
+        return self._served(outcome if quiz else "missed", quiz)
+
+    def _served(self, outcome, quiz):
+        with self._lock:
+            self.counters[outcome] += 1
+        return quiz
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            counters = dict(self.counters)
+            pending = self._pending()
+            ready = len(self._jobs) - pending
+            popular = [t for t, _ in self._popularity.most_common(5)]
+        picks = counters["instant"] + counters["waited"] + counters["missed"]
+        return {**counters, "pending": pending, "ready": ready, "popular_topics": popular,
+                "instant_share": counters["instant"] / picks if picks else None}
@@ -0,0 +1,199 @@
+# ---------------------- Per-mistake Remediation ----------------------
+# Remediation is cached per (topic, question) rather than per combination of
+# mistakes: each record holds the weak sub-topic, a strategy and a search query
+# for one question. A student's study plan and learning path are merged locally
+# from the records of their wrong answers, so only questions nobody has missed
+# before are sent to Gemini. Records are also prefetched in the background
+# while a quiz is on screen.
+import os
+import json
+import threading
+import urllib.parse
+from contextlib import closing
+from collections import OrderedDict
+
+from utils.jobs import content_hash
+from utils.gemini_api import generate_question_remediations
+from utils.bank_store import connect
+
+# Thin-client mode: remediations are generated by api_service.py
+if os.environ.get("PADHAI_SERVICE_URL"):
+    from utils.service_client import generate_question_remediations
+
+REMEDIATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS remediations (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+"""
+
+
+# Part of every key: bumped when records gain fields, so older records are regenerated
+RECORD_VERSION = 2
+
+
+def remediation_key(topic, q):
+    return content_hash(RECORD_VERSION, (topic or "").strip().lower(), q.content_hash)
+
+
+class RemediationStore:
+    """
+    Thread-safe {remediation key: record} cache: a bounded in-memory LRU in
+    front of the local SQLite database, so records survive restarts and are
+    shared by every worker on the host. Pass persist=False for memory only.
+    """
+    def __init__(self, max_entries=5000, persist=True, db_path=None):
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.persist = persist
+        self.db_path = db_path
+        if persist:
+            with closing(connect(db_path)) as conn:
+                conn.executescript(REMEDIATION_SCHEMA)
+
+    def _remember(self, key, record):
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+                return record
+        if not self.persist:
+            return None
+        with closing(connect(self.db_path)) as conn:
+            row = conn.execute("SELECT record FROM remediations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row["record"])
+        self._remember(key, record)
+        return record
+
+    def put(self, key, topic, record):
+        self._remember(key, record)
+        if self.persist:
+            with closing(connect(self.db_path)) as conn, conn:
+                conn.execute("INSERT OR REPLACE INTO remediations (key, topic, record) VALUES (?, ?, ?)",
+                             (key, topic, json.dumps(record, ensure_ascii=False)))
+
+
+def fetch_missing_remediations(store, topic, questions):
+    """
+    Ask Gemini, in one call, for the questions of `questions` that have no
+    record yet. Returns how many records were added (0 if nothing was missing).
+    """
+    missing = [q for q in questions if store.get(remediation_key(topic, q)) is None]
+    if not missing:
+        return 0
+    records = generate_question_remediations(topic, missing)
+    if records is None:
+        raise RuntimeError("remediation generation failed")
+    for q, record in zip(missing, records):
+        if record is not None:
+            store.put(remediation_key(topic, q), topic, record)
+    return sum(r is not None for r in records)
+
+
+def _prefetch_key(topic, quiz):
+    return content_hash("remediation", topic, quiz.content_hash)
+
+
+def prefetch_remediations(jobs, store, topic, quiz):
+    """
+    Start (or reuse) the background job that fills `store` for this quiz and
+    return its future (None when every record was cached before any job ran).
+    Calling it again on every rerun is cheap.
+    """
+    key = _prefetch_key(topic, quiz)
+    if all(store.get(remediation_key(topic, q)) is not None for q in quiz):
+        return jobs.get(key)
+    # Returns the running job if there is one; failed jobs are resubmitted
+    return jobs.submit(key, fetch_missing_remediations, store, topic, quiz)
+
+
+def build_study_plan(records, max_items=3):
+    """
+    Merge records (one per wrong answer) into the {"study_plan": [...]} shape
+    of get_study_resources(): the `max_items` sub-topics behind the most
+    mistakes, most first (ties in quiz order).
+    """
+    by_sub_topic = OrderedDict()
+    for record in records:
+        entry = by_sub_topic.setdefault(record["sub_topic"].strip().lower(), {"record": record, "missed": 0})
+        entry["missed"] += 1
+
+    plan = []
+    for entry in sorted(by_sub_topic.values(), key=lambda e: e["missed"], reverse=True)[:max_items]:
+        query = urllib.parse.quote_plus(entry["record"]["google_search_query"])
+        plan.append({**entry["record"], "google_search_link": f"https://www.google.com/search?q={query}"})
+    return {"study_plan": plan}
+
+
+_LEVEL_TITLES = {1: "Rebuild the basics of", 2: "Practice", 3: "Apply"}
+
+
+def build_learning_path(records, incorrect_questions, max_steps=3):
+    """
+    A learning path in the {"learning_path": [...]} shape of
+    generate_learning_path(): the weak sub-topics that explain most of the
+    student's mistakes, prerequisites first, each with its practice task (the
+    study strategies are already listed in the study plan). Returns None if a
+    record has no practice task (caller falls back to the LLM path).
+    """
+    by_sub_topic = OrderedDict()
+    for record, q in zip(records, incorrect_questions):
+        entry = by_sub_topic.setdefault(record["sub_topic"].strip().lower(), {"record": record, "questions": []})
+        entry["questions"].append(q.question_text)
+
+    ranked = sorted(by_sub_topic.values(), key=lambda e: len(e["questions"]), reverse=True)[:max_steps]
+    if any(not e["record"].get("practice_task") for e in ranked):
+        return None
+    # Stable sort: within a level, the sub-topic behind more mistakes comes first
+    ordered = sorted(ranked, key=lambda e: e["record"].get("level", 2))
+    steps = []
+    for i, entry in enumerate(ordered):
+        record = entry["record"]
+        missed = len(entry["questions"])
+        rationale = (f"You missed {missed} question{'s' if missed > 1 else ''} on this, "
+                     f"e.g. \"{entry['questions'][0]}\".")
+        if i + 1 < len(ordered) and record.get("level", 2) < ordered[i + 1]["record"].get("level", 2):
+            rationale += f" {ordered[i + 1]['record']['sub_topic']} builds on it."
+        steps.append({
+            "step_title": f"{_LEVEL_TITLES[record.get('level', 2)]} {record['sub_topic']}",
+            "step_details": record["practice_task"],
+            "step_rationale": rationale,
+        })
+    return {"learning_path": steps}
+
+
+def remediation_plan(jobs, store, topic, quiz, incorrect_questions, wait_seconds=20):
+    """
+    (study_resources, learning_path) for the wrong answers, merged locally from
+    per-question records. Waits up to `wait_seconds` for a running prefetch,
+    then fetches only the still-unseen mistakes. Returns None if records are
+    still missing (caller falls back to the whole-quiz LLM functions);
+    learning_path is None when it cannot be built from the records alone.
+    """
+    records = [store.get(remediation_key(topic, q)) for q in incorrect_questions]
+    if any(r is None for r in records):
+        future = jobs.get(_prefetch_key(topic, quiz))
+        if future is not None:
+            try:
+                future.result(timeout=wait_seconds)
+            except Exception as e:
+                print(f"remediation prefetch did not finish: {e}")
+        try:
+            fetch_missing_remediations(store, topic, incorrect_questions)
+        except Exception as e:
+            print(f"remediation_plan error: {e}")
+        records = [store.get(remediation_key(topic, q)) for q in incorrect_questions]
+        if any(r is None for r in records):
+            return None
+    return build_study_plan(records), build_learning_path(records, incorrect_questions)
@@ -0,0 +1,126 @@
+# ---------------------- HTTP client for api_service.py ----------------------
+# Drop-in replacements for the generation functions of utils/gemini_api.py that
+# call the headless service instead of Gemini, so the Streamlit app can run as a
+# thin client (set PADHAI_SERVICE_URL). Long generations (question banks, paper
+# extraction, remediations) are submitted as service jobs and polled.
+import os
+import time
+import requests
+import streamlit as st
+
+from utils.quiz import Quiz, Question, question_hash_func
+
+SERVICE_URL = os.environ.get("PADHAI_SERVICE_URL", "").rstrip("/")
+REQUEST_TIMEOUT = float(os.environ.get("PADHAI_SERVICE_TIMEOUT", "180"))
+# Seconds between polls of a submitted job
+JOB_POLL_INTERVAL = 1.0
+
+
+def _post(path, payload):
+    response = requests.post(f"{SERVICE_URL}{path}", json=payload, timeout=REQUEST_TIMEOUT)
+    try:
+        data = response.json()
+    except ValueError:
+        data = {}
+    if response.status_code >= 400:
+        raise RuntimeError(data.get("error", f"service returned HTTP {response.status_code}"))
+    return data
+
+
+def _run_job(path, payload):
+    """Submit a service job and poll it until it finishes; returns its result."""
+    job_id = _post(path, payload)["job_id"]
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+    while True:
+        response = requests.get(f"{SERVICE_URL}/jobs/{job_id}", timeout=REQUEST_TIMEOUT)
+        job = response.json()
+        if response.status_code >= 400:
+            raise RuntimeError(job.get("error", f"service returned HTTP {response.status_code}"))
+        if job["status"] == "done":
+            return job["result"]
+        if job["status"] == "failed":
+            raise RuntimeError(job.get("error", "job failed"))
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"job {job_id} did not finish within {REQUEST_TIMEOUT:.0f}s")
+        time.sleep(JOB_POLL_INTERVAL)
+
+
+@st.cache_data
+def extract_topics_from_syllabus(syllabus_text):
+    try:
+        return _post("/topics", {"syllabus_text": syllabus_text})["topics"]
+    except Exception as e:
+        st.error(f"An error occurred while analyzing the syllabus: {e}")
+        return None
+
+def generate_quiz_from_topic(topic, num_questions, quiz_context):
+    try:
+        return Quiz.from_dicts(_post("/quiz/topic", {"topic": topic, "num_questions": num_questions,
+                                                     "quiz_context": quiz_context})["quiz"])
+    except Exception as e:
+        st.error(f"An unexpected error occurred: {e}")
+        return None
+
+# The service shards long quizzes itself, so both names map to the same endpoint
+generate_quiz_from_topic_sharded = generate_quiz_from_topic
+
+def prefetch_quiz_from_topic(topic, num_questions, quiz_context):
+    # Background threads: no st.* calls
+    try:
+        return Quiz.from_dicts(_post("/quiz/topic", {"topic": topic, "num_questions": num_questions,
+                                                     "quiz_context": quiz_context})["quiz"])
+    except Exception as e:
+        print(f"prefetch_quiz_from_topic ({topic}) error: {e}")
+        return None
+
+def generate_quiz_from_context(context_text, num_questions):
+    try:
+        return Quiz.from_dicts(_post("/quiz/context", {"context_text": context_text,
+                                                       "num_questions": num_questions})["quiz"])
+    except Exception as e:
+        st.error(f"An unexpected error occurred: {e}")
+        return None
+
+@st.cache_data(hash_funcs={Question: question_hash_func})
+def get_study_resources(topic, incorrect_questions):
+    try:
+        return _post("/study-resources", {"topic": topic,
+                                          "incorrect_questions": [q.to_dict() for q in incorrect_questions]})
+    except Exception as e:
+        print(f"Could not generate study resources: {e}")
+        return None
+
+@st.cache_data(hash_funcs={Question: question_hash_func})
+def generate_learning_path(topic, incorrect_questions):
+    try:
+        return _post("/learning-path", {"topic": topic,
+                                        "incorrect_questions": [q.to_dict() for q in incorrect_questions]})
+    except Exception as e:
+        print(f"Could not generate learning path: {e}")
+        return None
+
+def generate_module_question_bank(syllabus_text, pyqs_text, course_objectives=None):
+    # No subject_name: the app stores the bank itself, with its paper hashes
+    try:
+        return _run_job("/jobs/question-bank", {"syllabus_text": syllabus_text, "pyqs_text": pyqs_text,
+                                                "course_objectives": course_objectives})["question_bank"]
+    except Exception as e:
+        print(f"generate_module_question_bank error: {e}")
+        return None
+
+def extract_paper_questions(module_names, paper_text, course_objectives=None):
+    try:
+        return _run_job("/jobs/paper-questions", {"module_names": list(module_names), "paper_text": paper_text,
+                                                  "course_objectives": course_objectives})["module_questions"]
+    except Exception as e:
+        print(f"extract_paper_questions error: {e}")
+        return None
+
+def generate_question_remediations(topic, questions):
+    # Background threads: no st.* calls
+    try:
+        return _run_job("/jobs/remediations", {"topic": topic,
+                                               "questions": [q.to_dict() for q in questions]})["remediations"]
+    except Exception as e:
+        print(f"Could not generate question remediations: {e}")
+        return None
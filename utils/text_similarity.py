@@ -0,0 +1,93 @@
+import os
+import re
+from difflib import SequenceMatcher
+
+# Words that carry no meaning for "is this the same question?" comparisons
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "and", "or", "is", "are", "with",
+    "what", "which", "how", "why", "its", "their", "by", "be", "as", "at", "from", "that",
+    "this", "any", "each", "briefly", "detail", "suitable", "example", "examples", "marks",
+    # Instruction verbs: "Define X" and "Explain X" ask about the same concept
+    "define", "explain", "describe", "discuss", "write", "short", "note", "notes", "give",
+}
+
+
+def normalize_text(text):
+    """Lower-case, strip punctuation/numbering and collapse whitespace."""
+    text = (text or "").lower()
+    text = re.sub(r"^\s*(q\.?\s*)?\d+[\).:\-]*\s*(\([a-z]\))?\s*", "", text)
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    return " ".join(text.split())
+
+
+def keyword_set(text):
+    return {w for w in normalize_text(text).split() if w not in _STOPWORDS}
+
+
+def _stem(word):
+    # Only plurals: "algorithms"/"algorithm" are the same word, "sorting"/"sort" may not be
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def question_tokens(text):
+    """Content tokens of a question: keywords without stopwords, plurals folded."""
+    return {_stem(w) for w in keyword_set(text)}
+
+
+def _tokens_match(a, b):
+    # A long word may end in an OCR typo ("algorithrn"); anything else must be exact, since
+    # BFS/DFS, LIFO/FIFO, encryption/decryption or layer2/layer3 differ by a character or two too
+    if a == b:
+        return True
+    if min(len(a), len(b)) < 6:
+        return False
+    prefix = len(os.path.commonprefix((a, b)))
+    return prefix >= max(len(a), len(b)) - 2 and (a[prefix:] + b[prefix:]).isalpha()
+
+
+def similarity(a, b):
+    """
+    Similarity in [0, 1] between two question texts: the better of keyword
+    Jaccard overlap and character-level sequence ratio.
+    """
+    na, nb = normalize_text(a), normalize_text(b)
+    if not na or not nb:
+        return 0.0
+    if na == nb:
+        return 1.0
+    ka, kb = keyword_set(na), keyword_set(nb)
+    jaccard = len(ka & kb) / len(ka | kb) if ka and kb else 0.0
+    matcher = SequenceMatcher(None, na, nb, autojunk=False)
+    # quick_ratio() is an upper bound, so skip the expensive ratio() when it cannot win
+    ratio = matcher.ratio() if matcher.quick_ratio() > jaccard else 0.0
+    return max(jaccard, ratio)
+
+
+def question_similarity(a, b):
+    """
+    Similarity in [0, 1] between two questions, on their content tokens.
+    Character-level ratios rate "Explain bubble sort" and "Explain quick
+    sort" as near-identical, so this is a token Dice score instead, halved
+    when each side has a token the other lacks (one concept swapped for
+    another) rather than one merely adding detail.
+    """
+    ta, tb = question_tokens(a), question_tokens(b)
+    if not ta or not tb:
+        return 1.0 if normalize_text(a) == normalize_text(b) else 0.0
+    unmatched_b = set(tb)
+    matched = 0
+    for token in ta:
+        other = token if token in unmatched_b else next((t for t in unmatched_b if _tokens_match(token, t)), None)
+        if other is not None:
+            unmatched_b.discard(other)
+            matched += 1
+    score = 2 * matched / (len(ta) + len(tb))
+    if matched < len(ta) and unmatched_b:
+        score /= 2
+    return score
+
+
+def is_near_duplicate(a, b, threshold=0.75):
+    return question_similarity(a, b) >= threshold
@@ -0,0 +1,121 @@
+# ---------------------- Bounded-memory Uploads ----------------------
+# Papers, syllabi and notes are parsed from a seekable stream over the upload
+# instead of getvalue() followed by another io.BytesIO copy: in-memory uploads
+# (Streamlit's UploadedFile is a BytesIO) are rewound and read in place, files
+# on disk (batch CLI) are memory-mapped, and non-seekable streams are spooled
+# to a temporary file. Size and page-count limits are checked before a file
+# is fully parsed.
+import os
+import io
+import mmap
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+MAX_UPLOAD_MB = float(os.environ.get("PADHAI_MAX_UPLOAD_MB", "50"))
+MAX_PDF_PAGES = int(os.environ.get("PADHAI_MAX_PDF_PAGES", "300"))
+# Spooled uploads stay in memory up to this size, then move to a temporary file
+SPOOL_MAX_MEMORY = 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """An upload over the size or page-count limit; the message is shown to the user."""
+
+
+def upload_size(upload):
+    """Size in bytes, without reading the upload."""
+    size = getattr(upload, "size", None)
+    if size is not None:
+        return size
+    path = getattr(upload, "path", None)
+    if path:
+        return os.path.getsize(path)
+    position = upload.tell()
+    upload.seek(0, os.SEEK_END)
+    size = upload.tell()
+    upload.seek(position)
+    return size
+
+
+def check_upload_size(upload, max_mb=None):
+    max_mb = MAX_UPLOAD_MB if max_mb is None else max_mb
+    size = upload_size(upload)
+    if size > max_mb * 1024 * 1024:
+        raise UploadTooLarge(f"{upload.name} is {size / (1024 * 1024):.1f} MB; the limit is {max_mb:g} MB.")
+
+
+def check_page_count(name, pages, max_pages=None):
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+    if pages > max_pages:
+        raise UploadTooLarge(f"{name} has {pages} pages; the limit is {max_pages}.")
+
+
+class _MappedReader(io.RawIOBase):
+    """Read-only file object over an mmap; zipfile (DOCX/PPTX) needs seekable()."""
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._mapped.read(None if size is None or size < 0 else size)
+
+    def readinto(self, buffer):
+        data = self._mapped.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self):
+        return self._mapped.tell()
+
+
+@contextmanager
+def open_upload(upload):
+    """
+    Seekable binary stream over an upload (an object with .path, a seekable
+    file object, or any readable stream), positioned at the start. Nothing
+    is copied unless the upload cannot seek.
+    """
+    path = getattr(upload, "path", None)
+    if path:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                yield io.BytesIO(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield _MappedReader(mapped)
+    elif getattr(upload, "seekable", lambda: False)():
+        upload.seek(0)
+        yield upload
+    else:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            shutil.copyfileobj(upload, spool, CHUNK_SIZE)
+            spool.seek(0)
+            yield spool
+
+
+def read_upload(upload):
+    """Whole upload as bytes, for APIs that need them (OCR); checks the size limit first."""
+    check_upload_size(upload)
+    with open_upload(upload) as stream:
+        return stream.read()
+
+
+def upload_hash(upload):
+    """sha256 of an upload, read in chunks."""
+    digest = hashlib.sha256()
+    with open_upload(upload) as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()